@@ -0,0 +1,844 @@
+import os
+import sys
+import time
+import json
+import hashlib
+import warnings
+import numpy as np
+import pandas as pd
+import requests
+from requests.adapters import HTTPAdapter
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+
+# 단독 실행(python Labs/04_unified_wfa_tester.py) 시에도 루트 패키지 import
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from core.indicators import FEATURES, FeatureStore
+from exchange.rate_limiter import request_scheduler
+from tests.candle_store import OhlcvDownloader
+
+warnings.filterwarnings("ignore")
+
+session = requests.Session()
+session.mount("https://", HTTPAdapter(max_retries=0))
+
+DATA_ROOT = "data/b117"
+TOTAL_CAPITAL = 1_000_000
+FEE = 0.003
+ATR_K = 3.0
+
+
+# =========================================================
+# 1) 업비트 OHLCV 수집 (증분, 동시)
+# =========================================================
+
+# 일봉은 공용 캔들 캐시(data/candles/upbit/1d)에 누적하고 커버리지 맵으로
+# 이미 받은 날짜를 추적한다. 재실행 시 새로 확정된 날짜만 요청하며,
+# 요청 속도는 공유 스케줄러의 upbit 예산(429 한도)을 따른다. HISTORY_DAYS는
+# 동기화 구간이고, CSV는 캐시에 쌓인 전체 이력을 내보낸다 (load_daily).
+HISTORY_DAYS = 700
+UPBIT_PAGE_LIMIT = 200  # 일봉 1회 최대 개수
+COLLECT_CONCURRENCY = 8
+KST_OFFSET = pd.Timedelta(hours=9)
+DAY_MS = 24 * 3600 * 1000
+
+upbit_downloader = OhlcvDownloader(
+    "upbit", timeframe="1d", page_limit=UPBIT_PAGE_LIMIT, concurrency=COLLECT_CONCURRENCY
+)
+
+
+def prepare_directory():
+    """데이터 디렉토리 준비 (기존 데이터는 유지, 증분 수집)"""
+    os.makedirs(DATA_ROOT, exist_ok=True)
+
+
+def settled_range(days=HISTORY_DAYS):
+    """확정된 일봉 구간 [start, end) ms (업비트 일봉은 UTC 00:00 = KST 09:00 시작)"""
+    end = int(time.time() * 1000) // DAY_MS * DAY_MS
+    return end - days * DAY_MS, end
+
+
+def sync_daily(symbols):
+    """KRW 마켓 일봉을 캐시에 증분 동기화 → 심볼별 다운로드 요약"""
+    start_ms, end_ms = settled_range()
+    return upbit_downloader.run([f"{sym}/KRW" for sym in symbols], start_ms, end_ms)
+
+
+def load_daily(sym):
+    """캐시에 쌓인 확정 일봉 전체 → KST 날짜 인덱스 DataFrame (없으면 None)
+
+    최근 HISTORY_DAYS일만 잘라 내보내면 날짜가 지날 때마다 첫 행이 밀려
+    FeatureStore/baskets.npz의 "이전 행 = 현재 앞부분" 검사가 매번 깨진다.
+    캐시는 앞쪽을 지우지 않으므로 전체를 내보내면 이전 CSV가 항상 앞부분으로 남는다.
+    """
+    _, end_ms = settled_range()
+    arrays = upbit_downloader.cache.open("upbit", f"{sym}/KRW", "1d").window(0, end_ms - 1)
+    if not len(arrays):
+        return None
+    df = pd.DataFrame(
+        {
+            "open": arrays.open.astype(float),
+            "high": arrays.high.astype(float),
+            "low": arrays.low.astype(float),
+            "close": arrays.close.astype(float),
+            "volume": arrays.volume.astype(float),
+        },
+        index=pd.to_datetime(np.asarray(arrays.ts), unit="ms") + KST_OFFSET,
+    )
+    df.index.name = "date"
+    return df
+
+
+def upbit_krw_symbols():
+    request_scheduler.acquire("upbit", "fetch_markets", "backtest")
+    markets = session.get("https://api.upbit.com/v1/market/all?isDetails=false", timeout=10).json()
+    return [m["market"].replace("KRW-", "") for m in markets if m["market"].startswith("KRW-")]
+
+
+# =========================================================
+# 2) 자동 화이트리스트 생성
+# =========================================================
+
+def build_auto_whitelist(target_count=50, min_days=200):
+    print("📌 자동 화이트리스트 생성 시작...", end=" ")
+    upbit_syms = set(upbit_krw_symbols())
+
+    request_scheduler.acquire("binance", "fetch_tickers", "backtest")
+    tickers = session.get("https://api.binance.com/api/v3/ticker/24hr", timeout=10).json()
+    usdt = sorted(
+        [t for t in tickers if t["symbol"].endswith("USDT")],
+        key=lambda x: float(x["quoteVolume"]),
+        reverse=True
+    )
+    binance_syms = [t["symbol"].replace("USDT", "") for t in usdt]
+    candidates = [s for s in binance_syms if s in upbit_syms]
+
+    print(f"(교집합 {len(candidates)}개)")
+    start_ms, end_ms = settled_range(min_days)
+    valid, checked = [], 0
+
+    # 거래대금 순으로 부족한 개수만큼씩 묶어 동시 동기화 (이미 받은 날짜는 재요청 안 함)
+    while len(valid) < target_count and checked < len(candidates):
+        batch = candidates[checked:checked + target_count - len(valid)]
+        sync_daily(batch)
+        for sym in batch:
+            arrays = upbit_downloader.cache.open("upbit", f"{sym}/KRW", "1d")
+            if len(arrays.window(start_ms, end_ms - 1)) >= min_days:
+                valid.append(sym)
+        checked += len(batch)
+        print(f"\r📌 화이트리스트 검증 ({checked}/{len(candidates)}) → {len(valid)}개 확보", end="")
+
+    print()
+    return valid
+
+
+# =========================================================
+# 3) 데이터 수집
+# =========================================================
+
+def collect_b117_universe(whitelist):
+    os.makedirs(DATA_ROOT, exist_ok=True)
+
+    wl = set(whitelist)
+    targets = [sym for sym in upbit_krw_symbols() if sym in wl or sym in ("BTC", "ETH")]
+
+    print(f"📥 Step 1) 업비트 데이터 수집 ({len(targets)} symbols)")
+    started = time.time()
+    summary = sync_daily(targets)
+    fetched = sum(r.get("candles", 0) for r in summary.values())
+    failed = [r["symbol"] for r in summary.values() if r.get("failed_shards")]
+    print(f"→ 신규 일봉 {fetched:,}개 수신 ({time.time() - started:.1f}s)"
+          + (f", 실패 {len(failed)}개: {', '.join(failed)}" if failed else ""))
+
+    # 유니버스 밖으로 빠진 심볼의 CSV/지표 캐시는 정리 (load_raw_data는 폴더의 CSV 전체를 읽음)
+    for f in os.listdir(DATA_ROOT):
+        sym = f.split(".")[0]
+        if f.endswith((".csv", ".features.npz")) and sym not in targets:
+            os.remove(os.path.join(DATA_ROOT, f))
+
+    for sym in targets:
+        df = load_daily(sym)
+        if df is not None and not df.empty:
+            df.to_csv(os.path.join(DATA_ROOT, f"{sym}.csv"))
+
+
+# =========================================================
+# 4) RAW 로딩 + 기본 지표
+# =========================================================
+
+def load_raw_data():
+    """CSV 로드 + 공용 지표 엔진으로 지표 부착 (CSV 옆 .features.npz 캐시, 새 봉만 계산)"""
+    df_dict = {}
+    for f in os.listdir(DATA_ROOT):
+        if not f.endswith(".csv"):
+            continue
+        df = pd.read_csv(os.path.join(DATA_ROOT, f), index_col=0, parse_dates=True).sort_index()
+        df.columns = [c.lower() for c in df.columns]
+        df_dict[f.replace(".csv", "")] = df
+
+    bases = {os.path.join(DATA_ROOT, t): t for t in df_dict}
+    features = FeatureStore().update({
+        base: {
+            "ts": df_dict[t].index.asi8,
+            "high": df_dict[t]["high"].to_numpy(),
+            "low": df_dict[t]["low"].to_numpy(),
+            "close": df_dict[t]["close"].to_numpy(),
+        }
+        for base, t in bases.items()
+    })
+    for base, t in bases.items():
+        for name in FEATURES:
+            df_dict[t][name] = features[base][name]
+    return df_dict
+
+
+# =========================================================
+# 5) ALT 스코어 (시장 국면별, 날짜별 as-of 행렬)
+# =========================================================
+
+BASKET_TOP_N = 7
+BASKET_MIN_ROWS = 120
+# 국면별 스코어 가중치 (90일 수익률 / 10·30일 MA 모멘텀 / 30일 거래량 변화 / BTC 상관)
+REGIME_SCORE_WEIGHTS = {
+    "BULL": {"r90": 0.45, "momentum": 0.35, "vol_chg": 0.15, "corr": 0.05},
+    "SIDE": {"r90": 0.30, "momentum": 0.30, "vol_chg": 0.10, "corr": 0.30},
+}
+
+
+def score_alts_by_regime(df_dict):
+    """날짜(BTC 인덱스) × ALT 스코어 행렬을 국면별로 계산
+
+    각 날짜의 값은 그 날짜까지의 데이터만 사용한다 (rolling/expanding 지표를 ffill 정렬).
+    """
+    btc = df_dict["BTC"]
+    dates = btc.index
+    alts = [sym for sym in df_dict.keys() if sym not in ("BTC", "ETH")]
+    btc_ret = btc["close"].pct_change()
+
+    def as_of(series):
+        return series.reindex(dates, method="ffill").to_numpy(dtype=float)
+
+    r90, momentum, vol_chg, corr, rows = [], [], [], [], []
+    for sym in alts:
+        df = df_dict[sym]
+        close = df["close"]
+        ret = close.pct_change()
+        r90.append(as_of(close.pct_change(90)))
+        momentum.append(as_of(close.rolling(10).mean() / close.rolling(30).mean().replace(0, np.nan) - 1))
+        vol_chg.append(as_of(df["volume"].pct_change(30)))
+        corr.append(as_of(ret.expanding(min_periods=2).corr(btc_ret.reindex(df.index))))
+        rows.append(as_of(pd.Series(np.arange(1, len(df) + 1), index=df.index)))
+
+    def stack(cols, fill):
+        m = np.column_stack(cols)
+        return np.where(np.isnan(m), fill, m)
+
+    factors = {
+        "r90": stack(r90, -1),
+        "momentum": stack(momentum, -1),
+        "vol_chg": stack(vol_chg, 0),
+        "corr": stack(corr, 0),
+    }
+    eligible = stack(rows, 0) >= BASKET_MIN_ROWS
+
+    scores = {
+        regime: sum(w * factors[name] for name, w in weights.items())
+        for regime, weights in REGIME_SCORE_WEIGHTS.items()
+    }
+    return alts, scores, eligible
+
+
+def basket_params(top_n):
+    """바스켓 결과를 바꾸는 설정 해시 (캐시 유효성 검사용)"""
+    params = {"top_n": top_n, "min_rows": BASKET_MIN_ROWS, "weights": REGIME_SCORE_WEIGHTS}
+    return hashlib.sha1(json.dumps(params, sort_keys=True).encode()).hexdigest()[:16]
+
+
+# =========================================================
+# 6) ALT 바스켓 테이블 (date × rank 정수 행렬, 캐시)
+# =========================================================
+
+def build_baskets(df_dict, top_n=BASKET_TOP_N, cache_path=None):
+    """날짜별 상위 top_n ALT 인덱스 행렬 (BEAR/NONE 또는 후보 부족 칸은 -1)
+
+    결과는 {"dates", "alts", "ranks"}이고 DATA_ROOT/baskets.npz에 저장한다.
+    캐시의 날짜가 현재 날짜의 앞부분과 같고 설정(basket_params)도 같으면
+    새 날짜 행만 계산해 이어 붙인다.
+    """
+    cache_path = cache_path or os.path.join(DATA_ROOT, "baskets.npz")
+    dates = df_dict["BTC"].index
+    alts = [sym for sym in df_dict.keys() if sym not in ("BTC", "ETH")]
+
+    params = basket_params(top_n)
+    cached_ranks = np.empty((0, top_n), dtype=np.int16)
+    if os.path.exists(cache_path):
+        with np.load(cache_path) as cached:
+            n = len(cached["dates"])
+            if ("params" in cached and str(cached["params"]) == params
+                    and list(cached["alts"]) == alts and cached["ranks"].shape[1] == top_n and n <= len(dates)
+                    and np.array_equal(cached["dates"], dates[:n].to_numpy(dtype="datetime64[ns]").astype(np.int64))):
+                cached_ranks = cached["ranks"]
+
+    start = len(cached_ranks)
+    ranks = cached_ranks
+    if start < len(dates):
+        _, scores, eligible = score_alts_by_regime(df_dict)
+        state = market_state_codes(df_dict["BTC"])[start:]
+        new = np.full((len(dates) - start, top_n), -1, dtype=np.int16)
+        for regime in ("BULL", "SIDE"):
+            rows = np.flatnonzero(state == STATE_CODES[regime])
+            if not len(rows):
+                continue
+            score = np.where(eligible[start + rows], scores[regime][start + rows], -np.inf)
+            order = np.argsort(-score, axis=1, kind="stable")[:, :top_n]
+            picked = np.take_along_axis(score, order, axis=1)
+            new[rows, :order.shape[1]] = np.where(picked > -np.inf, order, -1)
+        ranks = np.concatenate([cached_ranks, new])
+
+        os.makedirs(os.path.dirname(cache_path) or ".", exist_ok=True)
+        np.savez(
+            cache_path,
+            dates=dates.to_numpy(dtype="datetime64[ns]").astype(np.int64),
+            alts=np.array(alts),
+            ranks=ranks,
+            params=np.array(params),
+        )
+
+    return {"dates": dates, "alts": alts, "ranks": ranks}
+
+
+# =========================================================
+# 7) 인덱스 정렬
+# =========================================================
+
+def align_index(df_dict, start_dt=None, end_dt=None):
+    idx = df_dict["BTC"].index
+    if start_dt:
+        idx = idx[idx >= pd.to_datetime(start_dt)]
+    if end_dt:
+        idx = idx[idx <= pd.to_datetime(end_dt)]
+    return {k: v.reindex(idx).copy() for k, v in df_dict.items()}, idx
+
+
+# =========================================================
+# 8) 시장 국면 + 시뮬레이션 엔진
+# =========================================================
+
+def get_market_state(btc_row):
+    price = btc_row["close"]
+    ma_long = btc_row["ma_long"]
+    rsi = btc_row["rsi"]
+
+    if pd.isna(price) or pd.isna(ma_long) or pd.isna(rsi):
+        return "NONE"
+
+    if price < ma_long or rsi < 40:
+        return "BEAR"
+    if price > ma_long and rsi > 50:
+        return "BULL"
+    return "SIDE"
+
+
+STATE_CODES = {"NONE": 0, "BULL": 1, "SIDE": 2, "BEAR": 3}
+
+
+def market_state_codes(btc_df):
+    """get_market_state를 전체 행에 벡터로 적용한 STATE_CODES 배열"""
+    price = btc_df["close"].to_numpy(dtype=float)
+    ma_long = btc_df["ma_long"].to_numpy(dtype=float)
+    rsi = btc_df["rsi"].to_numpy(dtype=float)
+    with np.errstate(invalid="ignore"):
+        codes = np.where(
+            (price < ma_long) | (rsi < 40), STATE_CODES["BEAR"],
+            np.where((price > ma_long) & (rsi > 50), STATE_CODES["BULL"], STATE_CODES["SIDE"]),
+        )
+    codes[np.isnan(price) | np.isnan(ma_long) | np.isnan(rsi)] = STATE_CODES["NONE"]
+    return codes
+
+
+def get_dynamic_weights(state):
+    if state == "BULL":
+        return {"BTC": 0.4, "ETH": 0.5, "ALT": 0.1}
+    if state == "SIDE":
+        return {"BTC": 0.6, "ETH": 0.3, "ALT": 0.1}
+    if state == "BEAR":
+        return {"BTC": 0.0, "ETH": 0.0, "ALT": 0.0}
+    return {"BTC": 0.0, "ETH": 0.0, "ALT": 0.0}
+
+
+THRESH = 0.05
+SLIPPAGE = {
+    "BTC": 0.0003,
+    "ETH": 0.0005,
+}
+DEFAULT_ALT_SLIPPAGE = 0.0015
+
+
+def prepare_arrays(df_dict, baskets, start_dt=None, end_dt=None):
+    """구간 정렬 (days × tokens) 행렬 + 파라미터와 무관한 조건을 한 번만 계산"""
+    aligned, idx = align_index(df_dict, start_dt, end_dt)
+    tokens = list(aligned.keys())
+
+    def matrix(col):
+        return np.column_stack([aligned[t][col].to_numpy(dtype=float) for t in tokens])
+
+    close = matrix("close")
+    ma_long = matrix("ma_long")
+    ma_short = matrix("ma_short")
+    rsi = matrix("rsi")
+    atr = matrix("atr")
+
+    # 전일 대비 수익률 (어느 한쪽이 NaN이면 0)
+    rets = np.zeros_like(close)
+    if len(idx) > 1:
+        with np.errstate(invalid="ignore", divide="ignore"):
+            r = (close[1:] - close[:-1]) / close[:-1]
+        rets[1:] = np.where(np.isnan(r), 0.0, r)
+
+    # 구간 내 최근 30행 최저가 (기존 df.loc[:date_cur].tail(30)["close"].min()와 동일)
+    bot = pd.DataFrame(close).rolling(30, min_periods=1).min().to_numpy()
+    with np.errstate(invalid="ignore", divide="ignore"):
+        rebound = np.where(bot > 0, (close - bot) / bot * 100, 0.0)
+
+    valid = ~(np.isnan(close) | np.isnan(ma_long) | np.isnan(ma_short) | np.isnan(rsi))
+    with np.errstate(invalid="ignore"):
+        trend = valid & (close > ma_long) & (ma_short > ma_long)
+        exit_ac = (close < ma_long * 0.99) | (rsi < 45)
+
+    state = market_state_codes(aligned["BTC"])
+
+    # 국면별 기본 비중 → 토큰별 비중 행렬 (ALT는 해당 날짜 바스켓에 있을 때만)
+    ranks = baskets["ranks"]
+    alt_pos = {t: i for i, t in enumerate(baskets["alts"])}
+    member = np.zeros((len(ranks), len(alt_pos) + 1), dtype=bool)  # 마지막 열: -1(빈 칸)
+    member[np.repeat(np.arange(len(ranks)), ranks.shape[1]), ranks.ravel()] = True
+    b_idx = np.searchsorted(baskets["dates"], idx, side="right") - 1
+    base_w = np.zeros_like(close)
+    for code_name, code in STATE_CODES.items():
+        rows = state == code
+        if not rows.any():
+            continue
+        w = get_dynamic_weights(code_name)
+        for j, t in enumerate(tokens):
+            if t in ("BTC", "ETH"):
+                base_w[rows, j] = w[t]
+            else:
+                in_basket = (b_idx[rows] >= 0) & member[np.maximum(b_idx[rows], 0), alt_pos.get(t, -1)]
+                base_w[rows, j] = np.where(in_basket, w["ALT"], 0.0)
+
+    cost = np.array([FEE + SLIPPAGE.get(t, DEFAULT_ALT_SLIPPAGE) for t in tokens])
+
+    arrays = {
+        "idx": idx, "tokens": tokens, "close": close, "rsi": rsi, "atr": atr,
+        "rets": rets, "rebound": rebound, "valid": valid, "trend": trend,
+        "exit_ac": exit_ac, "state": state, "base_w": base_w, "cost": cost,
+    }
+    return arrays
+
+
+def run_simulation(df_dict, baskets, S, start_dt=None, end_dt=None, initial_weights=None, arrays=None):
+    """arrays: 같은 구간의 prepare_arrays 결과 (여러 파라미터를 시험할 때 재사용)"""
+    a = arrays if arrays is not None else prepare_arrays(df_dict, baskets, start_dt, end_dt)
+    idx, tokens = a["idx"], a["tokens"]
+    if len(idx) < 2:
+        return pd.DataFrame(), pd.DataFrame()
+
+    n_days, n_tokens = a["close"].shape
+    close, atr, rets, valid, base_w, cost = a["close"], a["atr"], a["rets"], a["valid"], a["base_w"], a["cost"]
+    exit_ac, state = a["exit_ac"], a["state"]
+    with np.errstate(invalid="ignore"):
+        entry_ok = a["trend"] & (a["rsi"] >= S["RSI"]) & (a["rebound"] >= S["RB"]) & (base_w > 0)
+
+    rets_hist = np.zeros((n_days, n_tokens))
+    weights_hist = np.zeros((n_days, n_tokens))
+
+    if initial_weights is None:
+        prev_weights = np.zeros(n_tokens)
+    else:
+        prev_weights = np.array([initial_weights.get(t, 0.0) for t in tokens], dtype=float)
+    entry_price = np.full(n_tokens, np.nan)
+    weights_hist[0] = prev_weights
+
+    peak_value = 1.0
+    bear = STATE_CODES["BEAR"]
+
+    for i in range(1, n_days):
+        # 합산 순서를 토큰 순서대로 유지 (임계값 비교 결과가 기존 루프와 비트 단위로 같도록)
+        cur_value = 1 + float(np.cumsum(rets[i] * prev_weights)[-1])
+        peak_value = max(peak_value, cur_value)
+        dd = (cur_value - peak_value) / peak_value
+
+        if dd < -0.10 or state[i] == bear:
+            prev_weights = np.zeros(n_tokens)
+            weights_hist[i] = prev_weights
+            continue
+
+        has_pos = prev_weights > 0
+        with np.errstate(invalid="ignore"):
+            exit_d = has_pos & (close[i] < entry_price - ATR_K * atr[i])
+        enter = valid[i] & ~has_pos & entry_ok[i]
+        leave = valid[i] & has_pos & (exit_ac[i] | exit_d)
+        hold = valid[i] & has_pos & ~leave & (base_w[i] > 0)
+
+        target_weights = prev_weights.copy()
+        target_weights[enter | hold] = base_w[i][enter | hold]
+        target_weights[leave] = 0.0
+        entry_price[enter] = close[i][enter]
+        entry_price[leave] = np.nan
+
+        tw_sum = sum(target_weights.tolist())
+        if tw_sum > 1.0:
+            target_weights *= 1.0 / tw_sum
+
+        diff = np.abs(target_weights - prev_weights)
+        small = diff < THRESH
+        target_weights[small] = prev_weights[small]
+        rets_hist[i] -= np.where(small, 0.0, diff * cost)
+
+        weights_hist[i] = target_weights
+        prev_weights = target_weights
+        rets_hist[i] += rets[i] * prev_weights
+
+    return (
+        pd.DataFrame(rets_hist, index=idx, columns=tokens),
+        pd.DataFrame(weights_hist, index=idx, columns=tokens),
+    )
+
+
+# =========================================================
+# 9) 파라미터 그리드
+# =========================================================
+
+PARAM_GRID = {
+    "RB": [15, 18],
+    "RSI": [55, 60],
+    "W_ALT": [0.1],  # 의미상 유지 (현재 엔진에서는 동적 비중으로 처리)
+}
+
+
+def generate_param_space():
+    params = []
+    for rb in PARAM_GRID["RB"]:
+        for rsi in PARAM_GRID["RSI"]:
+            params.append({
+                "RB": rb,
+                "RSI": rsi,
+            })
+    return params
+
+
+# =========================================================
+# 10) 최적화 (WFA Train 구간)
+# =========================================================
+
+def print_opt_progress(i, total, best, start_time, bar_len=10):
+    pct = i / total
+    filled = int(bar_len * pct)
+    bar = "#" * filled + "-" * (bar_len - filled)
+    elapsed = time.time() - start_time
+    eta = (elapsed / max(1, i)) * (total - i)
+    print("\r" + " " * 120, end="")
+    print(
+        f"\r⚙️  Step 4-OPT [{bar}] {pct*100:5.1f}% ({i}/{total})  "
+        f"ETA:{eta:6.1f}s  Best:{best:8.2f}",
+        end=""
+    )
+
+
+# 연속 절반(successive halving): 모든 후보를 학습 구간 앞부분으로 채점하고
+# 상위 1/HALVING_ETA만 더 긴 구간으로 넘긴다. 후보가 HALVING_ETA개 이하면 전수 평가
+HALVING_ETA = 3
+HALVING_MIN_DAYS = 30  # 첫 단계 최소 평가 일수
+OPT_WORKERS = None     # None이면 CPU 수
+
+# 워커별 구간 행렬 캐시: 한 구간의 모든 파라미터 시행이 같은 행렬을 공유한다.
+# 데이터가 바뀌면 _init_worker가 비우고, 단계가 쌓여도 최근 구간만 남긴다.
+WORKER_ARRAY_CACHE = 32
+_worker = {}
+
+
+def _init_worker(df_dict, baskets):
+    _worker["dfs"], _worker["bks"] = df_dict, baskets
+    _worker["arrays"] = OrderedDict()
+
+
+def _worker_arrays(start, end):
+    cache = _worker["arrays"]
+    key = (start, end)
+    if key in cache:
+        cache.move_to_end(key)
+    else:
+        cache[key] = prepare_arrays(_worker["dfs"], _worker["bks"], start, end)
+        if len(cache) > WORKER_ARRAY_CACHE:
+            cache.popitem(last=False)
+    return cache[key]
+
+
+def score_returns(rets):
+    """CAGR + MDD 점수 (평가 불가 구간이면 None)"""
+    if rets.empty:
+        return None
+    eq = (1 + rets.sum(axis=1)).cumprod()
+    if len(eq) < 2:
+        return None
+    days = (eq.index[-1] - eq.index[0]).days
+    if days <= 0:
+        return None
+    cagr = (eq.iloc[-1] ** (365.25 / days) - 1) * 100
+    mdd = ((eq - eq.cummax()) / eq.cummax()).min() * 100
+    return float(cagr + mdd)
+
+
+def _score_task(task):
+    start, end, S = task
+    rets, _ = run_simulation(_worker["dfs"], _worker["bks"], S, start, end,
+                             arrays=_worker_arrays(start, end))
+    return score_returns(rets)
+
+
+def window_fingerprint(a):
+    """구간 입력 행렬(prepare_arrays 결과) 해시 (데이터/바스켓이 바뀌면 캐시 키도 바뀐다)"""
+    h = hashlib.sha1("|".join(a["tokens"]).encode())
+    h.update(np.asarray(a["idx"].asi8).tobytes())
+    for k in ("close", "rsi", "atr", "rebound", "valid", "trend", "exit_ac", "state", "base_w", "cost"):
+        h.update(np.ascontiguousarray(a[k]).tobytes())
+    return h.hexdigest()[:16]
+
+
+def load_opt_cache(path):
+    if not os.path.exists(path):
+        return {}
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_opt_cache(path, cache):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(cache, f)
+    os.replace(tmp_path, path)
+
+
+def halving_rungs(train_start, train_end, n_candidates):
+    """단계별 평가 일수 (마지막 단계 = 학습 구간 전체)"""
+    rungs = [(pd.Timestamp(train_end) - pd.Timestamp(train_start)).days + 1]
+    n = n_candidates
+    while HALVING_ETA > 1 and n > HALVING_ETA and rungs[0] // HALVING_ETA >= HALVING_MIN_DAYS:
+        n = -(-n // HALVING_ETA)
+        rungs.insert(0, rungs[0] // HALVING_ETA)
+    return rungs
+
+
+def optimize_windows(df_dict, baskets, train_windows, workers=OPT_WORKERS):
+    """여러 학습 구간을 한꺼번에 최적화 → 구간별 (best_score, best_S)
+
+    단계마다 모든 구간의 (구간, 파라미터) 평가를 프로세스 풀에 한 번에 넣는다.
+    점수는 DATA_ROOT/opt_cache.json에 (구간 데이터 해시, 파라미터) 키로 저장해
+    PARAM_GRID를 넓혀 다시 돌리면 새 칸만 계산한다.
+    """
+    cache_path = os.path.join(DATA_ROOT, "opt_cache.json")
+    cache = load_opt_cache(cache_path)
+    params_list = generate_param_space()
+    survivors = [list(params_list) for _ in train_windows]
+    rungs = [halving_rungs(ts, te, len(params_list)) for ts, te in train_windows]
+    n_stages = max(len(r) for r in rungs)
+    scores = [{} for _ in train_windows]
+
+    # 메인 프로세스도 워커 캐시로 구간 행렬을 공유 (해시 계산 + 단일 프로세스 평가)
+    _init_worker(df_dict, baskets)
+    pool = None
+    try:
+        for stage in range(n_stages):
+            # 단계 수가 적은 구간은 마지막 단계들에만 참여 (마지막 단계 = 전체 구간)
+            jobs = []
+            for wi, (ts, te) in enumerate(train_windows):
+                k = stage - (n_stages - len(rungs[wi]))
+                if k < 0:
+                    continue
+                end = (pd.Timestamp(ts) + pd.Timedelta(days=rungs[wi][k] - 1)).strftime("%Y-%m-%d")
+                end = min(end, te)
+                fp = window_fingerprint(_worker_arrays(ts, end))
+                for si, S in enumerate(survivors[wi]):
+                    jobs.append((wi, si, f"{fp}|{json.dumps(S, sort_keys=True)}", (ts, end, S)))
+
+            missing = [j for j in jobs if j[2] not in cache]
+            start_time = time.time()
+            if len(missing) > 1 and workers != 1:
+                if pool is None:
+                    pool = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                               initargs=(df_dict, baskets))
+                results = pool.map(_score_task, [j[3] for j in missing], chunksize=max(1, len(missing) // 64))
+            else:
+                results = map(_score_task, [j[3] for j in missing])
+            best = -1e9
+            for i, (job, score) in enumerate(zip(missing, results), start=1):
+                cache[job[2]] = score
+                best = max(best, score if score is not None else -1e9)
+                print_opt_progress(i, len(missing), best, start_time)
+
+            for wi in range(len(train_windows)):
+                scores[wi] = {si: cache[key] for w, si, key, _ in jobs if w == wi}
+                if not scores[wi] or stage == n_stages - 1:
+                    continue
+                ranked = sorted(scores[wi], key=lambda si: -1e9 if scores[wi][si] is None else scores[wi][si],
+                                reverse=True)
+                keep = -(-len(ranked) // HALVING_ETA)
+                survivors[wi] = [survivors[wi][si] for si in sorted(ranked[:keep])]
+    finally:
+        if pool is not None:
+            pool.shutdown()
+        _worker.clear()
+        save_opt_cache(cache_path, cache)
+    print("\r" + " " * 120 + "\r", end="")
+
+    best = []
+    for wi in range(len(train_windows)):
+        best_score, best_S = -1e9, None
+        for si, score in scores[wi].items():
+            if score is not None and score > best_score:
+                best_score, best_S = score, survivors[wi][si]
+        best.append((best_score, best_S))
+    return best
+
+
+def optimize_params(df_dict, baskets, train_start, train_end):
+    best_score, best_S = optimize_windows(df_dict, baskets, [(train_start, train_end)])[0]
+    print(f" score:{best_score:.1f} params:{best_S}")
+    return best_S
+
+
+# =========================================================
+# 11) WFA 윈도우 생성
+# =========================================================
+
+def make_wfa_windows(idx, train_days=120, test_days=45, btc_df=None):
+    idx = pd.to_datetime(idx)
+
+    if btc_df is not None:
+        valid = ~btc_df["ma_long"].isna()
+        if valid.any():
+            first_valid = btc_df.index[valid][0]
+            idx = idx[idx >= first_valid]
+
+    windows = []
+    start = idx.min()
+    end = idx.max()
+    cur_train_start = start
+
+    while True:
+        train_end = cur_train_start + pd.Timedelta(days=train_days - 1)
+        test_start = train_end + pd.Timedelta(days=1)
+        test_end = test_start + pd.Timedelta(days=test_days - 1)
+
+        if test_end > end:
+            break
+
+        windows.append((
+            cur_train_start.strftime("%Y-%m-%d"),
+            train_end.strftime("%Y-%m-%d"),
+            test_start.strftime("%Y-%m-%d"),
+            test_end.strftime("%Y-%m-%d"),
+        ))
+
+        cur_train_start += pd.Timedelta(days=test_days)
+
+    return windows
+
+
+# =========================================================
+# 12) WFA 실행
+# =========================================================
+
+def walk_forward(df_dict, baskets, windows):
+    oos_rets = []
+    oos_weights = []
+    prev_end_weights = None
+
+    total_wfa = len(windows)
+
+    # 학습 구간 최적화는 이전 윈도우와 무관하므로 전체 윈도우를 한 번에 병렬 처리
+    print(f"⚙️  Step 4-OPT {total_wfa}개 학습 구간 × {len(generate_param_space())}개 파라미터")
+    best = optimize_windows(df_dict, baskets, [(ts, te) for ts, te, _, _ in windows])
+
+    for wi, (ts, te, vs, ve) in enumerate(windows, start=1):
+        best_score, best_S = best[wi - 1]
+        print(f"🚀 Step 4) WFA {wi}/{total_wfa} [TRN] {ts.replace('-', '.')}~{te.replace('-', '.')} [TST] {vs.replace('-', '.')}~{ve.replace('-', '.')}")
+        print(f" score:{best_score:.1f} params:{best_S}")
+
+        r_df, w_df = run_simulation(
+            df_dict,
+            baskets,
+            best_S,
+            start_dt=vs,
+            end_dt=ve,
+            initial_weights=prev_end_weights,
+        )
+
+        if r_df.empty:
+            continue
+
+        prev_end_weights = w_df.iloc[-1].to_dict()
+        oos_rets.append(r_df)
+        oos_weights.append(w_df)
+
+    if not oos_rets:
+        return pd.DataFrame(), pd.DataFrame()
+
+    return (
+        pd.concat(oos_rets).sort_index(),
+        pd.concat(oos_weights).sort_index()
+    )
+
+
+# =========================================================
+# 13) 리포트
+# =========================================================
+
+def report(rets_df, weights_df):
+    if rets_df.empty:
+        print("No returns.")
+        return
+
+    total = rets_df.sum(axis=1)
+    eq = TOTAL_CAPITAL * (1 + total).cumprod()
+
+    days = (eq.index[-1] - eq.index[0]).days
+    cagr = ((eq.iloc[-1] / TOTAL_CAPITAL) ** (365.25 / days) - 1) * 100
+    mdd = ((eq - eq.cummax()) / eq.cummax()).min() * 100
+
+    print("📊 Step 5) 최종 리포트")
+    print(f"CAGR: {cagr:.2f}%   MDD: {mdd:.2f}%   Final: {int(eq.iloc[-1]):,}")
+
+    y_ret = total.groupby(total.index.year).apply(lambda x: (1 + x).prod() - 1)
+    print("연도별 수익률:")
+    print((y_ret * 100).map(lambda x: f"{x:.2f}%"))
+
+
+# =========================================================
+# 15) 메인 실행
+# =========================================================
+
+if __name__ == "__main__":
+    prepare_directory()
+
+    BINANCE_WHITELIST = build_auto_whitelist()
+
+    collect_b117_universe(BINANCE_WHITELIST)
+
+    print("📦 Step 2) RAW 데이터 로딩...", end="")
+    dfs = load_raw_data()
+    print(" 완료")
+
+    print("🧺 Step 3) ALT 7 바스켓 생성...", end="")
+    bks = build_baskets(dfs)
+    print(" 완료")
+
+    btc_idx = dfs["BTC"].index
+    windows = make_wfa_windows(btc_idx, train_days=120, test_days=45, btc_df=dfs["BTC"])
+
+    print("🚀 Step 4) WFA 시작")
+    r_df, w_df = walk_forward(dfs, bks, windows)
+
+    print("📊 Step 5) 전체 구간 리포트")
+    report(r_df, w_df)
@@ -0,0 +1,416 @@
+#!/usr/bin/env python3
+"""
+⏱️ 백테스트 커널 / 라이브 핫패스 벤치마크 (네트워크 없음)
+
+측정 항목
+- exit_check       : BacktestEngine.check_exit_conditions 처리량 (봉/초)
+- full_year        : 1년치 5분봉 단일 심볼 시뮬레이션(_run_simulation_with_data) 소요 시간
+- full_year_kernel : 같은 데이터의 fast_kernel.simulate_trades 소요 시간
+- trade_report     : TradeStore에 거래 100만 건 기록 + 리포트 지표/컬럼 계산
+- scanner_2000     : MarketScanner.find_candidates 티커 2,000개 스코어링
+- save_state       : StateManager.save_state (히스토리 N건) 지연
+- scheduler_roundtrip : CasinoScheduler 진입(_execute_entry) + 청산(force_sell) 한 바퀴
+                   (exchange.simulator 주입, 지연 0 → 봇 자체 오버헤드)
+- wfa_prepare      : WFA 랩 prepare_arrays (토큰 50개 × 700일)
+- wfa_simulation   : WFA 랩 run_simulation (미리 준비한 구간 행렬 전달)
+
+캔들은 시드 고정 합성 데이터가 기본이고, --candles exchange:symbol:timeframe 으로
+로컬 캔들 캐시(녹화 데이터)를 쓸 수 있다. 결과는 benchmarks/baseline.json의 같은
+fixture 기준선과 최솟값(min_s)을 비교해 TOLERANCE배 넘게, 그리고 NOISE_FLOOR_S보다
+크게 느려진 항목이 있으면 종료 코드 1을 반환한다.
+
+사용법:
+    python benchmarks/run_benchmarks.py                 # 전체 실행 + 기준선 비교
+    python benchmarks/run_benchmarks.py --only exit_check,scanner_2000
+    python benchmarks/run_benchmarks.py --save          # 기준선 갱신
+    python benchmarks/run_benchmarks.py --candles mexc:BTC/USDT:5m
+"""
+
+import os
+import sys
+import argparse
+import asyncio
+import contextlib
+import importlib.util
+import io
+import json
+import platform
+import statistics
+import tempfile
+import time
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+BASELINE_PATH = os.path.join(BENCH_DIR, "baseline.json")
+TOLERANCE = 1.5  # 기준선 대비 허용 배수 (이보다 느리면 회귀)
+NOISE_FLOOR_S = 0.001  # 기준선과의 차이가 이보다 작으면 배수와 무관하게 통과
+FAST_CASE_S = 0.02  # 이보다 빠른 항목은 FAST_REPEAT회 이상 반복 (짧을수록 스케줄링 잡음이 큼)
+FAST_REPEAT = 30
+
+# 공유 상태 파일(레이트 리밋/봇 상태)을 건드리지 않도록 import 전에 임시 경로 지정
+_TMP = tempfile.mkdtemp(prefix="boracay_bench_")
+os.environ["RATE_LIMIT_STATE_PATH"] = os.path.join(_TMP, "rate_limit_state.json")
+os.environ["STATE_FILE_PATH"] = os.path.join(_TMP, "casino_state.json")
+sys.path.insert(0, ROOT)
+
+from exchange import rate_limiter  # noqa: E402
+from exchange.market_cache import MarketMetadataCache  # noqa: E402
+from core.strategy import Position  # noqa: E402
+from tests.backtester import BacktestConfig, BacktestEngine  # noqa: E402
+from tests.candle_store import CandleCache, timeframe_ms  # noqa: E402
+from tests.fast_kernel import simulate_trades  # noqa: E402
+from utils.logger import logger  # noqa: E402
+
+BENCH_EXCHANGE_ID = "benchmark"
+rate_limiter.EXCHANGE_BUDGETS[BENCH_EXCHANGE_ID] = {"rate": 1e9, "capacity": 1e9}
+logger.disabled = True  # 로그 출력/파일 기록은 측정에서 제외
+
+
+# =========================================================
+# 픽스처
+# =========================================================
+
+def synthetic_candles(n: int, timeframe: str = "5m", seed: int = 7) -> pd.DataFrame:
+    """두꺼운 꼬리 랜덤워크 캔들 (엔진 입력 형식)"""
+    rng = np.random.default_rng(seed)
+    tf = timeframe_ms(timeframe)
+    ts = 1704067200000 + np.arange(n, dtype=np.int64) * tf  # 2024-01-01
+    close = 100 * np.exp(np.cumsum(rng.standard_t(3, n) * 0.004))
+    open_ = np.r_[close[0], close[:-1]]
+    high = np.maximum(open_, close) * (1 + np.abs(rng.normal(0, 0.002, n)))
+    low = np.minimum(open_, close) * (1 - np.abs(rng.normal(0, 0.002, n)))
+    df = pd.DataFrame({
+        "timestamp": ts, "open": open_, "high": high, "low": low, "close": close,
+        "volume": rng.uniform(1e3, 1e5, n),
+    })
+    df["datetime"] = pd.to_datetime(df["timestamp"], unit="ms")
+    return df
+
+
+def recorded_candles(spec: str, n: int) -> pd.DataFrame:
+    """로컬 캔들 캐시의 최근 n봉 (exchange:symbol:timeframe)"""
+    exchange_id, symbol, timeframe = spec.split(":")
+    arrays = CandleCache().open(exchange_id, symbol, timeframe)
+    if not len(arrays):
+        raise ValueError(f"캔들 캐시 없음: {spec}")
+    ts = np.asarray(arrays.ts)[-n:]
+    return CandleCache().load_frame(exchange_id, symbol, timeframe, int(ts[0]), int(ts[-1]))
+
+
+def synthetic_tickers(n: int, seed: int = 11) -> dict:
+    rng = np.random.default_rng(seed)
+    tickers = {}
+    for i in range(n):
+        quote = "USDT" if i % 10 else "BTC"
+        tickers[f"C{i:04d}/{quote}"] = {
+            "quoteVolume": float(rng.lognormal(13, 1.5)),
+            "percentage": float(rng.normal(5, 12)),
+            "last": float(rng.uniform(0.01, 100)),
+        }
+    return tickers
+
+
+class _FakeExchange:
+    id = BENCH_EXCHANGE_ID
+
+    def __init__(self, tickers):
+        self.tickers = tickers
+
+    def fetch_tickers(self):
+        return self.tickers
+
+
+class _FakeConnector:
+    """MarketScanner가 쓰는 MexcConnector 속성(exchange, markets)만 제공"""
+
+    def __init__(self, tickers):
+        self.exchange = _FakeExchange(tickers)
+        self.markets = MarketMetadataCache(BENCH_EXCHANGE_ID)
+        self.markets.symbols = {s: {"active": True} for s in tickers}
+
+
+def synthetic_lab_universe(n_tokens: int = 50, n_days: int = 700, seed: int = 5) -> dict:
+    """WFA 랩 df_dict 형식 (BTC, ETH + ALT), 지표 포함"""
+    from core.indicators import FEATURES, compute_indicators
+
+    rng = np.random.default_rng(seed)
+    idx = pd.date_range("2024-01-01 09:00", periods=n_days, freq="D")
+    frames = {}
+    for i, name in enumerate(["BTC", "ETH"] + [f"A{i}" for i in range(n_tokens - 2)]):
+        start = 0 if i < 2 else int(rng.integers(0, n_days // 3))
+        close = 100 * np.exp(np.cumsum(rng.normal(0.001, 0.03, n_days - start)))
+        frames[name] = pd.DataFrame({
+            "open": close, "high": close * 1.02, "low": close * 0.98, "close": close,
+            "volume": np.ones(len(close)),
+        }, index=idx[start:])
+    features = compute_indicators({k: {c: df[c].to_numpy() for c in ("high", "low", "close")}
+                                   for k, df in frames.items()})
+    for k, df in frames.items():
+        for name in FEATURES:
+            df[name] = features[k][name]
+    return frames
+
+
+def load_lab():
+    path = os.path.join(ROOT, "Labs", "04_unified_wfa_tester.py")
+    spec = importlib.util.spec_from_file_location("unified_wfa_tester", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+# =========================================================
+# 측정
+# =========================================================
+
+def measure(fn, repeat: int) -> dict:
+    """fn을 repeat번 실행 → 초 단위 중앙값/최솟값 (표준출력은 버림)
+
+    FAST_CASE_S보다 빠른 항목은 FAST_REPEAT회까지 더 돌린다.
+    """
+    times = []
+    while len(times) < repeat or (len(times) < FAST_REPEAT and statistics.median(times) < FAST_CASE_S):
+        with contextlib.redirect_stdout(io.StringIO()):
+            started = time.perf_counter()
+            fn()
+            times.append(time.perf_counter() - started)
+    repeat = len(times)
+    return {"median_s": statistics.median(times), "min_s": min(times), "repeat": repeat}
+
+
+def bench_exit_check(candles: pd.DataFrame, repeat: int) -> dict:
+    rows = [row for _, row in candles.head(20_000).iterrows()]
+    engine = BacktestEngine(72)
+
+    def run():
+        engine.position = Position("X/USDT", rows[0]["close"], BacktestConfig.BET_AMOUNT, rows[0]["datetime"])
+        for row in rows:
+            should_exit, _ = engine.check_exit_conditions(row)
+            if should_exit:
+                engine.position = Position("X/USDT", row["close"], BacktestConfig.BET_AMOUNT, row["datetime"])
+
+    result = measure(run, repeat)
+    result["per_second"] = round(len(rows) / result["median_s"])
+    return result
+
+
+def bench_full_year(candles: pd.DataFrame, repeat: int) -> dict:
+    def run():
+        BacktestEngine(72)._run_simulation_with_data("X/USDT", candles)
+
+    result = measure(run, repeat)
+    result["candles"] = len(candles)
+    return result
+
+
+def bench_full_year_kernel(candles: pd.DataFrame, repeat: int) -> dict:
+    ts, high, low, close = (candles[c].to_numpy() for c in ("timestamp", "high", "low", "close"))
+
+    def run():
+        simulate_trades(ts, high, low, close, BacktestConfig.STOP_LOSS_THRESHOLD,
+                        BacktestConfig.TS_ACTIVATION_REWARD, BacktestConfig.TS_CALLBACK_RATE, 72)
+
+    result = measure(run, repeat)
+    result["candles"] = len(candles)
+    return result
+
+
+def bench_trade_report(repeat: int, n_trades: int = 1_000_000) -> dict:
+    from tests.trade_log import TradeStore
+
+    rng = np.random.default_rng(3)
+    pnl = (rng.standard_t(3, n_trades) * 8).tolist()
+    reasons = rng.choice(["stop_loss", "trailing_stop", "timeout"], n_trades).tolist()
+    start = datetime(2024, 1, 1)
+    times = [start + timedelta(minutes=5 * i) for i in range(n_trades + 1)]
+
+    def run():
+        store = TradeStore(BacktestConfig.TRADING_FEE_PERCENT)
+        for i in range(n_trades):
+            store.append("X/USDT", 1.0, 1.0 + pnl[i] / 100, times[i], times[i + 1],
+                         BacktestConfig.BET_AMOUNT, pnl[i], reasons[i])
+        store.metrics(BacktestConfig.INITIAL_BALANCE, BacktestConfig.BET_AMOUNT)
+        store.columns(72)
+
+    result = measure(run, repeat)
+    result["trades"] = n_trades
+    return result
+
+
+def bench_scanner(repeat: int, n_tickers: int = 2000) -> dict:
+    from core.scanner import MarketScanner
+
+    scanner = MarketScanner(_FakeConnector(synthetic_tickers(n_tickers)))
+    result = measure(lambda: scanner.find_candidates(3), repeat)
+    result["tickers"] = n_tickers
+    return result
+
+
+def bench_save_state(repeat: int, history: int = 5000) -> dict:
+    from core import state_manager
+
+    manager = state_manager.StateManager()
+    manager.state["history"] = [
+        {
+            "symbol": f"C{i % 500:04d}/USDT", "entry_price": 1.2345, "amount_usdt": 5.1,
+            "entry_time": "2026-01-01 00:00:00", "exit_price": 1.3, "exit_time": "2026-01-04 00:00:00",
+            "exit_reason": "timeout", "pnl_percent": 5.3,
+            "execution": {"detect_to_submit_ms": 120, "submit_to_fill_ms": 340, "slippage_percent": 0.12},
+        }
+        for i in range(history)
+    ]
+    result = measure(manager.save_state, repeat)
+    result["history"] = history
+    return result
+
+
+def bench_scheduler_roundtrip(repeat: int, n_symbols: int = 50) -> dict:
+    from core.scheduler_engine import CasinoScheduler
+    from exchange.mexc import MexcConnector
+    from exchange.simulator import SimulatedExchange
+
+    candles = {f"C{i:03d}/USDT": synthetic_candles(2_000, seed=i) for i in range(n_symbols)}
+    sim = SimulatedExchange(candles, balances={"USDT": 1e9})
+    sim.set_time(int(candles["C000/USDT"]["timestamp"].iloc[-1]))
+    casino = CasinoScheduler(MexcConnector(exchange=sim, markets=sim.metadata_cache()))
+    selected = {"symbol": "C000/USDT", "change": 20.0}
+
+    def run():
+        casino.state.state["history"].clear()
+        asyncio.run(casino._execute_entry(selected, SimpleNamespace(job=None)))
+        casino.force_sell()
+
+    result = measure(run, repeat)
+    result["exchange_calls"] = len(sim.calls) // repeat
+    return result
+
+
+def bench_wfa(repeat: int) -> dict:
+    lab = load_lab()
+    dfs = synthetic_lab_universe()
+    baskets = lab.build_baskets(dfs, cache_path=os.path.join(_TMP, "baskets.npz"))
+    S = {"RB": 15, "RSI": 55}
+
+    prepared = measure(lambda: lab.prepare_arrays(dfs, baskets), repeat)
+    arrays = lab.prepare_arrays(dfs, baskets)
+    simulated = measure(lambda: lab.run_simulation(dfs, baskets, S, arrays=arrays), repeat)
+    return {"wfa_prepare": prepared, "wfa_simulation": simulated}
+
+
+BENCHMARKS = ("exit_check", "full_year", "full_year_kernel", "trade_report", "scanner_2000", "save_state",
+              "scheduler_roundtrip", "wfa_prepare", "wfa_simulation")
+
+
+def run_benchmarks(only=None, candles_spec: str = None, repeat: int = 5) -> dict:
+    selected = set(only or BENCHMARKS)
+    year = 365 * 24 * 12  # 5분봉 1년
+    candles = recorded_candles(candles_spec, year) if candles_spec else synthetic_candles(year)
+
+    results = {}
+    if "exit_check" in selected:
+        results["exit_check"] = bench_exit_check(candles, repeat)
+    if "full_year" in selected:
+        results["full_year"] = bench_full_year(candles, max(1, repeat // 5))
+    if "full_year_kernel" in selected:
+        results["full_year_kernel"] = bench_full_year_kernel(candles, repeat)
+    if "trade_report" in selected:
+        results["trade_report"] = bench_trade_report(max(1, repeat // 5))
+    if "scanner_2000" in selected:
+        results["scanner_2000"] = bench_scanner(repeat * 4)
+    if "save_state" in selected:
+        results["save_state"] = bench_save_state(repeat * 4)
+    if "scheduler_roundtrip" in selected:
+        results["scheduler_roundtrip"] = bench_scheduler_roundtrip(repeat * 4)
+    if selected & {"wfa_prepare", "wfa_simulation"}:
+        for name, result in bench_wfa(repeat).items():
+            if name in selected:
+                results[name] = result
+    return results
+
+
+def compare(results: dict, baseline: dict, tolerance: float = TOLERANCE,
+            noise_floor: float = NOISE_FLOOR_S) -> list:
+    """기준선 대비 최솟값 비율. (이름, 비율, 회귀 여부) 목록
+
+    중앙값은 다른 프로세스의 간섭을 그대로 받아 수 ms 항목에서 2배 가까이 흔들린다.
+    최솟값은 간섭이 가장 적은 실행이라 더 안정적이다. 차이가 noise_floor보다 작으면
+    배수가 커도 회귀로 보지 않는다.
+    """
+    rows = []
+    for name, result in results.items():
+        base = baseline.get("results", {}).get(name)
+        if not base:
+            rows.append((name, None, False))
+            continue
+        ratio = result["min_s"] / base["min_s"]
+        rows.append((name, ratio, ratio > tolerance and result["min_s"] - base["min_s"] > noise_floor))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Boracay Casino 벤치마크 (오프라인)")
+    parser.add_argument("--only", help=f"실행할 항목 (쉼표 구분: {', '.join(BENCHMARKS)})", default=None)
+    parser.add_argument("--candles", help="녹화 캔들 사용 (exchange:symbol:timeframe)", default=None)
+    parser.add_argument("--repeat", type=int, default=5, help="항목별 반복 횟수")
+    parser.add_argument("--save", action="store_true", help="결과를 기준선(baseline.json)으로 저장")
+    parser.add_argument("--output", "-o", help="결과 JSON 저장 경로", default=None)
+    args = parser.parse_args()
+
+    only = [s.strip() for s in args.only.split(",")] if args.only else None
+    unknown = set(only or ()) - set(BENCHMARKS)
+    if unknown:
+        parser.error(f"알 수 없는 항목: {', '.join(sorted(unknown))}")
+
+    results = run_benchmarks(only, args.candles, args.repeat)
+    report = {
+        "created_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        "machine": {"python": platform.python_version(), "platform": platform.platform(),
+                    "cpu_count": os.cpu_count()},
+        "fixture": args.candles or "synthetic",
+        "results": results,
+    }
+
+    # 기준선은 fixture별로 따로 보관 (합성/녹화 캔들 결과는 서로 비교하지 않음)
+    baselines = {}
+    if os.path.exists(BASELINE_PATH):
+        with open(BASELINE_PATH, "r", encoding="utf-8") as f:
+            baselines = json.load(f)
+    baseline = baselines.get(report["fixture"], {})
+
+    print(f"\n{'='*72}")
+    print(f"⏱️  벤치마크 결과 (fixture: {report['fixture']}, 최솟값 기준 허용 {TOLERANCE}x, "
+          f"잡음 {NOISE_FLOOR_S * 1000:g} ms)")
+    print(f"{'='*72}")
+    regressions = []
+    for name, ratio, regressed in compare(results, baseline):
+        r = results[name]
+        extra = f"  {r['per_second']:,}/s" if "per_second" in r else ""
+        vs = "기준선 없음" if ratio is None else f"{ratio:5.2f}x"
+        flag = "  ❌ 회귀" if regressed else ""
+        print(f"  {name:<19} {r['median_s']*1000:10.2f} ms  min {r['min_s']*1000:9.2f} ms{extra:<14} {vs}{flag}")
+        if regressed:
+            regressions.append(name)
+    print(f"{'='*72}\n")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+        print(f"💾 결과 저장: {args.output}")
+
+    if args.save:
+        baselines[report["fixture"]] = dict(report, results=dict(baseline.get("results", {}), **results))
+        with open(BASELINE_PATH, "w", encoding="utf-8") as f:
+            json.dump(baselines, f, indent=2, ensure_ascii=False)
+        print(f"💾 기준선 갱신: {BASELINE_PATH}")
+    elif regressions:
+        print(f"❌ 회귀 감지: {', '.join(regressions)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
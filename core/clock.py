@@ -0,0 +1,73 @@
+"""
+⏰ 교체 가능한 시계
+
+스케줄러/상태 관리 코드는 datetime.now() / time.time() / asyncio.sleep 대신
+이 모듈의 now() / time() / sleep()을 쓴다. 평소에는 시스템 시계를 그대로 쓰고,
+리플레이(tests/live_replay.py)에서는 install(VirtualClock(...))로 가상 시계를 끼워
+72시간 주기를 실제 대기 없이 진행한다.
+"""
+
+import asyncio
+import time as _time
+from datetime import datetime, timedelta
+
+
+class SystemClock:
+    """실제 시스템 시각"""
+
+    def now(self) -> datetime:
+        return datetime.now()
+
+    def time(self) -> float:
+        return _time.time()
+
+    async def sleep(self, seconds: float):
+        await asyncio.sleep(seconds)
+
+
+class VirtualClock:
+    """advance/set으로만 움직이는 가상 시각 (now()는 UTC naive datetime)"""
+
+    def __init__(self, start: datetime):
+        self._now = start
+
+    def now(self) -> datetime:
+        return self._now
+
+    def time(self) -> float:
+        return (self._now - datetime(1970, 1, 1)).total_seconds()
+
+    def time_ms(self) -> int:
+        return int(round(self.time() * 1000))
+
+    def set(self, moment: datetime):
+        if moment > self._now:
+            self._now = moment
+
+    def advance(self, seconds: float):
+        self._now += timedelta(seconds=seconds)
+
+    async def sleep(self, seconds: float):
+        self.advance(seconds)
+
+
+_clock = SystemClock()
+
+
+def install(clock):
+    """전역 시계 교체 (None이면 시스템 시계로 복원). 이전 시계를 반환"""
+    global _clock
+    previous, _clock = _clock, clock or SystemClock()
+    return previous
+
+
+def now() -> datetime:
+    return _clock.now()
+
+
+def time() -> float:
+    return _clock.time()
+
+
+async def sleep(seconds: float):
+    await _clock.sleep(seconds)
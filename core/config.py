@@ -1,3 +1,4 @@
+import os
 from datetime import datetime, timedelta
 
 # ==========================================
@@ -98,3 +99,27 @@ elif CYCLE_HOURS > 0:
     CYCLE_STRING = f"{CYCLE_HOURS}시간"
 else:
     CYCLE_STRING = f"{CYCLE_MINUTES}분"
+
+
+# ==========================================
+# 🔐 환경변수 (.env)
+# ==========================================
+
+ENV_FILE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".env")
+_env_loaded = False
+
+
+def load_env():
+    """.env를 프로세스당 한 번만 로드 (이미 설정된 환경변수는 유지)
+
+    state_manager/rate_limiter/factory는 import 시점에 환경변수를 읽으므로
+    main.py는 다른 모듈을 import하기 전에 호출한다. 컨테이너(env_file)처럼
+    .env가 없으면 python-dotenv도 import하지 않는다.
+    """
+    global _env_loaded
+    if _env_loaded:
+        return
+    _env_loaded = True
+    if os.path.exists(ENV_FILE):
+        from dotenv import load_dotenv
+        load_dotenv(ENV_FILE)
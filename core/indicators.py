@@ -0,0 +1,147 @@
+"""
+📐 공용 지표 엔진 (MA / 모멘텀 / RSI / ATR)
+
+여러 심볼의 종가/고가/저가를 (bars × symbols) 행렬로 쌓아 한 번에 계산한다.
+심볼마다 길이가 달라도 앞쪽을 NaN으로 채워 정렬하므로 심볼별로 따로 계산한
+결과와 같다. 계산 결과는 캔들 데이터 옆 <base>.features.npz에 저장하고,
+다음 호출 때는 새로 들어온 봉(+ 창 길이만큼의 직전 봉)만 다시 계산한다.
+
+지표 정의 (WFA 랩 load_raw_data와 동일)
+- ma_short / ma30 / ma120 / ma_long : 종가 단순이동평균 (20 / 30 / 120 / 120)
+- mom30 : 30봉 수익률 (pct_change(30))
+- rsi   : 14봉 단순평균 RSI, 손실 0이면 50
+- atr   : 14봉 True Range 단순평균, 앞부분은 첫 유효값으로 채움
+"""
+
+import hashlib
+import os
+
+import numpy as np
+import pandas as pd
+
+MA_WINDOWS = {'ma_short': 20, 'ma30': 30, 'ma120': 120, 'ma_long': 120}
+MOMENTUM_WINDOW = 30
+RSI_WINDOW = 14
+ATR_WINDOW = 14
+FEATURES = tuple(MA_WINDOWS) + ('mom30', 'rsi', 'atr')
+
+# 꼬리 갱신 시 새 봉 앞에 붙여 다시 계산할 봉 수 (가장 긴 창 + diff/shift 1봉)
+LOOKBACK = max(max(MA_WINDOWS.values()), MOMENTUM_WINDOW, RSI_WINDOW, ATR_WINDOW) + 1
+
+
+def _stack(series: list, column: str) -> np.ndarray:
+    """심볼별 1차원 배열을 끝을 맞춰 (bars × symbols) 행렬로 (앞쪽 NaN 패딩)"""
+    n = max(len(s[column]) for s in series)
+    matrix = np.full((n, len(series)), np.nan)
+    for j, s in enumerate(series):
+        values = np.asarray(s[column], dtype=np.float64)
+        matrix[n - len(values):, j] = values
+    return matrix
+
+
+def compute_indicators(series: dict) -> dict:
+    """{key: {'high', 'low', 'close'}} → {key: {feature: ndarray}} (심볼 전체 일괄 계산)"""
+    if not series:
+        return {}
+    keys = list(series)
+    items = [series[k] for k in keys]
+    close = pd.DataFrame(_stack(items, 'close'))
+    high = pd.DataFrame(_stack(items, 'high'))
+    low = pd.DataFrame(_stack(items, 'low'))
+    n = len(close)
+    lengths = np.array([len(s['close']) for s in items])
+    padding = np.arange(n)[:, None] < (n - lengths)[None, :]
+
+    features = {name: close.rolling(w).mean() for name, w in MA_WINDOWS.items()}
+    features['mom30'] = close / close.shift(MOMENTUM_WINDOW) - 1  # = pct_change(30)
+
+    # 첫 봉의 diff(NaN)는 0으로 취급하되 패딩 구간은 창에 들어가지 않도록 NaN 유지
+    delta = close.diff()
+    gain = delta.where(delta > 0, 0).mask(padding).rolling(RSI_WINDOW).mean()
+    loss = (-delta.where(delta < 0, 0)).mask(padding).rolling(RSI_WINDOW).mean()
+    rs = gain / loss.replace(0, np.nan)
+    features['rsi'] = (100 - (100 / (1 + rs))).fillna(50)
+
+    prev_close = close.shift()
+    tr = np.maximum(high - low, np.maximum((high - prev_close).abs(), (low - prev_close).abs()))
+    features['atr'] = tr.rolling(ATR_WINDOW).mean().bfill()
+
+    values = {name: frame.to_numpy() for name, frame in features.items()}
+    return {
+        key: {name: values[name][n - lengths[j]:, j] for name in FEATURES}
+        for j, key in enumerate(keys)
+    }
+
+
+def price_digest(candles: dict, n: int) -> str:
+    """앞 n봉의 고가/저가/종가 해시 (같은 ts에서 가격만 수정된 봉 감지용)"""
+    h = hashlib.sha1()
+    for col in ('high', 'low', 'close'):
+        h.update(np.ascontiguousarray(np.asarray(candles[col], dtype=np.float64)[:n]).tobytes())
+    return h.hexdigest()
+
+
+class FeatureStore:
+    """<base>.features.npz 지표 캐시 (ts + 지표 배열 + 가격 해시, 캔들 순서와 동일)"""
+
+    @staticmethod
+    def path(base: str) -> str:
+        return f"{base}.features.npz"
+
+    def load(self, base: str):
+        """저장된 지표 (없거나 깨졌으면 None)"""
+        path = self.path(base)
+        if not os.path.exists(path):
+            return None
+        try:
+            with np.load(path) as data:
+                if not all(name in data for name in ('ts', 'price_digest') + FEATURES):
+                    return None
+                return {name: data[name] for name in ('ts', 'price_digest') + FEATURES}
+        except (OSError, ValueError):
+            return None
+
+    @staticmethod
+    def _save(base: str, features: dict):
+        os.makedirs(os.path.dirname(base) or '.', exist_ok=True)
+        tmp_path = f"{base}.features.tmp"
+        with open(tmp_path, 'wb') as f:
+            np.savez(f, **features)
+        os.replace(tmp_path, FeatureStore.path(base))
+
+    def update(self, candles: dict) -> dict:
+        """{base: {'ts', 'high', 'low', 'close'}} → {base: {'ts', feature...}}
+
+        저장된 ts가 현재 ts의 앞부분과 같고 그 구간의 고가/저가/종가 해시도 같으면
+        새 봉만 계산해 이어 붙이고, 다르면(과거 봉 가격 수정/누락 보충) 전체를 다시
+        계산한다. 계산이 필요한
+        심볼들은 한 번의 compute_indicators 호출로 묶는다.
+        """
+        result, pending = {}, {}
+        for base, c in candles.items():
+            ts = np.asarray(c['ts'], dtype=np.int64)
+            stored = self.load(base)
+            done = 0
+            if stored is not None and len(stored['ts']) <= len(ts) \
+                    and np.array_equal(stored['ts'], ts[:len(stored['ts'])]) \
+                    and str(stored['price_digest']) == price_digest(c, len(stored['ts'])):
+                done = len(stored['ts'])
+            if done == len(ts) and stored is not None:
+                result[base] = stored
+                continue
+            start = max(0, done - LOOKBACK)
+            pending[base] = (ts, stored if done else None, done, start)
+
+        computed = compute_indicators({
+            base: {col: np.asarray(candles[base][col], dtype=np.float64)[start:]
+                   for col in ('high', 'low', 'close')}
+            for base, (_, _, _, start) in pending.items()
+        })
+        for base, (ts, stored, done, start) in pending.items():
+            features = {'ts': ts, 'price_digest': np.array(price_digest(candles[base], len(ts)))}
+            for name in FEATURES:
+                tail = computed[base][name][done - start:]
+                features[name] = np.concatenate([stored[name], tail]) if stored is not None else tail
+            self._save(base, features)
+            result[base] = features
+        return result
@@ -0,0 +1,163 @@
+"""
+🔄 부팅 복구: 저장된 상태 ↔ 거래소 잔고/체결 대조
+
+컨테이너가 주문과 상태 저장 사이에서 죽으면 JSON 상태만으로는 실제 포지션을 알 수
+없다. 스케줄러는 주문 직전에 의도(order_intent: 방향/심볼/시각)를 남기고, 부팅 시
+잔고(fetch_balance)와 의도 시각 이후 체결(fetch_my_trades)을 병렬로 조회해 상태를
+맞춘다. 의도 시각부터만 조회하므로 전체 체결 내역을 훑을 일이 없다.
+
+보유 여부는 get_holdings의 수량 먼지 필터(0.0001) 대신 원본 잔고를 심볼의 수량
+정밀도로 자른 값(= 매도 가능한 수량)이 0보다 큰지로 본다. 0.0001 BTC 같은 소액
+포지션을 "코인 없음"으로 오판하지 않고, 매도 후 남은 정밀도 미만 잔량은 무시한다.
+
+- 매수 의도 + 활성 베팅 없음: 코인이 남아 있으면 매수 체결 평균가/첫 체결 시각으로
+  베팅 재구성 (체결 조회 실패 시 현재가로), 코인이 없으면 의도만 제거
+- 매도 의도 + 활성 베팅: 매도 체결이 있으면 체결 평균가로 청산 기록, 없으면 의도만 제거
+  → 청산 감시가 다음 실행에서 다시 판정
+- 활성 베팅인데 코인이 없음: 외부 매도로 보고 현재가로 청산 기록
+- 만료된 베팅은 건드리지 않는다. 청산 감시 Job이 복구 뒤 첫 실행에서 매도한다
+
+호출자는 청산 감시와 겹치지 않도록 CasinoScheduler.state_lock을 잡고 호출한다 (main._boot).
+
+페이퍼 모드(ENABLE_REAL_ORDERS=False)는 거래소와 맞출 대상이 없어 상태를 그대로 믿는다.
+"""
+
+import asyncio
+from datetime import datetime
+
+from utils.logger import logger
+from exchange.mexc import DUST_AMOUNT
+import core.config as config
+
+# 의도 기록 시각과 거래소 체결 시각의 시계 오차 여유
+CLOCK_SKEW_MS = 60_000
+
+
+def _summarize_fills(trades, side):
+    """같은 방향 체결 합산 → (수량, 평균가, 첫 체결 ms). 체결이 없으면 None"""
+    fills = [t for t in trades if t.get("side") == side and t.get("amount")]
+    if not fills:
+        return None
+    amount = sum(float(t["amount"]) for t in fills)
+    cost = sum(float(t.get("cost") or float(t["amount"]) * float(t["price"])) for t in fills)
+    first_ms = min(int(t["timestamp"]) for t in fills)
+    return amount, cost / amount, first_ms
+
+
+def _held(mexc, balances):
+    """원본 잔고 → {심볼: 매도 가능한 수량} (USDT 제외, 수량 0은 제외)
+
+    메타데이터에 없는 통화는 DUST_AMOUNT 초과만 보유로 본다.
+    """
+    held = {}
+    for currency, amount in balances.items():
+        if currency == "USDT" or amount <= 0:
+            continue
+        symbol = f"{currency}/USDT"
+        precise = mexc.markets.amount_to_precision(symbol, amount)
+        if precise is None:
+            precise = amount if amount > DUST_AMOUNT else 0.0
+        if precise > 0:
+            held[symbol] = precise
+    return held
+
+
+async def _fetch(mexc, trades_symbol, since_ms):
+    """잔고와 체결 내역을 동시에 조회 (청산 레인). 실패한 쪽은 None"""
+    balances_call = asyncio.to_thread(mexc.get_balances, lane="exit")
+    if not trades_symbol:
+        return await balances_call, None
+    trades_call = asyncio.to_thread(mexc.get_my_trades, trades_symbol, since_ms, lane="exit")
+    return await asyncio.gather(balances_call, trades_call)
+
+
+async def reconcile(mexc, state) -> list:
+    """상태 파일을 거래소 기준으로 보정하고 부팅 알림용 메시지 목록을 반환"""
+    if not config.ENABLE_REAL_ORDERS:
+        return []
+
+    active = state.get_active_bet()
+    intent = state.get_order_intent()
+    trades_symbol = intent["symbol"] if intent else None
+    since_ms = intent["since_ms"] - CLOCK_SKEW_MS if intent else None
+
+    balances, trades = await _fetch(mexc, trades_symbol, since_ms)
+    held = None if balances is None else _held(mexc, balances)
+    msgs = []
+
+    if intent:
+        symbol = intent["symbol"]
+        logger.info(f"🔄 [복구] 미결 주문 의도 감지: {intent['side']} {symbol} ({intent['created_at']})")
+
+        if intent["side"] == "buy" and not active:
+            fills = _summarize_fills(trades, "buy") if trades is not None else None
+            if held is not None and symbol not in held:
+                # 코인이 없으면 재구성할 포지션도 없다 (미체결 또는 이미 매도)
+                logger.info(f"✅ [복구] 보유 코인 없음 → 매수 의도 제거: {symbol}")
+                state.clear_order_intent()
+            elif fills:
+                amount, entry_price, first_ms = fills
+                entry_time = datetime.fromtimestamp(first_ms / 1000).strftime("%Y-%m-%d %H:%M:%S")
+                state.set_active_bet(symbol, entry_price, intent["amount_usdt"], entry_time)
+                logger.warning(f"⚠️ [복구] 미기록 매수 체결로 베팅 재구성: {symbol} @ ${entry_price}")
+                msgs.append(
+                    f"⚠️ **[매수 체결 복구]**\n"
+                    f"Symbol: {symbol}\n"
+                    f"Entry: ${entry_price:.8g} (체결 {amount:.8g})\n"
+                    f"Time: {entry_time}"
+                )
+            elif trades is None and held is not None:
+                # 체결 조회 실패: 코인이 남아 있으면 현재가/의도 시각으로라도 청산 감시에 올린다
+                entry_price = await asyncio.to_thread(mexc.get_ticker, symbol, lane="exit")
+                if entry_price:
+                    state.set_active_bet(symbol, entry_price, intent["amount_usdt"], intent["created_at"])
+                    logger.warning(f"⚠️ [복구] 체결 조회 실패, 현재가로 베팅 재구성: {symbol} @ ${entry_price}")
+                    msgs.append(
+                        f"⚠️ **[매수 복구 - 체결 확인 불가]**\n"
+                        f"Symbol: {symbol}\n"
+                        f"Entry(현재가): ${entry_price}"
+                    )
+            elif trades is not None:
+                logger.info(f"✅ [복구] 매수 체결 없음 → 의도 제거: {symbol}")
+                state.clear_order_intent()
+
+        elif intent["side"] == "sell" and active and active["symbol"] == symbol:
+            fills = _summarize_fills(trades, "sell") if trades is not None else None
+            if fills:
+                amount, exit_price, _ = fills
+                result = state.clear_active_bet(exit_price, reason="recovery_fill")
+                logger.warning(f"⚠️ [복구] 미기록 매도 체결로 청산 기록: {symbol} @ ${exit_price}")
+                msgs.append(
+                    f"⚠️ **[매도 체결 복구]**\n"
+                    f"Symbol: {symbol}\n"
+                    f"PNL: {result['pnl_percent']:+.2f}%\n"
+                    f"Exit: ${exit_price:.8g}"
+                )
+            elif trades is not None:
+                logger.info(f"✅ [복구] 매도 체결 없음 → 청산 감시가 재판정: {symbol}")
+                state.clear_order_intent()
+
+        else:
+            # 결과가 이미 상태에 반영된 의도 (저장 직후 종료 등)
+            state.clear_order_intent()
+
+    active = state.get_active_bet()
+    if active and held is not None and active["symbol"] not in held:
+        symbol = active["symbol"]
+        exit_price = await asyncio.to_thread(mexc.get_ticker, symbol, lane="exit") or active["entry_price"]
+        result = state.clear_active_bet(exit_price, reason="recovery_missing")
+        logger.warning(f"⚠️ [복구] 보유 코인 없음 → 외부 청산으로 기록: {symbol}")
+        msgs.append(
+            f"⚠️ **[포지션 없음]**\n"
+            f"Symbol: {symbol}\n"
+            f"거래소에 잔고가 없어 청산 처리 (PNL: {result['pnl_percent']:+.2f}%)"
+        )
+
+    active = state.get_active_bet()
+    if held:
+        unknown = sorted(s for s in held if not active or s != active["symbol"])
+        if unknown:
+            logger.warning(f"⚠️ [복구] 상태에 없는 보유 코인: {', '.join(unknown)}")
+            msgs.append(f"⚠️ 상태에 없는 보유 코인: {', '.join(unknown)}")
+
+    return msgs
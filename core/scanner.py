@@ -1,5 +1,6 @@
 import random
 from utils.logger import logger
+from exchange.rate_limiter import request_scheduler
 
 class MarketScanner:
     def __init__(self, mexc_connector):
@@ -15,7 +16,7 @@ class MarketScanner:
         
         try:
             # 1. MEXC 전체 티커 조회
-            tickers = self.mexc.exchange.fetch_tickers()
+            tickers = request_scheduler.call(self.mexc.exchange, "scan", "fetch_tickers")
             
             # 2. 필터링 (공격적 조건)
             candidates = []
@@ -23,6 +24,10 @@ class MarketScanner:
                 if not symbol.endswith('/USDT'):
                     continue
                 
+                # 메타데이터 캐시에 없는(신규 상장) / 거래 중지 종목 제외
+                if not self.mexc.markets.is_tradable(symbol):
+                    continue
+                
                 if data['quoteVolume'] is None or data['quoteVolume'] < 1_000_000:
                     continue
                 
@@ -48,6 +53,8 @@ class MarketScanner:
                 for symbol, data in tickers.items():
                     if not symbol.endswith('/USDT'):
                         continue
+                    if not self.mexc.markets.is_tradable(symbol):
+                        continue
                     if data['quoteVolume'] is None or data['quoteVolume'] < 500_000:
                         continue
                     change = data.get('percentage')
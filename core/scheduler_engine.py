@@ -1,8 +1,10 @@
 import asyncio
 from datetime import datetime, timedelta
 from telegram.ext import ContextTypes
+from core import clock
 from core.state_manager import StateManager
 from core.scanner import MarketScanner
+from core.strategy import TrailingStopStrategy, STOP_LOSS, TRAILING_STOP, TIMEOUT
 from utils.logger import logger
 import core.config as config
 
@@ -12,6 +14,9 @@ class CasinoScheduler:
         self.bot = bot 
         self.state = StateManager()
         self.scanner = MarketScanner(mexc)
+        self.strategy = TrailingStopStrategy.from_config()
+        # 부팅 복구(core.recovery)와 청산 감시가 상태를 동시에 고치지 않도록 직렬화
+        self.state_lock = asyncio.Lock()
         logger.info(f"⚙️ 스케줄러 엔진 초기화 완료 (Cycle: {config.CYCLE_STRING})")
 
     def _format_duration_ko(self, total_seconds: float) -> str:
@@ -33,7 +38,7 @@ class CasinoScheduler:
                 return order
             last_error = f"attempt={attempt}"
             if attempt < config.ORDER_MAX_RETRIES:
-                await asyncio.sleep(config.ORDER_RETRY_DELAY_SECONDS)
+                await clock.sleep(config.ORDER_RETRY_DELAY_SECONDS)
         logger.error(f"❌ 매수 재시도 실패 ({symbol}): {last_error}")
         return None
 
@@ -45,7 +50,7 @@ class CasinoScheduler:
                 return order
             last_error = f"attempt={attempt}"
             if attempt < config.ORDER_MAX_RETRIES:
-                await asyncio.sleep(config.ORDER_RETRY_DELAY_SECONDS)
+                await clock.sleep(config.ORDER_RETRY_DELAY_SECONDS)
         logger.error(f"❌ 매도 재시도 실패 ({symbol}): {last_error}")
         return None
 
@@ -58,9 +63,55 @@ class CasinoScheduler:
             return float(price)
         return fallback_price
 
+    @staticmethod
+    def _build_execution(detected_price, detected_ms, submitted_ms, filled_ms, fill_price, threshold_price=None):
+        """감지→주문→체결 지연(ms)과 슬리피지(%) 기록 생성"""
+        execution = {
+            "detected_price": detected_price,
+            "threshold_price": threshold_price,
+            "fill_price": fill_price,
+            "detected_ms": detected_ms,
+            "submitted_ms": submitted_ms,
+            "filled_ms": filled_ms,
+            "detect_to_submit_ms": submitted_ms - detected_ms,
+            "submit_to_fill_ms": filled_ms - submitted_ms,
+            "detect_to_fill_ms": filled_ms - detected_ms,
+            "slippage_percent": None,
+            "overshoot_percent": None,
+            "paper": not config.ENABLE_REAL_ORDERS,
+        }
+        if detected_price and fill_price:
+            execution["slippage_percent"] = round((fill_price - detected_price) / detected_price * 100, 4)
+        # 폴링 주기 비용: 임계가 대비 감지 시점 가격이 얼마나 더 밀렸는지
+        if threshold_price and detected_price:
+            execution["overshoot_percent"] = round((detected_price - threshold_price) / threshold_price * 100, 4)
+        return execution
+
+    async def _sell_with_tracking(self, symbol, detected_price, detected_ms, threshold_price=None):
+        """청산 매도 실행 + 지연/슬리피지 측정. 주문 실패 시 (None, None)"""
+        if config.ENABLE_REAL_ORDERS:
+            self.state.set_order_intent("sell", symbol)
+        submitted_ms = int(clock.time() * 1000)
+        sell_order = None
+        fill_price = detected_price
+        if config.ENABLE_REAL_ORDERS:
+            sell_order = await self._create_market_sell_with_retry(symbol)
+            if not sell_order:
+                return None, None
+            fill_price = self._extract_order_price(sell_order, detected_price)
+        filled_ms = int(clock.time() * 1000)
+        execution = self._build_execution(
+            detected_price, detected_ms, submitted_ms, filled_ms, fill_price, threshold_price
+        )
+        logger.info(
+            f"⏱️ [Latency] {symbol} 감지→체결 {execution['detect_to_fill_ms']}ms "
+            f"(슬리피지: {execution['slippage_percent']}%)"
+        )
+        return sell_order, execution
+
     async def job_daily_bet_callback(self, context: ContextTypes.DEFAULT_TYPE):
         """JobQueue에 의해 실행되는 베팅 로직 (게임 모드)"""
-        now = datetime.now()
+        now = clock.now()
         logger.info(f"🕛 [Job] 베팅 잡 실행 (Time: {now})")
 
         # -1. 첫 거래 시작 시각 이전에는 대기 (2초 여유)
@@ -108,7 +159,8 @@ class CasinoScheduler:
             logger.info("⚠️ [Skip] 이미 후보 선택 대기 중입니다.")
             return
 
-        # 3. 후보 코인 스캔 (3개)
+        # 3. 후보 코인 스캔 (3개) - 스캔 전에 마켓 메타데이터 만료 여부 확인
+        self.mexc.refresh_markets()
         candidates = self.scanner.find_candidates(config.CANDIDATE_COUNT)
         
         if not candidates:
@@ -197,7 +249,7 @@ class CasinoScheduler:
         symbol = selected['symbol']
         
         # 현재가 조회
-        current_price = self.mexc.get_ticker(symbol)
+        current_price = self.mexc.get_ticker(symbol, lane="entry")
         if not current_price:
             logger.error(f"❌ [MEXC] 시세 조회 실패: {symbol}. 스킵.")
             self.state.clear_pending_selection()
@@ -220,7 +272,7 @@ class CasinoScheduler:
             return
 
         # 주문 안전 가드: 잔고 부족 체크
-        total_usdt, free_usdt = self.mexc.get_balance()
+        total_usdt, free_usdt = self.mexc.get_balance(lane="entry")
         required_usdt = config.BET_AMOUNT_USDT + config.BALANCE_BUFFER_USDT
         if free_usdt < required_usdt:
             logger.error(
@@ -238,8 +290,12 @@ class CasinoScheduler:
 
         order = None
         if config.ENABLE_REAL_ORDERS:
+            # 주문~상태 저장 사이에 죽어도 부팅 복구가 체결을 찾을 수 있도록 의도 먼저 기록
+            self.state.set_order_intent("buy", symbol, config.BET_AMOUNT_USDT)
             order = await self._create_market_buy_with_retry(symbol, config.BET_AMOUNT_USDT)
             if not order:
+                # 남겨 두면 다음 같은 심볼 진입이 오래된 since_ms를 이어 쓴다
+                self.state.clear_order_intent()
                 self.state.clear_pending_selection()
                 if self.bot:
                     await self.bot.send_message(
@@ -263,7 +319,7 @@ class CasinoScheduler:
             f"🎯 Symbol: {symbol}\n"
             f"💵 Entry: ${final_entry_price}\n"
             f"💰 Amount: {config.BET_AMOUNT_USDT} USDT\n"
-            f"⏰ Time: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n"
+            f"⏰ Time: {clock.now().strftime('%Y-%m-%d %H:%M:%S')}\n"
             f"📊 Change: +{selected['change']:.2f}%\n"
             f"📌 Rule: {config.CYCLE_STRING} 뒤 자동 청산\n"
             f"🧪 Order Mode: {'LIVE' if config.ENABLE_REAL_ORDERS else 'PAPER'}\n"
@@ -284,42 +340,61 @@ class CasinoScheduler:
     async def check_48h_exit_callback(self, context: ContextTypes.DEFAULT_TYPE):
         """JobQueue에 의해 실행되는 자동 청산 및 손절/익절 로직"""
         logger.debug("🔎 [Job] 자동 청산/손절/익절 조건 체크 중...")
-        
+        async with self.state_lock:
+            await self._check_exit(context)
+
+    async def _check_exit(self, context):
         active = self.state.get_active_bet()
         if not active:
             return
 
+        if not self.mexc.catalog_loaded:
+            # 카탈로그가 없으면 첫 조회가 동기 다운로드(수 초)가 되므로 이벤트 루프 밖에서 적재
+            await asyncio.to_thread(self.mexc.load_catalog, "exit")
+
         symbol = active['symbol']
         entry_price = active['entry_price']
         
-        # 현재가 조회
-        current_price = self.mexc.get_ticker(symbol)
+        # 현재가 조회 (청산 감시는 최우선 레인)
+        current_price = self.mexc.get_ticker(symbol, lane="exit")
         if not current_price:
             logger.error(f"❌ 시세 조회 실패: {symbol}")
             return
+        detected_ms = int(clock.time() * 1000)
         
         # 수익률 계산
         pnl_percent = ((current_price - entry_price) / entry_price) * 100
         
+        # 전략 상태 머신: 현재가 하나를 high=low=close 이벤트로 처리
+        entry_time = datetime.strptime(active["entry_time"], "%Y-%m-%d %H:%M:%S")
+        is_ts_active, peak_price = self.state.get_trailing_stop_state()
+        position = self.strategy.open(symbol, entry_price, active.get('amount_usdt'), entry_time,
+                                      is_ts_active, peak_price)
+        action = self.strategy.on_price(position, current_price, current_price, current_price, clock.now())
+        if action is None:
+            return
+        
         # 1. 손절 체크: -25% 이하
-        if pnl_percent <= config.STOP_LOSS_THRESHOLD:
+        if action.exit_reason == STOP_LOSS:
             logger.warning(f"🛑 손절 조건 감지! PNL={pnl_percent:.2f}% <= {config.STOP_LOSS_THRESHOLD}%")
             
-            if config.ENABLE_REAL_ORDERS:
-                sell_order = await self._create_market_sell_with_retry(symbol)
-                if not sell_order:
-                    logger.error("❌ [Order] 손절 매도 주문 실패. 상태 유지.")
-                    if self.bot:
-                        await self.bot.send_message(
-                            f"❌ [손절 실패] 주문 재시도 초과\n"
-                            f"Symbol: {symbol}\n"
-                            f"포지션 상태는 유지됩니다."
-                        )
-                    return
-                current_price = self._extract_order_price(sell_order, current_price)
+            sell_order, execution = await self._sell_with_tracking(
+                symbol, current_price, detected_ms, action.threshold_price
+            )
+            if not execution:
+                logger.error("❌ [Order] 손절 매도 주문 실패. 상태 유지.")
+                if self.bot:
+                    await self.bot.send_message(
+                        f"❌ [손절 실패] 주문 재시도 초과\n"
+                        f"Symbol: {symbol}\n"
+                        f"포지션 상태는 유지됩니다."
+                    )
+                return
+            current_price = execution["fill_price"]
+            if sell_order:
                 logger.info(f"✅ [Order] 손절 매도 주문 성공: {sell_order.get('id', 'N/A')}")
             
-            result = self.state.clear_active_bet(current_price, reason="stop_loss")
+            result = self.state.clear_active_bet(current_price, reason="stop_loss", execution=execution)
             pnl = result['pnl_percent']
             
             msg = (
@@ -338,92 +413,85 @@ class CasinoScheduler:
             return
         
         # 2. 트레일링 스탑 로직
-        is_ts_active, peak_price = self.state.get_trailing_stop_state()
-        
-        if not is_ts_active:
-            # 트레일링 활성화 조건 체크: +25% 도달
-            if pnl_percent >= config.TS_ACTIVATION_REWARD:
-                logger.info(f"🎯 트레일링 스탑 활성화 조건 도달! PNL={pnl_percent:.2f}%")
-                self.state.activate_trailing_stop(current_price)
-                
-                if self.bot:
-                    await self.bot.send_message(
-                        f"🎯 [트레일링 활성화]\n"
-                        f"📈 PNL: {pnl_percent:+.2f}%\n"
-                        f"💰 Peak: ${current_price}\n"
-                        f"🎢 최고점 대비 {config.TS_CALLBACK_RATE}% 하락 시 익절 예정"
-                    )
-        else:
-            # 트레일링 활성화 상태
-            # 2-1. 최고가 갱신 체크
-            if current_price > peak_price:
-                logger.info(f"📈 최고가 갱신: ${peak_price} -> ${current_price}")
-                self.state.update_peak_price(current_price)
-                peak_price = current_price
+        if action.activated:
+            # 트레일링 활성화 조건 도달: +25%
+            logger.info(f"🎯 트레일링 스탑 활성화 조건 도달! PNL={pnl_percent:.2f}%")
+            self.state.activate_trailing_stop(position.peak_price)
             
-            # 2-2. 익절 조건 체크: peak 대비 10% 하락
-            callback_threshold = peak_price * (1 - config.TS_CALLBACK_RATE / 100)
-            if current_price <= callback_threshold:
-                logger.info(f"🎉 익절 조건 감지! Current=${current_price} <= Threshold=${callback_threshold:.4f}")
-                
-                if config.ENABLE_REAL_ORDERS:
-                    sell_order = await self._create_market_sell_with_retry(symbol)
-                    if not sell_order:
-                        logger.error("❌ [Order] 익절 매도 주문 실패. 상태 유지.")
-                        if self.bot:
-                            await self.bot.send_message(
-                                f"❌ [익절 실패] 주문 재시도 초과\n"
-                                f"Symbol: {symbol}\n"
-                                f"포지션 상태는 유지됩니다."
-                            )
-                        return
-                    current_price = self._extract_order_price(sell_order, current_price)
-                    logger.info(f"✅ [Order] 익절 매도 주문 성공: {sell_order.get('id', 'N/A')}")
-                
-                result = self.state.clear_active_bet(current_price, reason="trailing_stop")
-                pnl = result['pnl_percent']
-                
-                msg = (
-                    f"🎉 [익절 실행] TRAILING STOP\n"
-                    f"💰 PNL: {pnl:+.2f}%\n"
-                    f"Entry: ${entry_price}\n"
-                    f"Peak: ${peak_price}\n"
-                    f"Exit: ${current_price}\n"
-                    f"📊 Callback: {config.TS_CALLBACK_RATE}%\n"
-                    f"{self._balance_snapshot_text()}"
+            if self.bot:
+                await self.bot.send_message(
+                    f"🎯 [트레일링 활성화]\n"
+                    f"📈 PNL: {pnl_percent:+.2f}%\n"
+                    f"💰 Peak: ${current_price}\n"
+                    f"🎢 최고점 대비 {config.TS_CALLBACK_RATE}% 하락 시 익절 예정"
                 )
-                
+        elif action.peak_updated:
+            # 2-1. 최고가 갱신
+            logger.info(f"📈 최고가 갱신: ${peak_price} -> ${position.peak_price}")
+            self.state.update_peak_price(position.peak_price)
+        peak_price = position.peak_price
+        
+        # 2-2. 익절 조건: peak 대비 10% 하락
+        if action.exit_reason == TRAILING_STOP:
+            callback_threshold = action.threshold_price
+            logger.info(f"🎉 익절 조건 감지! Current=${current_price} <= Threshold=${callback_threshold:.4f}")
+            
+            sell_order, execution = await self._sell_with_tracking(
+                symbol, current_price, detected_ms, callback_threshold
+            )
+            if not execution:
+                logger.error("❌ [Order] 익절 매도 주문 실패. 상태 유지.")
                 if self.bot:
-                    await self.bot.send_message(msg)
-                elif context.job.chat_id:
-                    await context.bot.send_message(chat_id=context.job.chat_id, text=msg)
+                    await self.bot.send_message(
+                        f"❌ [익절 실패] 주문 재시도 초과\n"
+                        f"Symbol: {symbol}\n"
+                        f"포지션 상태는 유지됩니다."
+                    )
                 return
+            current_price = execution["fill_price"]
+            if sell_order:
+                logger.info(f"✅ [Order] 익절 매도 주문 성공: {sell_order.get('id', 'N/A')}")
+            
+            result = self.state.clear_active_bet(current_price, reason="trailing_stop", execution=execution)
+            pnl = result['pnl_percent']
+            
+            msg = (
+                f"🎉 [익절 실행] TRAILING STOP\n"
+                f"💰 PNL: {pnl:+.2f}%\n"
+                f"Entry: ${entry_price}\n"
+                f"Peak: ${peak_price}\n"
+                f"Exit: ${current_price}\n"
+                f"📊 Callback: {config.TS_CALLBACK_RATE}%\n"
+                f"{self._balance_snapshot_text()}"
+            )
+            
+            if self.bot:
+                await self.bot.send_message(msg)
+            elif context.job.chat_id:
+                await context.bot.send_message(chat_id=context.job.chat_id, text=msg)
+            return
         
-        # 3. 타임아웃 체크 (기존 로직)
-        entry_time = datetime.strptime(active["entry_time"], "%Y-%m-%d %H:%M:%S")
-        # 주기보다 N초 일찍 청산
-        exit_time = entry_time + config.CYCLE_DELTA - timedelta(seconds=config.EARLY_EXIT_SECONDS)
-        now = datetime.now()
-        
-        if now >= exit_time:
+        # 3. 타임아웃 체크 (주기보다 N초 일찍 청산)
+        if action.exit_reason == TIMEOUT:
+            exit_time = self.strategy.expires_at(entry_time)
             logger.info(f"⏰ 시간 만료 감지! (Entry: {entry_time} -> Exit: {exit_time})")
             logger.info(f"🗑️ 자동 청산 실행: {symbol}")
 
-            if config.ENABLE_REAL_ORDERS:
-                sell_order = await self._create_market_sell_with_retry(symbol)
-                if not sell_order:
-                    logger.error("❌ [Order] 자동 청산 주문 실패. 상태 유지.")
-                    if self.bot:
-                        await self.bot.send_message(
-                            f"❌ [자동 청산 실패] 주문 재시도 초과\n"
-                            f"Symbol: {symbol}\n"
-                            f"포지션 상태는 유지됩니다."
-                        )
-                    return
-                current_price = self._extract_order_price(sell_order, current_price)
+            sell_order, execution = await self._sell_with_tracking(symbol, current_price, detected_ms)
+            if not execution:
+                logger.error("❌ [Order] 자동 청산 주문 실패. 상태 유지.")
+                if self.bot:
+                    await self.bot.send_message(
+                        f"❌ [자동 청산 실패] 주문 재시도 초과\n"
+                        f"Symbol: {symbol}\n"
+                        f"포지션 상태는 유지됩니다."
+                    )
+                return
+            current_price = execution["fill_price"]
+            if sell_order:
                 logger.info(f"✅ [Order] 자동 매도 주문 성공: {sell_order.get('id', 'N/A')}")
             
-            result = self.state.clear_active_bet(current_price, reason="timeout")
+            result = self.state.clear_active_bet(current_price, reason="timeout", execution=execution)
             pnl = result['pnl_percent']
             emoji = "🎉" if pnl > 0 else "💧"
             
@@ -455,27 +523,33 @@ class CasinoScheduler:
         logger.info(f"🚨 긴급 청산 실행: {active['symbol']}")
         
         # 실제 현재가 조회
-        current_price = self.mexc.get_ticker(active['symbol'])
+        current_price = self.mexc.get_ticker(active['symbol'], lane="exit")
         if not current_price:
             logger.error(f"❌ 시세 조회 실패. 수동 매도 취소.")
             return "❌ 시세 조회 실패. 다시 시도해주세요."
+        detected_price = current_price
+        detected_ms = submitted_ms = int(clock.time() * 1000)
 
         if config.ENABLE_REAL_ORDERS:
+            self.state.set_order_intent("sell", active['symbol'])
             sell_order = self.mexc.create_market_sell(active['symbol'])
             if not sell_order:
                 logger.error("❌ [Order] 수동 매도 주문 실패. 상태 유지.")
                 return "❌ [수동 청산 실패] 주문이 체결되지 않았습니다. 상태를 유지합니다."
             current_price = self._extract_order_price(sell_order, current_price)
+        execution = self._build_execution(
+            detected_price, detected_ms, submitted_ms, int(clock.time() * 1000), current_price
+        )
 
         # 청산 처리 (쿨타임도 함께 해제됨)
-        result = self.state.clear_active_bet(current_price, reason="user_request")
+        result = self.state.clear_active_bet(current_price, reason="user_request", execution=execution)
         pnl = result['pnl_percent']
         emoji = "🎉" if pnl > 0 else "💧"
         
         # 다음 베팅 시간 계산
         next_bet = self.state.get_next_bet_time()
         if next_bet:
-            now = datetime.now()
+            now = clock.now()
             remaining = next_bet - now
             remaining_minutes = int(remaining.total_seconds() / 60)
             remaining_seconds = int(remaining.total_seconds() % 60)
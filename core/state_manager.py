@@ -1,11 +1,47 @@
 import json
+import math
 import os
 from datetime import datetime, timedelta
+from core import clock
 from utils.logger import logger
 import core.config as config
 
 STATE_FILE = os.getenv("STATE_FILE_PATH", "casino_state.json")
 
+# 청산 지연/슬리피지 분포 집계 대상 필드
+EXECUTION_METRICS = (
+    "detect_to_submit_ms",
+    "submit_to_fill_ms",
+    "detect_to_fill_ms",
+    "slippage_percent",
+    "overshoot_percent",
+)
+
+# 음수가 불리한 방향인 지표 (매도 체결가가 감지가/임계가보다 낮음)
+SIGNED_METRICS = ("slippage_percent", "overshoot_percent")
+
+
+def _distribution(values, adverse_low=False):
+    """정렬된 값 목록의 요약 분포 (nearest-rank 백분위)
+
+    adverse_low: 부호 있는 지표(슬리피지/임계 초과)는 음수 쪽이 불리한 체결이므로
+    상위 꼬리 대신 p10/p1/min을 꼬리로 보고한다.
+    """
+    if not values:
+        return None
+
+    def pct(q):
+        idx = max(0, min(len(values) - 1, math.ceil(q / 100 * len(values)) - 1))
+        return values[idx]
+
+    dist = {"mean": round(sum(values) / len(values), 4), "p50": pct(50)}
+    if adverse_low:
+        dist.update(p10=pct(10), p1=pct(1), min=values[0])
+    else:
+        dist.update(p90=pct(90), p99=pct(99), max=values[-1])
+    return dist
+
+
 class StateManager:
     def __init__(self):
         self.state = self.load_state()
@@ -25,6 +61,7 @@ class StateManager:
             "pending_selection": None, 
             "cooldown_until": None, 
             "last_bet_job_time": None,
+            "order_intent": None,
             "trailing_stop": {
                 "is_active": False,
                 "peak_price": None
@@ -36,8 +73,11 @@ class StateManager:
             parent_dir = os.path.dirname(STATE_FILE)
             if parent_dir:
                 os.makedirs(parent_dir, exist_ok=True)
-            with open(STATE_FILE, "w", encoding="utf-8") as f:
+            # 임시 파일에 쓰고 교체: 쓰는 도중 죽어도 이전 상태 파일은 온전히 남는다
+            tmp_path = f"{STATE_FILE}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
                 json.dump(self.state, f, indent=4, ensure_ascii=False)
+            os.replace(tmp_path, STATE_FILE)
         except Exception as e:
             logger.error(f"❌ 상태 저장 실패: {e}")
 
@@ -56,7 +96,7 @@ class StateManager:
 
     def set_active_bet(self, symbol, entry_price, amount_usdt, entry_time=None):
         if entry_time is None:
-            entry_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+            entry_time = clock.now().strftime("%Y-%m-%d %H:%M:%S")
             
         # 쿨타임 설정: 진입 시간 + 설정된 주기 - 버퍼
         et = datetime.strptime(entry_time, "%Y-%m-%d %H:%M:%S")
@@ -71,6 +111,7 @@ class StateManager:
             "entry_time": entry_time
         }
         self.state["cooldown_until"] = cooldown_until
+        self.state["order_intent"] = None
         
         # 트레일링 스탑 초기화
         self.state["trailing_stop"] = {
@@ -81,12 +122,14 @@ class StateManager:
         logger.info(f"✅ 신규 베팅 상태 저장: {symbol} (쿨타임: ~{cooldown_until})")
         self.save_state()
 
-    def clear_active_bet(self, exit_price, reason="48h_expired"):
+    def clear_active_bet(self, exit_price, reason="48h_expired", execution=None):
         bet = self.state.get("active_bet")
         if bet:
             bet["exit_price"] = exit_price
-            bet["exit_time"] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+            bet["exit_time"] = clock.now().strftime("%Y-%m-%d %H:%M:%S")
             bet["exit_reason"] = reason
+            if execution:
+                bet["execution"] = execution
             
             # 수익률 계산
             if bet["entry_price"] and exit_price and bet["entry_price"] > 0:
@@ -100,6 +143,7 @@ class StateManager:
             
             # 쿨타임도 함께 클리어 (청산 완료 시 즉시 다음 베팅 가능)
             self.state["cooldown_until"] = None
+            self.state["order_intent"] = None
             
             # 트레일링 스탑 상태 초기화
             self.state["trailing_stop"] = {
@@ -114,12 +158,41 @@ class StateManager:
             return bet
         return None
     
+    def set_order_intent(self, side, symbol, amount_usdt=None):
+        """주문 직전 의도 기록 (부팅 복구 시 이 시각 이후 체결만 조회)
+
+        체결 결과는 set_active_bet / clear_active_bet이 같은 저장에서 지운다.
+        같은 주문을 재시도하는 중이면 첫 시도 시각을 유지한다.
+        """
+        intent = self.state.get("order_intent")
+        if not (intent and intent["side"] == side and intent["symbol"] == symbol):
+            intent = {
+                "side": side,
+                "symbol": symbol,
+                "amount_usdt": amount_usdt,
+                "created_at": clock.now().strftime("%Y-%m-%d %H:%M:%S"),
+                "since_ms": int(clock.time() * 1000),
+            }
+            self.state["order_intent"] = intent
+            self.save_state()
+        return intent
+
+    def get_order_intent(self):
+        """미결 주문 의도 조회 (없으면 None)"""
+        return self.state.get("order_intent")
+
+    def clear_order_intent(self):
+        """주문 의도 제거"""
+        if self.state.get("order_intent"):
+            self.state["order_intent"] = None
+            self.save_state()
+
     def set_pending_selection(self, candidates, message_id=None):
         """후보 선택 대기 상태 저장"""
         self.state["pending_selection"] = {
             "candidates": candidates,
             "message_id": message_id,
-            "created_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+            "created_at": clock.now().strftime("%Y-%m-%d %H:%M:%S")
         }
         logger.info(f"⏳ 선택 대기 상태 저장: {len(candidates)}개 후보")
         self.save_state()
@@ -138,7 +211,7 @@ class StateManager:
     def set_last_bet_job_time(self, time_str=None):
         """마지막 베팅 Job 실행 시간 저장"""
         if time_str is None:
-            time_str = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+            time_str = clock.now().strftime("%Y-%m-%d %H:%M:%S")
         self.state["last_bet_job_time"] = time_str
         self.save_state()
     
@@ -181,3 +254,20 @@ class StateManager:
             self.state["trailing_stop"]["peak_price"] = new_peak
             logger.info(f"📈 트레일링 최고가 갱신: Peak=${new_peak}")
             self.save_state()
+
+    def get_exit_latency_stats(self):
+        """청산 사유별 감지→주문→체결 지연(ms) / 슬리피지(%) 분포"""
+        grouped = {}
+        for bet in self.state.get("history", []):
+            execution = bet.get("execution")
+            # 페이퍼 모드 기록은 체결가=감지가, 지연≈0이라 실측 분포에서 제외
+            if execution and not execution.get("paper"):
+                grouped.setdefault(bet.get("exit_reason", "unknown"), []).append(execution)
+
+        stats = {}
+        for reason, rows in grouped.items():
+            stats[reason] = {"count": len(rows)}
+            for key in EXECUTION_METRICS:
+                values = sorted(r[key] for r in rows if r.get(key) is not None)
+                stats[reason][key] = _distribution(values, adverse_low=key in SIGNED_METRICS)
+        return stats
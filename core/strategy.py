@@ -0,0 +1,140 @@
+"""
+🧭 손절/트레일링/타임아웃 전략 상태 머신 (실전·백테스트 공용)
+
+실전 스케줄러(check_48h_exit_callback)와 백테스트 엔진이 같은 규칙으로 청산을
+판정하도록 한 곳에 모았다. 가격 이벤트 하나(high, low, close, now)를 넣으면
+포지션 상태(트레일링 활성화/피크)를 갱신하고 그 결과를 Action으로 돌려준다.
+
+판정 순서 (이벤트마다)
+1. 손절: Low 수익률 <= STOP_LOSS_THRESHOLD → 체결가 Low
+2. 트레일링 활성화: 비활성 상태에서 High 수익률 >= TS_ACTIVATION_REWARD → 피크 = High
+3. 피크 갱신: 활성 상태에서 High > 피크
+4. 콜백: Low <= 피크 × (1 - TS_CALLBACK_RATE) → 체결가 = 콜백 기준가
+5. 타임아웃: 진입 후 (주기 - 조기 청산) 경과 → 체결가 Close
+
+실전은 5분마다 조회한 현재가 하나를 high=low=close로 넣는다.
+"""
+
+from datetime import datetime, timedelta
+
+import core.config as config
+
+STOP_LOSS = 'stop_loss'
+TRAILING_STOP = 'trailing_stop'
+TIMEOUT = 'timeout'
+
+
+class Position:
+    """포지션 상태"""
+    __slots__ = ('symbol', 'entry_price', 'amount_usdt', 'entry_time', 'is_ts_active', 'peak_price')
+
+    def __init__(self, symbol: str, entry_price: float, amount_usdt: float, entry_time: datetime):
+        self.symbol = symbol
+        self.entry_price = entry_price
+        self.amount_usdt = amount_usdt
+        self.entry_time = entry_time
+
+        # 트레일링 스탑 상태
+        self.is_ts_active = False
+        self.peak_price = None
+
+    def activate_trailing_stop(self, peak_price: float):
+        """트레일링 스탑 활성화"""
+        self.is_ts_active = True
+        self.peak_price = peak_price
+
+    def update_peak_price(self, new_peak: float):
+        """최고가 갱신"""
+        if self.is_ts_active and new_peak > self.peak_price:
+            self.peak_price = new_peak
+
+    def get_pnl_percent(self, current_price: float) -> float:
+        """현재 수익률 계산"""
+        return ((current_price - self.entry_price) / self.entry_price) * 100
+
+
+class Action:
+    """가격 이벤트 처리 결과 (아무 일도 없으면 on_price가 None을 반환)"""
+    __slots__ = ('exit_reason', 'exit_price', 'threshold_price', 'activated', 'peak_updated')
+
+    def __init__(self):
+        self.exit_reason = None      # STOP_LOSS / TRAILING_STOP / TIMEOUT
+        self.exit_price = None       # 백테스트 체결가 규칙에 따른 가격
+        self.threshold_price = None  # 발동 기준가 (손절가 / 콜백 기준가)
+        self.activated = False       # 이번 이벤트에서 트레일링 활성화
+        self.peak_updated = False    # 이번 이벤트에서 피크 갱신
+
+
+class TrailingStopStrategy:
+    """손절 → 트레일링 활성화 → 피크 갱신 → 콜백 → 타임아웃"""
+
+    def __init__(self, stop_loss: float, activation: float, callback: float,
+                 cycle: timedelta, early_exit: timedelta = timedelta(0)):
+        self.stop_loss = stop_loss
+        self.activation = activation
+        self.callback = callback
+        self.hold = cycle - early_exit  # 진입 후 이만큼 지나면 타임아웃
+        self.keep = 1 - callback / 100
+
+    @classmethod
+    def from_config(cls) -> "TrailingStopStrategy":
+        """실전 설정 (core.config)"""
+        return cls(config.STOP_LOSS_THRESHOLD, config.TS_ACTIVATION_REWARD, config.TS_CALLBACK_RATE,
+                   config.CYCLE_DELTA, timedelta(seconds=config.EARLY_EXIT_SECONDS))
+
+    def open(self, symbol: str, entry_price: float, amount_usdt: float, entry_time: datetime,
+             is_ts_active: bool = False, peak_price: float = None) -> Position:
+        """진입 (저장된 트레일링 상태가 있으면 이어서 시작)"""
+        position = Position(symbol, entry_price, amount_usdt, entry_time)
+        if is_ts_active:
+            position.activate_trailing_stop(peak_price)
+        return position
+
+    def stop_loss_price(self, position: Position) -> float:
+        return position.entry_price * (1 + self.stop_loss / 100)
+
+    def expires_at(self, entry_time: datetime) -> datetime:
+        """자동 청산 예정 시각"""
+        return entry_time + self.hold
+
+    def is_expired(self, position: Position, now: datetime) -> bool:
+        return now - position.entry_time >= self.hold
+
+    def on_price(self, position: Position, high: float, low: float, close: float, now: datetime):
+        """가격 이벤트 하나 처리 → Action (변화가 없으면 None)"""
+        action = None
+
+        # 1. 손절 (Low 기준)
+        if position.get_pnl_percent(low) <= self.stop_loss:
+            action = Action()
+            action.exit_reason = STOP_LOSS
+            action.exit_price = low
+            action.threshold_price = self.stop_loss_price(position)
+            return action
+
+        # 2. 트레일링 활성화 (High 기준)
+        if not position.is_ts_active and position.get_pnl_percent(high) >= self.activation:
+            position.activate_trailing_stop(high)
+            action = Action()
+            action.activated = True
+
+        # 3. 트레일링 스탑: 피크 갱신 → 콜백 (Low 기준)
+        if position.is_ts_active:
+            if high > position.peak_price:
+                position.update_peak_price(high)
+                action = action or Action()
+                action.peak_updated = True
+            threshold = position.peak_price * self.keep
+            if low <= threshold:
+                action = action or Action()
+                action.exit_reason = TRAILING_STOP
+                action.exit_price = threshold
+                action.threshold_price = threshold
+                return action
+
+        # 4. 타임아웃 (종가 청산)
+        if self.is_expired(position, now):
+            action = action or Action()
+            action.exit_reason = TIMEOUT
+            action.exit_price = close
+        return action
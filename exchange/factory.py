@@ -0,0 +1,101 @@
+"""
+프로세스 전역 거래소 팩토리
+
+거래소별로 설정된 ccxt 인스턴스를 하나만 만들어 재사용한다.
+- keep-alive 커넥션 풀(requests.Session)을 공유해 TLS 핸드셰이크 반복 제거
+- load_markets 결과를 디스크에 저장해 재시작 시 수 MB 카탈로그 재다운로드 제거
+"""
+
+import json
+import os
+import threading
+import time
+
+import ccxt
+import requests
+from requests.adapters import HTTPAdapter
+
+from exchange.rate_limiter import request_scheduler
+
+MARKETS_CACHE_DIR = os.getenv("MARKETS_CACHE_DIR", "data/markets")
+MARKETS_CACHE_TTL_SECONDS = 24 * 3600
+HTTP_POOL_SIZE = 16
+
+_instances = {}
+_lock = threading.Lock()
+
+
+def _pooled_session():
+    """keep-alive 커넥션 풀 세션"""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=HTTP_POOL_SIZE, pool_maxsize=HTTP_POOL_SIZE)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+def get_exchange(exchange_id, api_key=None, secret=None, options=None):
+    """(거래소, API 키)별 단일 ccxt 인스턴스 반환"""
+    key = (exchange_id, api_key)
+    with _lock:
+        exchange = _instances.get(key)
+        if exchange is None:
+            params = {
+                # 요청 간격은 공유 스케줄러(request_scheduler)가 관리
+                'enableRateLimit': False,
+                'session': _pooled_session(),
+            }
+            if api_key:
+                params['apiKey'] = api_key
+                params['secret'] = secret
+            if options:
+                params['options'] = options
+            exchange = getattr(ccxt, exchange_id)(params)
+            _instances[key] = exchange
+        return exchange
+
+
+def create_async_exchange(exchange_id):
+    """ccxt.async_support 인스턴스 생성 (이벤트 루프에 묶이므로 캐시하지 않음, 사용 후 close 필요)
+
+    마켓은 동기 인스턴스의 캐시를 그대로 주입해 load_markets 재다운로드를 피한다.
+    """
+    import ccxt.async_support as ccxt_async
+
+    exchange = getattr(ccxt_async, exchange_id)({'enableRateLimit': False})
+    sync_exchange = get_exchange(exchange_id)
+    load_markets_cached(sync_exchange, lane="backtest")
+    exchange.set_markets(sync_exchange.markets, sync_exchange.currencies)
+    return exchange
+
+
+def _markets_cache_path(exchange_id):
+    return os.path.join(MARKETS_CACHE_DIR, f"{exchange_id}_markets.json")
+
+
+def load_markets_cached(exchange, lane="status", max_age=MARKETS_CACHE_TTL_SECONDS, reload=False):
+    """디스크 캐시(TTL) 우선으로 마켓 로드. 만료/없음일 때만 네트워크 조회
+
+    reload=True면 메모리에 로드된 마켓이 있어도 디스크/네트워크 기준으로 갱신한다.
+    """
+    if exchange.markets and not reload:
+        return exchange.markets
+
+    path = _markets_cache_path(exchange.id)
+    if os.path.exists(path) and time.time() - os.path.getmtime(path) < max_age:
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                cached = json.load(f)
+            exchange.set_markets(cached["markets"], cached.get("currencies"))
+            return exchange.markets
+        except Exception:
+            pass  # 손상된 캐시는 무시하고 재조회
+
+    markets = request_scheduler.call(exchange, lane, "load_markets", reload=reload)
+
+    os.makedirs(MARKETS_CACHE_DIR, exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump({"markets": exchange.markets, "currencies": exchange.currencies}, f)
+    os.replace(tmp_path, path)
+    return markets
@@ -0,0 +1,107 @@
+"""
+마켓 메타데이터 캐시 (정밀도/최소 주문/상태)
+
+주문 경로에서 amount_to_precision이 전체 카탈로그 load_markets를 유발하지 않도록
+심볼별 필요한 값만 압축해 디스크에 저장하고 dict로 O(1) 조회한다.
+"""
+
+import json
+import os
+import time
+
+from ccxt.base.decimal_to_precision import decimal_to_precision, TRUNCATE, NO_PADDING
+
+from exchange.factory import MARKETS_CACHE_DIR, load_markets_cached
+
+MARKET_METADATA_REFRESH_SECONDS = 6 * 3600
+
+
+class MarketMetadataCache:
+    """심볼별 정밀도/최소 주문 금액/상태 캐시"""
+
+    def __init__(self, exchange_id):
+        self.exchange_id = exchange_id
+        self.path = os.path.join(MARKETS_CACHE_DIR, f"{exchange_id}_metadata.json")
+        self.precision_mode = None
+        self.updated_at = 0
+        self.symbols = {}
+
+    def load(self):
+        """디스크에서 로드. 파일이 없으면 False"""
+        if not os.path.exists(self.path):
+            return False
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except Exception:
+            return False
+        self.precision_mode = data["precision_mode"]
+        self.updated_at = data["updated_at"]
+        self.symbols = data["symbols"]
+        return True
+
+    def is_stale(self, max_age=MARKET_METADATA_REFRESH_SECONDS):
+        return not self.symbols or time.time() - self.updated_at >= max_age
+
+    def refresh(self, exchange, lane="status", max_age=MARKET_METADATA_REFRESH_SECONDS):
+        """만료 시에만 카탈로그 재조회 후 압축 저장 (주문 경로 밖에서 호출)"""
+        if not self.is_stale(max_age):
+            return False
+        load_markets_cached(exchange, lane=lane, max_age=max_age, reload=True)
+        self.build(exchange)
+        return True
+
+    def build(self, exchange, save=True):
+        """ccxt markets에서 필요한 필드만 추출해 저장 (save=False면 메모리에만)"""
+        symbols = {}
+        for symbol, market in exchange.markets.items():
+            limits = market.get("limits") or {}
+            precision = market.get("precision") or {}
+            symbols[symbol] = {
+                "amount_precision": precision.get("amount"),
+                "price_precision": precision.get("price"),
+                "min_amount": (limits.get("amount") or {}).get("min"),
+                "min_notional": (limits.get("cost") or {}).get("min"),
+                "active": market.get("active") is not False,
+            }
+        self.symbols = symbols
+        self.precision_mode = exchange.precisionMode
+        self.updated_at = time.time()
+        if not save:
+            return
+
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({
+                "precision_mode": self.precision_mode,
+                "updated_at": self.updated_at,
+                "symbols": self.symbols,
+            }, f)
+        os.replace(tmp_path, self.path)
+
+    def get(self, symbol):
+        return self.symbols.get(symbol)
+
+    def is_tradable(self, symbol):
+        meta = self.symbols.get(symbol)
+        return bool(meta and meta["active"])
+
+    def amount_to_precision(self, symbol, amount):
+        """ccxt와 동일한 규칙(TRUNCATE)으로 수량 정밀도 적용. 미등록 심볼은 None"""
+        meta = self.symbols.get(symbol)
+        if not meta or meta["amount_precision"] is None:
+            return None
+        return float(decimal_to_precision(
+            amount, TRUNCATE, meta["amount_precision"], self.precision_mode, NO_PADDING
+        ))
+
+    def meets_min_notional(self, symbol, amount, price):
+        meta = self.symbols.get(symbol)
+        if not meta:
+            return False
+        if meta["min_amount"] and amount < meta["min_amount"]:
+            return False
+        if meta["min_notional"] and amount * price < meta["min_notional"]:
+            return False
+        return True
@@ -1,31 +1,110 @@
-import ccxt
 import os
-from dotenv import load_dotenv
+import threading
 from utils.logger import logger
+from exchange.rate_limiter import request_scheduler
+from exchange.factory import get_exchange, load_markets_cached
+from exchange.market_cache import MarketMetadataCache
+import core.config as config
 
-load_dotenv()
+config.load_env()
+
+# 보유 코인으로 보지 않는 먼지 잔고 (수량 기준)
+DUST_AMOUNT = 0.0001
 
 class MexcConnector:
-    def __init__(self):
-        self.api_key = os.getenv("MEXC_ACCESS_KEY")
-        self.secret_key = os.getenv("MEXC_SECRET_KEY")
-        
-        if not self.api_key or not self.secret_key:
-            logger.warning("⚠️ [MEXC] API Key or Secret is missing in .env")
-        
-        self.exchange = ccxt.mexc({
-            'apiKey': self.api_key,
-            'secret': self.secret_key,
-            'enableRateLimit': True,
-            'options': {
-                'defaultType': 'spot'  # 현물 기준 (필요시 future로 변경)
-            }
-        })
+    def __init__(self, exchange=None, markets=None):
+        """exchange/markets를 주입하면 해당 인스턴스 사용 (예: exchange.simulator 오프라인 테스트)
+
+        생성 시에는 네트워크를 타지 않는다. 메타데이터는 디스크 캐시만 읽고,
+        만료 갱신은 refresh_markets(부팅 후 백그라운드 / 베팅 직전)에서 한다.
+        """
+        self._markets_lock = threading.RLock()
+        if exchange is not None:
+            self.exchange = exchange
+        else:
+            self.api_key = os.getenv("MEXC_ACCESS_KEY")
+            self.secret_key = os.getenv("MEXC_SECRET_KEY")
+
+            if not self.api_key or not self.secret_key:
+                logger.warning("⚠️ [MEXC] API Key or Secret is missing in .env")
+
+            self.exchange = get_exchange(
+                'mexc',
+                self.api_key,
+                self.secret_key,
+                options={
+                    'defaultType': 'spot'  # 현물 기준 (필요시 future로 변경)
+                },
+            )
+
+        if markets is not None:
+            self.markets = markets
+            return
+
+        # 정밀도/최소 주문 메타데이터는 시작 시 디스크에서만 로드
+        self.markets = MarketMetadataCache(self.exchange.id)
+        self.markets.load()
+
+    def _ensure_catalog(self, lane="status"):
+        """ccxt 메서드 내부 load_markets가 네트워크를 타지 않도록 첫 호출 전에 카탈로그 적재 (디스크 캐시 우선)"""
+        if self.exchange.markets:
+            return
+        with self._markets_lock:
+            if not self.exchange.markets:
+                load_markets_cached(self.exchange, lane=lane)
+
+    @property
+    def catalog_loaded(self):
+        return bool(self.exchange.markets)
+
+    def load_catalog(self, lane="status"):
+        """카탈로그 적재 (디스크 캐시 우선, 없으면 다운로드). 이벤트 루프 밖(to_thread)에서 호출"""
+        try:
+            self._ensure_catalog(lane)
+        except Exception as e:
+            logger.warning(f"⚠️ [MEXC] 마켓 카탈로그 적재 실패: {e}")
+
+    def _amount_to_precision(self, symbol, amount, lane):
+        """수량 정밀도 적용 (메타데이터 캐시 우선). 적용할 수 없으면 None
+
+        캐시에 없는 심볼(빈 data/ 볼륨, 부팅 갱신 실패 등)이면 카탈로그로 캐시를 메모리에
+        다시 만들고, 그래도 없으면 ccxt amount_to_precision을 쓴다. 청산 매도가 캐시
+        누락만으로 실패하지 않게 하기 위함.
+        """
+        precise = self.markets.amount_to_precision(symbol, amount)
+        if precise is not None:
+            return precise
+
+        logger.warning(f"⚠️ [MEXC] 메타데이터 캐시에 없는 심볼: {symbol} → 카탈로그로 보충")
+        with self._markets_lock:
+            self._ensure_catalog(lane)
+            if symbol in self.exchange.markets:
+                self.markets.build(self.exchange, save=False)
+        precise = self.markets.amount_to_precision(symbol, amount)
+        if precise is None and symbol in self.exchange.markets:
+            precise = float(self.exchange.amount_to_precision(symbol, amount))
+        return precise
+
+    def refresh_markets(self):
+        """마켓 메타데이터 갱신 (만료 시에만 조회, 주문 경로 밖에서 호출)"""
+        try:
+            with self._markets_lock:
+                if self.markets.refresh(self.exchange):
+                    logger.info(f"📋 [MEXC] 마켓 메타데이터 갱신: {len(self.markets.symbols)}개 심볼")
+                else:
+                    self._ensure_catalog()
+        except Exception as e:
+            logger.warning(f"⚠️ [MEXC] 마켓 메타데이터 갱신 실패: {e}")
         
-    def get_balance(self):
+    def _call(self, lane, method_name, *args, **kwargs):
+        # 카탈로그가 없으면 호출자 레인으로 적재 (청산/진입 주문이 status 예비분 뒤로 밀리지 않게)
+        self._ensure_catalog(lane)
+        return request_scheduler.call(self.exchange, lane, method_name, *args, **kwargs)
+
+    def get_balance(self, lane="status"):
         """USDT 잔고 조회"""
         try:
-            balance = self.exchange.fetch_balance()
+            balance = self._call(lane, "fetch_balance")
             usdt = balance['total'].get('USDT', 0)
             free_usdt = balance['free'].get('USDT', 0)
             return usdt, free_usdt
@@ -33,18 +112,18 @@ class MexcConnector:
             logger.error(f"❌ [MEXC] 잔고 조회 실패: {e}")
             return 0, 0
     
-    def get_holdings(self, exclude=['USDT']):
-        """USDT 외 보유 코인 조회 (포지션 감지용)"""
+    def get_holdings(self, exclude=['USDT'], lane="status"):
+        """USDT 외 보유 코인 조회 (포지션 감지용). 조회 실패 시 None"""
         try:
-            balance = self.exchange.fetch_balance()
+            balance = self._call(lane, "fetch_balance")
             holdings = []
             
             for currency, amount in balance['total'].items():
                 if currency in exclude:
                     continue
                 
-                # 잔액이 있는 코인만 (먼지 제외: 0.0001 이상)
-                if amount and amount > 0.0001:
+                # 잔액이 있는 코인만 (먼지 제외: DUST_AMOUNT 초과)
+                if amount and amount > DUST_AMOUNT:
                     holdings.append({
                         'currency': currency,
                         'amount': amount,
@@ -55,12 +134,29 @@ class MexcConnector:
             return holdings
         except Exception as e:
             logger.error(f"❌ [MEXC] 보유 코인 조회 실패: {e}")
-            return []
+            return None
+
+    def get_balances(self, lane="status"):
+        """통화별 전체 잔고 {통화: 수량} (먼지 필터 없음). 조회 실패 시 None"""
+        try:
+            balance = self._call(lane, "fetch_balance")
+            return {currency: float(amount or 0) for currency, amount in balance['total'].items()}
+        except Exception as e:
+            logger.error(f"❌ [MEXC] 잔고 조회 실패: {e}")
+            return None
 
-    def get_ticker(self, symbol):
+    def get_my_trades(self, symbol, since=None, lane="status"):
+        """내 체결 내역 조회 (since: ms, 이 시각 이후만). 조회 실패 시 None"""
+        try:
+            return self._call(lane, "fetch_my_trades", symbol, since)
+        except Exception as e:
+            logger.error(f"❌ [MEXC] 체결 내역 조회 실패 ({symbol}): {e}")
+            return None
+
+    def get_ticker(self, symbol, lane="status"):
         """현재가 조회 (예: BTC/USDT)"""
         try:
-            ticker = self.exchange.fetch_ticker(symbol)
+            ticker = self._call(lane, "fetch_ticker", symbol)
             return ticker['last']
         except Exception as e:
             logger.error(f"❌ [MEXC] 시세 조회 실패 ({symbol}): {e}")
@@ -70,19 +166,27 @@ class MexcConnector:
         """시장가 매수 (금액 기준)"""
         try:
             # MEXC spot은 시장가 매수 시 base 수량을 받는 경우가 많아, 금액->수량으로 변환
-            ticker = self.exchange.fetch_ticker(symbol)
+            ticker = self._call("entry", "fetch_ticker", symbol)
             last_price = ticker.get('last')
             if not last_price or last_price <= 0:
                 logger.error(f"❌ [MEXC] 매수 실패 ({symbol}): 유효한 현재가 없음")
                 return None
 
             amount_base = float(amount_usdt) / float(last_price)
-            amount_base = float(self.exchange.amount_to_precision(symbol, amount_base))
+            amount_base = self._amount_to_precision(symbol, amount_base, "entry")
+            if amount_base is None:
+                logger.error(f"❌ [MEXC] 매수 실패 ({symbol}): 마켓 메타데이터 없음")
+                return None
             if amount_base <= 0:
                 logger.error(f"❌ [MEXC] 매수 실패 ({symbol}): 계산된 수량이 0")
                 return None
+            if not self.markets.meets_min_notional(symbol, amount_base, float(last_price)):
+                logger.error(f"❌ [MEXC] 매수 실패 ({symbol}): 최소 주문 수량/금액 미달")
+                return None
 
-            order = self.exchange.create_order(
+            order = self._call(
+                "entry",
+                "create_order",
                 symbol, 
                 'market', 
                 'buy', 
@@ -99,7 +203,7 @@ class MexcConnector:
             base_currency = symbol.split('/')[0]
 
             if amount is None:
-                balance = self.exchange.fetch_balance()
+                balance = self._call("exit", "fetch_balance")
                 amount = balance['free'].get(base_currency, 0)
 
             amount = float(amount)
@@ -107,12 +211,17 @@ class MexcConnector:
                 logger.error(f"❌ [MEXC] 매도 실패 ({symbol}): 매도 가능 수량 없음")
                 return None
 
-            amount = float(self.exchange.amount_to_precision(symbol, amount))
+            amount = self._amount_to_precision(symbol, amount, "exit")
+            if amount is None:
+                logger.error(f"❌ [MEXC] 매도 실패 ({symbol}): 마켓 메타데이터 없음")
+                return None
             if amount <= 0:
                 logger.error(f"❌ [MEXC] 매도 실패 ({symbol}): 정밀도 반영 후 수량 0")
                 return None
 
-            order = self.exchange.create_order(
+            order = self._call(
+                "exit",
+                "create_order",
                 symbol,
                 'market',
                 'sell',
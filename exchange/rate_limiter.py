@@ -0,0 +1,136 @@
+"""
+거래소 요청 스케줄러 (가중치 기반 토큰 버킷)
+
+라이브 봇, 스캐너, 백테스트가 같은 IP의 쿼터를 나눠 쓰므로 ccxt 인스턴스별
+enableRateLimit 대신 프로세스 간 공유 파일(fcntl lock)에 거래소별 버킷을 둔다.
+레인마다 남겨둬야 하는 예약분(LANE_RESERVE)이 있어서, 하위 레인은 버킷이
+예약분 아래로 내려가면 대기하고 상위 레인(청산 > 진입 > 상태 > 스캔 > 백테스트)이
+항상 먼저 쿼터를 가져간다.
+"""
+
+import asyncio
+import fcntl
+import json
+import os
+import time
+
+RATE_LIMIT_STATE_PATH = os.getenv("RATE_LIMIT_STATE_PATH", "data/rate_limit_state.json")
+
+# 우선순위 레인 (앞쪽이 높음)
+LANES = ("exit", "entry", "status", "scan", "backtest")
+
+# 레인별로 상위 레인 몫으로 남겨둘 버킷 비율
+LANE_RESERVE = {
+    "exit": 0.0,
+    "entry": 0.1,
+    "status": 0.2,
+    "scan": 0.4,
+    "backtest": 0.6,
+}
+
+# 거래소별 예산: rate = 초당 충전 weight, capacity = 버킷 최대 weight
+EXCHANGE_BUDGETS = {
+    "mexc": {"rate": 40.0, "capacity": 400.0},      # 500 weight / 10s (여유 20%)
+    "binance": {"rate": 80.0, "capacity": 1200.0},  # 6000 weight / min
+    "upbit": {"rate": 9.0, "capacity": 9.0},        # 시세 API 10회 / 초
+    "simulator": {"rate": 1e9, "capacity": 1e9},    # 오프라인 시뮬레이터 (쿼터 없음)
+}
+DEFAULT_BUDGET = {"rate": 10.0, "capacity": 50.0}
+
+# 엔드포인트(ccxt 메서드명)별 weight. 미정의는 1
+ENDPOINT_WEIGHTS = {
+    "mexc": {
+        "fetch_tickers": 40,
+        "fetch_balance": 10,
+        "fetch_my_trades": 10,
+        "load_markets": 10,
+        "fetch_markets": 10,
+    },
+    "binance": {
+        "fetch_tickers": 80,
+        "fetch_ohlcv": 2,
+        "load_markets": 20,
+        "fetch_markets": 20,
+    },
+}
+
+MAX_SLEEP_SECONDS = 1.0
+
+
+class RequestScheduler:
+    """프로세스 간 공유 토큰 버킷 기반 요청 스케줄러"""
+
+    def __init__(self, state_path=RATE_LIMIT_STATE_PATH):
+        self.state_path = state_path
+        self.lock_path = f"{state_path}.lock"
+
+    @staticmethod
+    def weight_of(exchange_id, endpoint):
+        return ENDPOINT_WEIGHTS.get(exchange_id, {}).get(endpoint, 1)
+
+    def _try_take(self, exchange_id, weight, lane):
+        """토큰 차감 시도. 성공 시 0, 실패 시 필요한 대기 시간(초) 반환"""
+        budget = EXCHANGE_BUDGETS.get(exchange_id, DEFAULT_BUDGET)
+        reserve = budget["capacity"] * LANE_RESERVE[lane]
+
+        parent_dir = os.path.dirname(self.state_path)
+        if parent_dir:
+            os.makedirs(parent_dir, exist_ok=True)
+
+        with open(self.lock_path, "a") as lock_fp:
+            fcntl.flock(lock_fp, fcntl.LOCK_EX)
+            try:
+                try:
+                    with open(self.state_path, "r", encoding="utf-8") as f:
+                        buckets = json.load(f)
+                except (FileNotFoundError, ValueError):
+                    buckets = {}
+
+                now = time.time()
+                bucket = buckets.get(exchange_id, {"tokens": budget["capacity"], "ts": now})
+                tokens = min(
+                    budget["capacity"],
+                    bucket["tokens"] + (now - bucket["ts"]) * budget["rate"],
+                )
+
+                if tokens - weight < reserve:
+                    return (weight + reserve - tokens) / budget["rate"]
+
+                buckets[exchange_id] = {"tokens": tokens - weight, "ts": now}
+                with open(self.state_path, "w", encoding="utf-8") as f:
+                    json.dump(buckets, f)
+                return 0
+            finally:
+                fcntl.flock(lock_fp, fcntl.LOCK_UN)
+
+    def acquire(self, exchange_id, endpoint, lane="status"):
+        """쿼터를 얻을 때까지 블로킹 대기"""
+        weight = self.weight_of(exchange_id, endpoint)
+        while True:
+            wait = self._try_take(exchange_id, weight, lane)
+            if wait <= 0:
+                return
+            time.sleep(min(wait, MAX_SLEEP_SECONDS))
+
+    async def acquire_async(self, exchange_id, endpoint, lane="status"):
+        """쿼터를 얻을 때까지 비동기 대기"""
+        weight = self.weight_of(exchange_id, endpoint)
+        while True:
+            wait = self._try_take(exchange_id, weight, lane)
+            if wait <= 0:
+                return
+            await asyncio.sleep(min(wait, MAX_SLEEP_SECONDS))
+
+    def call(self, exchange, lane, method_name, *args, **kwargs):
+        """ccxt 메서드를 쿼터 획득 후 호출 (예: call(ex, "exit", "create_order", ...))"""
+        self.acquire(exchange.id, method_name, lane)
+        return getattr(exchange, method_name)(*args, **kwargs)
+
+    async def call_async(self, exchange, lane, method_name, *args, **kwargs):
+        """ccxt.async_support 메서드용 call"""
+        await self.acquire_async(exchange.id, method_name, lane)
+        return await getattr(exchange, method_name)(*args, **kwargs)
+
+
+# 프로세스 전역 인스턴스
+request_scheduler = RequestScheduler()
@@ -0,0 +1,381 @@
+"""
+오프라인 거래소 시뮬레이터 (MEXC 대역)
+
+녹화된 캔들을 재생해 ccxt 동기 인스턴스와 같은 이름/반환 형식의 메서드를
+제공한다. MexcConnector(exchange=SimulatedExchange(...))로 주입하면 스캐너와
+CasinoScheduler의 진입/청산 경로 전체를 네트워크 없이 돌릴 수 있다.
+
+- 시세: 현재 시각(clock) 기준으로 시작 시각이 지난 마지막 캔들의 종가가 last,
+  24시간 전 가격 대비 변화율이 percentage, 24시간 거래대금이 quoteVolume
+- 호가: last 주변 spread_bps 간격의 합성 호가. 시장가 주문은 호가를 걸어 내려가며 체결
+- 주입: 호출 지연(latency_ms), 무작위 오류(error_rate), 예약 오류(fail_next),
+  부분 체결(partial_fill_ratio). 무작위 요소는 seed로 고정되어 재현 가능
+- 기록: calls에 메서드별 호출 시작/종료(perf_counter)와 오류 여부를 남긴다
+
+사용법:
+    sim = SimulatedExchange.from_candle_cache(['BTC/USDT', 'PEPE/USDT'], '5m', start_ms, end_ms,
+                                              latency_ms=(30, 80), partial_fill_ratio=0.7)
+    sim.set_time(start_ms + 3600_000)
+    mexc = MexcConnector(exchange=sim, markets=sim.metadata_cache())
+"""
+
+import itertools
+import random
+import time
+
+import ccxt
+import numpy as np
+
+from exchange.market_cache import MarketMetadataCache
+
+SIMULATOR_EXCHANGE_ID = "simulator"
+DAY_MS = 24 * 3600 * 1000
+
+
+class SimulatedExchange:
+    """캔들 재생 기반 ccxt 호환 가짜 거래소 (동기)"""
+
+    id = SIMULATOR_EXCHANGE_ID
+    precisionMode = ccxt.TICK_SIZE
+
+    def __init__(self, candles: dict, balances=None, clock=None, latency_ms=0, error_rate=0.0,
+                 partial_fill_ratio=1.0, fee_rate=0.0015, spread_bps=5.0, depth_usdt=2_000.0,
+                 book_levels=20, seed=0, sleep=time.sleep):
+        """
+        candles: {symbol: CandleArrays 또는 timestamp/open/high/low/close/volume DataFrame}
+        clock: 현재 시각(ms)을 돌려주는 함수. None이면 set_time/advance로 옮기는 내부 커서
+        latency_ms: 호출마다 더할 지연. 숫자 또는 (최소, 최대) 균등분포
+        """
+        self._series = {symbol: self._columns(data) for symbol, data in candles.items()}
+        self.balances = {'USDT': 1_000.0, **(balances or {})}
+        self.clock = clock
+        self.latency_ms = latency_ms
+        self.error_rate = error_rate
+        self.partial_fill_ratio = partial_fill_ratio
+        self.fee_rate = fee_rate
+        self.spread_bps = spread_bps
+        self.depth_usdt = depth_usdt
+        self.book_levels = book_levels
+        self.sleep = sleep
+        self._rng = random.Random(seed)
+        self._failures = {}
+        self._order_ids = itertools.count(1)
+        self.orders = {}
+        self.trades = []
+        self.calls = []
+
+        starts = [s['ts'][0] for s in self._series.values() if len(s['ts'])]
+        self._now_ms = int(min(starts)) if starts else 0
+        self.markets = None
+        self.currencies = None
+        self.set_markets(self._build_markets())
+
+    @classmethod
+    def from_candle_cache(cls, symbols, timeframe: str, start_ms: int, end_ms: int,
+                          exchange_id: str = "mexc", cache=None, **kwargs):
+        """로컬 캔들 캐시(녹화 데이터)의 [start_ms, end_ms] 구간으로 생성"""
+        from tests.candle_store import CandleCache
+
+        cache = cache or CandleCache()
+        candles = {
+            symbol: cache.open(exchange_id, symbol, timeframe).window(start_ms, end_ms)
+            for symbol in symbols
+        }
+        return cls(candles, **kwargs)
+
+    @staticmethod
+    def _columns(data) -> dict:
+        if hasattr(data, 'ohlcv'):
+            ts, ohlcv = np.asarray(data.ts, dtype=np.int64), np.asarray(data.ohlcv, dtype=np.float64)
+            o, h, l, c, v = ohlcv
+        else:
+            ts = data['timestamp'].to_numpy(dtype=np.int64)
+            o, h, l, c, v = (data[col].to_numpy(dtype=np.float64)
+                             for col in ('open', 'high', 'low', 'close', 'volume'))
+        quote = np.concatenate(([0.0], np.cumsum(v * c)))
+        return {'ts': ts, 'open': o, 'high': h, 'low': l, 'close': c, 'volume': v, 'quote_cum': quote}
+
+    # =========================================================
+    # 시계 / 주입
+    # =========================================================
+
+    def milliseconds(self) -> int:
+        return int(self.clock()) if self.clock else self._now_ms
+
+    def set_time(self, ms: int):
+        self._now_ms = int(ms)
+
+    def advance(self, ms: int):
+        self._now_ms += int(ms)
+
+    def fail_next(self, method: str, error=None, times: int = 1):
+        """다음 times번의 method 호출을 error(기본 NetworkError)로 실패시킨다"""
+        queue = self._failures.setdefault(method, [])
+        queue.extend([error or ccxt.NetworkError(f"[simulator] {method} 주입 오류")] * times)
+
+    def _latency(self) -> float:
+        if isinstance(self.latency_ms, (tuple, list)):
+            return self._rng.uniform(*self.latency_ms)
+        return float(self.latency_ms)
+
+    def _enter(self, method: str) -> dict:
+        """호출 공통 처리: 지연 → 예약/무작위 오류. 호출 기록을 돌려준다"""
+        record = {'method': method, 'start': time.perf_counter(), 'end': None, 'error': None}
+        self.calls.append(record)
+        delay = self._latency()
+        if delay > 0:
+            self.sleep(delay / 1000)
+        error = None
+        if self._failures.get(method):
+            error = self._failures[method].pop(0)
+        elif self.error_rate and self._rng.random() < self.error_rate:
+            error = ccxt.NetworkError(f"[simulator] {method} 무작위 오류")
+        if error is not None:
+            record['end'] = time.perf_counter()
+            record['error'] = type(error).__name__
+            raise error
+        return record
+
+    @staticmethod
+    def _leave(record: dict, result):
+        record['end'] = time.perf_counter()
+        return result
+
+    # =========================================================
+    # 마켓
+    # =========================================================
+
+    def _build_markets(self) -> dict:
+        markets = {}
+        for symbol, s in self._series.items():
+            base, quote = symbol.split('/')
+            price = float(np.median(s['close'])) if len(s['close']) else 1.0
+            # 가격 유효숫자 5자리, 수량은 1 USDT 미만 단위까지 표현되도록 정밀도 설정
+            price_tick = 10.0 ** (np.floor(np.log10(price)) - 4)
+            amount_tick = min(1.0, 10.0 ** np.floor(np.log10(0.01 / price)))
+            markets[symbol] = {
+                'id': f"{base}{quote}", 'symbol': symbol, 'base': base, 'quote': quote,
+                'baseId': base, 'quoteId': quote, 'type': 'spot', 'spot': True, 'active': True,
+                'precision': {'amount': float(amount_tick), 'price': float(price_tick)},
+                'limits': {'amount': {'min': float(amount_tick)}, 'cost': {'min': 1.0}},
+            }
+        return markets
+
+    def set_markets(self, markets, currencies=None):
+        self.markets = markets
+        self.symbols = sorted(markets)
+        self.currencies = currencies or {
+            code: {'code': code, 'id': code}
+            for m in markets.values() for code in (m['base'], m['quote'])
+        }
+        return markets
+
+    def load_markets(self, reload=False):
+        return self._leave(self._enter('load_markets'), self.markets)
+
+    def fetch_markets(self):
+        return self._leave(self._enter('fetch_markets'), list(self.markets.values()))
+
+    def metadata_cache(self) -> MarketMetadataCache:
+        """디스크에 쓰지 않는 MarketMetadataCache (MexcConnector(markets=...) 주입용)"""
+        cache = MarketMetadataCache(self.id)
+        cache.build(self, save=False)
+        return cache
+
+    # =========================================================
+    # 시세 / 호가
+    # =========================================================
+
+    def _index(self, symbol: str, now: int) -> int:
+        """now 시점에 시작된 마지막 캔들 인덱스 (상장 전이면 -1)"""
+        s = self._series.get(symbol)
+        if s is None:
+            raise ccxt.BadSymbol(f"[simulator] 없는 심볼: {symbol}")
+        return int(np.searchsorted(s['ts'], now, side='right')) - 1
+
+    def _price(self, symbol: str, now: int) -> float:
+        i = self._index(symbol, now)
+        if i < 0:
+            raise ccxt.BadSymbol(f"[simulator] {symbol} 데이터 시작 전 시각: {now}")
+        return float(self._series[symbol]['close'][i])
+
+    def _ticker(self, symbol: str, now: int):
+        s = self._series[symbol]
+        i = self._index(symbol, now)
+        if i < 0:
+            return None
+        lo = max(0, int(np.searchsorted(s['ts'], now - DAY_MS, side='right')))
+        last = float(s['close'][i])
+        open_ = float(s['open'][lo])
+        half_spread = last * self.spread_bps / 20_000
+        return {
+            'symbol': symbol,
+            'timestamp': now,
+            'datetime': ccxt.Exchange.iso8601(now),
+            'high': float(s['high'][lo:i + 1].max()),
+            'low': float(s['low'][lo:i + 1].min()),
+            'bid': last - half_spread,
+            'ask': last + half_spread,
+            'open': open_,
+            'close': last,
+            'last': last,
+            'change': last - open_,
+            'percentage': (last / open_ - 1) * 100 if open_ else None,
+            'baseVolume': float(s['volume'][lo:i + 1].sum()),
+            'quoteVolume': float(s['quote_cum'][i + 1] - s['quote_cum'][lo]),
+        }
+
+    def fetch_ticker(self, symbol, params=None):
+        record = self._enter('fetch_ticker')
+        ticker = self._ticker(symbol, self.milliseconds()) if symbol in self._series else None
+        if ticker is None:
+            record['end'] = time.perf_counter()
+            raise ccxt.BadSymbol(f"[simulator] 시세 없음: {symbol}")
+        return self._leave(record, ticker)
+
+    def fetch_tickers(self, symbols=None, params=None):
+        record = self._enter('fetch_tickers')
+        now = self.milliseconds()
+        tickers = {}
+        for symbol in symbols or self._series:
+            ticker = self._ticker(symbol, now)
+            if ticker is not None:
+                tickers[symbol] = ticker
+        return self._leave(record, tickers)
+
+    def _book(self, symbol: str, now: int) -> dict:
+        """last 기준 합성 호가 (레벨마다 depth_usdt 만큼의 수량, spread_bps 간격)"""
+        last = self._price(symbol, now)
+        step = last * self.spread_bps / 10_000
+        levels = np.arange(self.book_levels)
+        asks = last + step / 2 + step * levels
+        bids = last - step / 2 - step * levels
+        return {
+            'symbol': symbol,
+            'timestamp': now,
+            'datetime': ccxt.Exchange.iso8601(now),
+            'asks': [[float(p), self.depth_usdt / float(p)] for p in asks],
+            'bids': [[float(p), self.depth_usdt / float(p)] for p in bids if p > 0],
+            'nonce': None,
+        }
+
+    def fetch_order_book(self, symbol, limit=None, params=None):
+        record = self._enter('fetch_order_book')
+        book = self._book(symbol, self.milliseconds())
+        if limit:
+            book['asks'], book['bids'] = book['asks'][:limit], book['bids'][:limit]
+        return self._leave(record, book)
+
+    # =========================================================
+    # 계정 / 주문
+    # =========================================================
+
+    def fetch_balance(self, params=None):
+        record = self._enter('fetch_balance')
+        total = {code: float(amount) for code, amount in self.balances.items()}
+        balance = {'free': dict(total), 'used': {code: 0.0 for code in total}, 'total': total}
+        for code, amount in total.items():
+            balance[code] = {'free': amount, 'used': 0.0, 'total': amount}
+        return self._leave(record, balance)
+
+    @staticmethod
+    def _walk(levels, amount: float):
+        """호가를 따라 amount만큼 체결 → (체결 수량, 체결 금액)"""
+        filled = cost = 0.0
+        for price, size in levels:
+            take = min(size, amount - filled)
+            filled += take
+            cost += take * price
+            if filled >= amount:
+                break
+        return filled, cost
+
+    def create_order(self, symbol, type, side, amount, price=None, params=None):
+        record = self._enter('create_order')
+        now = self.milliseconds()
+        if type != 'market':
+            record['end'] = time.perf_counter()
+            raise ccxt.NotSupported(f"[simulator] 시장가 주문만 지원: {type}")
+        base, quote = symbol.split('/')
+        amount = float(amount)
+        book = self._book(symbol, now)
+
+        target = amount * self.partial_fill_ratio
+        filled, cost = self._walk(book['asks'] if side == 'buy' else book['bids'], target)
+        fee = cost * self.fee_rate
+        if side == 'buy':
+            if cost + fee > self.balances.get(quote, 0.0):
+                record['end'] = time.perf_counter()
+                raise ccxt.InsufficientFunds(f"[simulator] {quote} 잔고 부족")
+            self.balances[quote] = self.balances.get(quote, 0.0) - cost - fee
+            self.balances[base] = self.balances.get(base, 0.0) + filled
+        else:
+            if amount > self.balances.get(base, 0.0) + 1e-12:
+                record['end'] = time.perf_counter()
+                raise ccxt.InsufficientFunds(f"[simulator] {base} 잔고 부족")
+            self.balances[base] = self.balances.get(base, 0.0) - filled
+            self.balances[quote] = self.balances.get(quote, 0.0) + cost - fee
+
+        order_id = str(next(self._order_ids))
+        average = cost / filled if filled else None
+        order = {
+            'id': order_id,
+            'clientOrderId': None,
+            'timestamp': now,
+            'datetime': ccxt.Exchange.iso8601(now),
+            'symbol': symbol,
+            'type': type,
+            'side': side,
+            'price': average,
+            'average': average,
+            'amount': amount,
+            'filled': filled,
+            'remaining': amount - filled,
+            'cost': cost,
+            # 시장가 잔량은 남기지 않고 취소 처리 (부분 체결 = canceled + filled > 0)
+            'status': 'closed' if filled >= amount else 'canceled',
+            'fee': {'cost': fee, 'currency': quote},
+            'trades': [],
+        }
+        if filled:
+            trade = {
+                'id': order_id, 'order': order_id, 'timestamp': now, 'datetime': order['datetime'],
+                'symbol': symbol, 'type': type, 'side': side, 'takerOrMaker': 'taker',
+                'price': average, 'amount': filled, 'cost': cost, 'fee': dict(order['fee']),
+            }
+            order['trades'].append(trade)
+            self.trades.append(trade)
+        self.orders[order_id] = order
+        return self._leave(record, order)
+
+    def fetch_order(self, id, symbol=None, params=None):
+        record = self._enter('fetch_order')
+        if id not in self.orders:
+            record['end'] = time.perf_counter()
+            raise ccxt.OrderNotFound(f"[simulator] 주문 없음: {id}")
+        return self._leave(record, self.orders[id])
+
+    def fetch_my_trades(self, symbol=None, since=None, limit=None, params=None):
+        record = self._enter('fetch_my_trades')
+        trades = [t for t in self.trades
+                  if (symbol is None or t['symbol'] == symbol) and (since is None or t['timestamp'] >= since)]
+        return self._leave(record, trades[-limit:] if limit else trades)
+
+    # =========================================================
+    # 측정
+    # =========================================================
+
+    def call_stats(self) -> dict:
+        """메서드별 호출 수 / 오류 수 / 지연(ms) 평균·최대"""
+        stats = {}
+        for call in self.calls:
+            s = stats.setdefault(call['method'], {'count': 0, 'errors': 0, 'latencies': []})
+            s['count'] += 1
+            s['errors'] += call['error'] is not None
+            if call['end'] is not None:
+                s['latencies'].append((call['end'] - call['start']) * 1000)
+        for s in stats.values():
+            latencies = s.pop('latencies')
+            s['mean_ms'] = round(sum(latencies) / len(latencies), 3) if latencies else None
+            s['max_ms'] = round(max(latencies), 3) if latencies else None
+        return stats
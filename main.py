@@ -1,17 +1,23 @@
 import os
 import sys
+import time
 import atexit
+import asyncio
 from datetime import datetime, timedelta
-from dotenv import load_dotenv
-from telegram.ext import Application
-from exchange.mexc import MexcConnector
-from utils.telegram_bot import CasinoBot
-from core.scheduler_engine import CasinoScheduler
-from utils.logger import logger
-import core.config as config
 
-# 환경변수 로드
-load_dotenv()
+_boot_started = time.perf_counter()
+
+import core.config as config  # noqa: E402
+
+# 환경변수 로드 (환경변수를 읽는 모듈을 import하기 전에 한 번만)
+config.load_env()
+
+from exchange.mexc import MexcConnector  # noqa: E402
+from exchange.market_cache import MARKET_METADATA_REFRESH_SECONDS  # noqa: E402
+from utils.telegram_bot import CasinoBot  # noqa: E402
+from core.scheduler_engine import CasinoScheduler  # noqa: E402
+from core.recovery import reconcile  # noqa: E402
+from utils.logger import logger  # noqa: E402
 
 # 전역 변수
 mexc = None
@@ -126,29 +132,18 @@ def _seconds_until_first_trade_start() -> int:
         return 0
     return int((start_at - now).total_seconds())
 
-async def on_startup(application):
-    """봇 시작 시 실행: Job 등록, 복구 및 동기화"""
-    global mexc, bot, casino
-    
-    logger.info("🤖 텔레그램 봇 시작 (Post-Init)...")
-    
-    # 잔고 조회
-    balance, free = mexc.get_balance()
-    logger.info(f"💰 MEXC 잔고: {balance} USDT (Free: {free} USDT)")
-    
-    chat_id = os.getenv("TELEGRAM_CHAT_ID")
-    
-    # ========================================
-    # 🔄 상태 복구 로직 (봇 상태만 신뢰)
-    # ========================================
-    
+async def _refresh_markets_job(context):
+    """마켓 메타데이터 주기 갱신 (포지션 보유 중에도 캐시가 만료되지 않도록)"""
+    await asyncio.to_thread(mexc.refresh_markets)
+
+
+def _recovery_status(status_msg):
+    """복구 후 상태 요약 메시지 추가 (활성 베팅 / 선택 대기 / 포지션 없음)"""
     active_bet = casino.state.get_active_bet()
     pending = casino.state.get_pending_selection()
     
-    status_msg = []
-    
     if active_bet:
-        # 진행 중인 포지션이 있음
+        # 진행 중인 포지션이 있음 (청산 감시 Job이 이어서 관리)
         logger.info(f"🔄 [복구] 기존 포지션 감지: {active_bet['symbol']}")
         entry_time_str = active_bet.get('entry_time', 'N/A')
         entry_price = active_bet.get('entry_price', 0)
@@ -156,31 +151,18 @@ async def on_startup(application):
         # 청산 예정 시간 체크
         try:
             entry_time = datetime.strptime(entry_time_str, "%Y-%m-%d %H:%M:%S")
-            exit_time = entry_time + config.CYCLE_DELTA - timedelta(seconds=config.EARLY_EXIT_SECONDS)
+            exit_time = casino.strategy.expires_at(entry_time)
             now = datetime.now()
             
             if now >= exit_time:
-                # 이미 청산 시간이 지났음 - 즉시 청산!
+                # 이미 청산 시간이 지났음 - 복구 직후 청산 감시 실행에서 매도
                 logger.warning(f"⚠️ [복구] 청산 시간 경과 감지! (Entry: {entry_time_str}, Exit: {exit_time})")
-                logger.info(f"🗑️ 즉시 청산 실행: {active_bet['symbol']}")
-                
-                # 현재가 조회
-                current_price = mexc.get_ticker(active_bet['symbol'])
-                if not current_price:
-                    logger.error(f"❌ 시세 조회 실패. 진입가 기준으로 청산 처리.")
-                    current_price = entry_price
-                
-                result = casino.state.clear_active_bet(current_price, reason="recovery_timeout")
-                pnl = result['pnl_percent']
-                emoji = "🎉" if pnl > 0 else "💧"
-                
                 status_msg.append(
                     f"⚠️ **[청산 시간 경과]**\n"
                     f"Symbol: {active_bet['symbol']}\n"
-                    f"{emoji} PNL: {pnl:+.2f}%\n"
                     f"Entry: ${entry_price}\n"
-                    f"Exit: ${current_price}\n"
-                    f"→ 재시작 시 즉시 청산 완료"
+                    f"Time: {entry_time_str}\n"
+                    f"→ 청산 감시 첫 실행에서 즉시 청산"
                 )
             else:
                 # 아직 청산 시간 전 - 정상 복구
@@ -212,84 +194,134 @@ async def on_startup(application):
         # 포지션 없음 (정상)
         logger.info("✅ [정상] 포지션 없음")
         status_msg.append("💤 포지션 없음 (정상)")
+    return status_msg
+
+
+def _schedule_jobs(job_queue, chat_id):
+    """베팅 / 마켓 갱신 Job 등록 → 다음 베팅 시각"""
+    logger.info(f"🕐 [Scheduler] JobQueue 등록 중... (Cycle: {config.CYCLE_STRING})")
+
+    # 1. 베팅 작업
+    # - 시작 시각 전: FIRST_TRADE_START_AT까지 대기
+    # - 시작 시각 후: 분 주기는 절대시각 경계 정렬, 시간 주기는 즉시 시작
+    wait_until_start = _seconds_until_first_trade_start()
+    if wait_until_start > 0:
+        first_bet_in = wait_until_start
+    elif config.CYCLE_MINUTES > 0:
+        first_bet_in = _seconds_until_next_minute_boundary(config.CYCLE_MINUTES)
+    else:
+        first_bet_in = 0
+
+    next_bet_at = datetime.now() + timedelta(seconds=first_bet_in)
+    first_bet_in_human = _format_duration_ko(first_bet_in)
+    logger.info(
+        f"🕐 [Scheduler] 첫 베팅 실행까지 {first_bet_in_human} "
+        f"(다음 실행 시각: {next_bet_at.strftime('%H:%M:%S')})"
+    )
+
+    job_queue.run_repeating(
+        casino.job_daily_bet_callback, 
+        interval=config.CYCLE_SECONDS, 
+        first=first_bet_in,
+        data=chat_id,
+        chat_id=chat_id,
+        name="daily_bet"
+    )
+    
+    # 2. 마켓 메타데이터 갱신 (베팅 Job은 활성 베팅 중엔 갱신 전에 리턴하므로 별도 주기)
+    job_queue.run_repeating(
+        _refresh_markets_job,
+        interval=MARKET_METADATA_REFRESH_SECONDS,
+        first=MARKET_METADATA_REFRESH_SECONDS,
+        name="refresh_markets"
+    )
     
+    logger.info(f"✅ [Scheduler] Job 등록 완료")
+    return next_bet_at
+
+
+async def _boot(context):
+    """JobQueue 시작 직후 실행: 복구 → 베팅 Job 등록 → 마켓 갱신/잔고 조회 → 부팅 알림
+
+    복구는 상태 잠금을 잡고 돌아 청산 감시 첫 실행(5초 뒤)과 겹치면 감시가 복구를
+    기다린다. 베팅 Job은 복구가 끝난 뒤에 등록해 복구 전 상태로 진입하지 않는다.
+    네트워크 호출은 모두 to_thread로 이벤트 루프 밖에서 한다.
+    """
+    chat_id = context.job.chat_id
+
+    # ========================================
+    # 🔄 상태 복구 로직 (주문 의도 기준으로 거래소와 대조)
     # ========================================
-    # 🕐 JobQueue 등록
+    async with casino.state_lock:
+        status_msg = _recovery_status(await reconcile(mexc, casino.state))
+    logger.info(f"🔄 [Boot] 복구 완료 (부팅 후 {time.perf_counter() - _boot_started:.2f}초)")
+
+    next_bet_at = _schedule_jobs(context.job_queue, chat_id)
+
     # ========================================
+    # 📢 부팅 알림 (비필수 네트워크 호출)
+    # ========================================
+    # 카탈로그가 없거나 만료면 재다운로드(수 초)가 있을 수 있어 이벤트 루프 밖에서 실행
+    await asyncio.to_thread(mexc.refresh_markets)
+
+    balance, free = await asyncio.to_thread(mexc.get_balance)
+    logger.info(f"💰 MEXC 잔고: {balance} USDT (Free: {free} USDT)")
+
+    boot_msg = (
+        f"🎰 **Boracay Casino System Online**\n\n"
+        f"🚦 Mode: {config.MODE_STRING}\n"
+        f"💰 Balance: {free:.2f} USDT\n"
+        f"🕐 Cycle: {config.CYCLE_STRING}\n"
+        f"⏱️ Early Exit: {config.EARLY_EXIT_SECONDS}초\n"
+        f"🛑 Stop Loss: {config.STOP_LOSS_THRESHOLD}%\n"
+        f"🎯 TS Activation: +{config.TS_ACTIVATION_REWARD}%\n"
+        f"📉 TS Callback: {config.TS_CALLBACK_RATE}%\n"
+        f"🔍 Check Interval: {config.CHECK_INTERVAL}초\n"
+        f"🕛 First Start: {config.FIRST_TRADE_START_AT}"
+    )
+
+    boot_msg += f"\n⏭️ Next Bet: {next_bet_at.strftime('%Y-%m-%d %H:%M:%S')}"
+
+    if status_msg:
+        boot_msg += "\n\n" + "\n".join(status_msg)
+
+    await context.bot.send_message(
+        chat_id=chat_id,
+        text=boot_msg,
+        parse_mode="Markdown"
+    )
+    logger.info(f"📢 [Boot] 부팅 알림 전송 (부팅 후 {time.perf_counter() - _boot_started:.2f}초)")
+
+
+async def on_startup(application):
+    """봇 시작 시 실행: 청산 감시 Job + 부팅 Job 등록만 하고 바로 반환
+
+    post_init이 끝나야 JobQueue가 돌기 시작하므로 여기서는 네트워크 호출을 하지 않는다.
+    복구/베팅 Job 등록/부팅 알림은 _boot Job이 JobQueue 시작 직후 이어서 한다.
+    """
+    global mexc, bot, casino
+    
+    logger.info("🤖 텔레그램 봇 시작 (Post-Init)...")
     
+    chat_id = os.getenv("TELEGRAM_CHAT_ID")
     job_queue = application.job_queue
     
-    if job_queue and chat_id:
-        logger.info(f"🕐 [Scheduler] JobQueue 등록 중... (Cycle: {config.CYCLE_STRING})")
-
-        # 1. 베팅 작업
-        # - 시작 시각 전: FIRST_TRADE_START_AT까지 대기
-        # - 시작 시각 후: 분 주기는 절대시각 경계 정렬, 시간 주기는 즉시 시작
-        wait_until_start = _seconds_until_first_trade_start()
-        if wait_until_start > 0:
-            first_bet_in = wait_until_start
-        elif config.CYCLE_MINUTES > 0:
-            first_bet_in = _seconds_until_next_minute_boundary(config.CYCLE_MINUTES)
-        else:
-            first_bet_in = 0
-
-        next_bet_at = datetime.now() + timedelta(seconds=first_bet_in)
-        first_bet_in_human = _format_duration_ko(first_bet_in)
-        logger.info(
-            f"🕐 [Scheduler] 첫 베팅 실행까지 {first_bet_in_human} "
-            f"(다음 실행 시각: {next_bet_at.strftime('%H:%M:%S')})"
-        )
-
-        job_queue.run_repeating(
-            casino.job_daily_bet_callback, 
-            interval=config.CYCLE_SECONDS, 
-            first=first_bet_in,
-            data=chat_id,
-            chat_id=chat_id,
-            name="daily_bet"
-        )
-        
-        # 2. 상태 체크 작업 (5분 간격, 5초 뒤 시작)
-        job_queue.run_repeating(
-            casino.check_48h_exit_callback, 
-            interval=config.CHECK_INTERVAL, 
-            first=5, 
-            data=chat_id,
-            chat_id=chat_id,
-            name="check_exit"
-        )
-        logger.info(f"✅ [Scheduler] Job 등록 완료")
-        
-        # ========================================
-        # 📢 부팅 알림
-        # ========================================
-        
-        boot_msg = (
-            f"🎰 **Boracay Casino System Online**\n\n"
-            f"🚦 Mode: {config.MODE_STRING}\n"
-            f"💰 Balance: {free:.2f} USDT\n"
-            f"🕐 Cycle: {config.CYCLE_STRING}\n"
-            f"⏱️ Early Exit: {config.EARLY_EXIT_SECONDS}초\n"
-            f"🛑 Stop Loss: {config.STOP_LOSS_THRESHOLD}%\n"
-            f"🎯 TS Activation: +{config.TS_ACTIVATION_REWARD}%\n"
-            f"📉 TS Callback: {config.TS_CALLBACK_RATE}%\n"
-            f"🔍 Check Interval: {config.CHECK_INTERVAL}초\n"
-            f"🕛 First Start: {config.FIRST_TRADE_START_AT}"
-        )
-
-        boot_msg += f"\n⏭️ Next Bet: {next_bet_at.strftime('%Y-%m-%d %H:%M:%S')}"
-        
-        if status_msg:
-            boot_msg += "\n\n" + "\n".join(status_msg)
-        
-        await application.bot.send_message(
-            chat_id=chat_id, 
-            text=boot_msg,
-            parse_mode="Markdown"
-        )
-        
-    else:
+    if not (job_queue and chat_id):
         logger.error("❌ [Scheduler] JobQueue를 사용할 수 없거나 CHAT_ID가 없습니다.")
+        return
+
+    # 상태 체크 작업 (5분 간격, 5초 뒤 시작) - 다른 어떤 조회보다 먼저 등록
+    job_queue.run_repeating(
+        casino.check_48h_exit_callback, 
+        interval=config.CHECK_INTERVAL, 
+        first=5, 
+        data=chat_id,
+        chat_id=chat_id,
+        name="check_exit"
+    )
+    logger.info(f"🛡️ [Scheduler] 청산 감시 Job 등록 (부팅 후 {time.perf_counter() - _boot_started:.2f}초)")
+
+    job_queue.run_once(_boot, when=0, chat_id=chat_id, name="boot")
 
 def main():
     global mexc, bot, casino
@@ -5,12 +5,13 @@
 사용법:
     python run_backtest.py BTC/USDT 2024-01-01 2024-12-31
     python run_backtest.py ETH/USDT 2024-06-01 2024-12-31 --cycles 48,72,96
+    python run_backtest.py ETH/USDT 2024-06-01 2024-12-31 --base-timeframe 1m --interval 1m
 """
 
 import sys
 import argparse
 from tests.backtester import run_multi_cycle_backtest, print_summary_report, BacktestConfig
-import json
+from tests.trade_log import save_result, trade_log_path
 from datetime import datetime
 
 
@@ -22,6 +23,13 @@ def main():
     parser.add_argument('--cycles', help='테스트할 주기 (시간, 쉼표 구분)', default='48,72,96')
     parser.add_argument('--output', '-o', help='출력 파일 경로', default=None)
     parser.add_argument('--scanner', action='store_true', help='스캐너 모드 (매 사이클 랜덤 선택)')
+    parser.add_argument('--base-timeframe', help='캐시에 받아둘 기준 타임프레임 (예: 1m, 5m)',
+                        default=BacktestConfig.BASE_TIMEFRAME)
+    parser.add_argument('--interval', help='청산 체크 주기 (기준 타임프레임의 배수, 예: 5m, 15m, 1h)',
+                        default=BacktestConfig.CHECK_INTERVAL)
+    parser.add_argument('--intrabar', help='애매한 봉 판정 모드 (ohlc, direction, drilldown, sampled)',
+                        default=BacktestConfig.INTRABAR_MODE)
+    parser.add_argument('--no-cache', action='store_true', help='결과 캐시를 쓰지 않고 다시 시뮬레이션')
     
     args = parser.parse_args()
     
@@ -30,6 +38,9 @@ def main():
     
     # 주기 설정
     BacktestConfig.TEST_CYCLES = [int(c.strip()) for c in args.cycles.split(',')]
+    BacktestConfig.BASE_TIMEFRAME = args.base_timeframe
+    BacktestConfig.CHECK_INTERVAL = args.interval
+    BacktestConfig.INTRABAR_MODE = args.intrabar
     
     print(f"\n🎰 Boracay Casino Backtest Engine")
     print(f"{'='*80}")
@@ -39,6 +50,7 @@ def main():
         print(f"  Symbol: {args.symbol}")
     print(f"  Period: {args.start_date} ~ {args.end_date}")
     print(f"  Cycles: {BacktestConfig.TEST_CYCLES}")
+    print(f"  Interval: {BacktestConfig.CHECK_INTERVAL} (base {BacktestConfig.BASE_TIMEFRAME}, intrabar {BacktestConfig.INTRABAR_MODE})")
     print(f"{'='*80}\n")
     
     # 백테스트 실행
@@ -47,7 +59,8 @@ def main():
             args.symbol, 
             args.start_date, 
             args.end_date,
-            use_scanner=use_scanner
+            use_scanner=use_scanner,
+            use_cache=not args.no_cache
         )
         print_summary_report(summary)
         
@@ -58,10 +71,9 @@ def main():
             mode_str = 'scanner' if use_scanner else args.symbol.replace('/', '_')
             output_file = f"backtest_{mode_str}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
         
-        with open(output_file, 'w', encoding='utf-8') as f:
-            json.dump(summary, f, indent=2, ensure_ascii=False)
+        save_result(output_file, summary)
         
-        print(f"💾 결과 저장: {output_file}")
+        print(f"💾 결과 저장: {output_file} (거래 로그: {trade_log_path(output_file)})")
         
     except Exception as e:
         print(f"\n❌ 백테스트 실행 실패: {e}")
@@ -4,12 +4,19 @@
 실전 트레일링 스탑 전략과 100% 동기화된 백테스트 엔진.
 """
 
-import ccxt
 import pandas as pd
-from datetime import datetime, timedelta
-from typing import List, Dict, Tuple
+from datetime import datetime, timedelta, timezone
+from typing import Tuple
 import json
 
+from core.strategy import Position, TrailingStopStrategy
+from exchange.rate_limiter import request_scheduler
+from exchange.factory import get_exchange
+from tests.candle_store import OhlcvDownloader, timeframe_ms
+from tests.intrabar import make_resolver
+from tests.trade_log import TradeStore, save_result
+from tests.result_cache import ResultCache, data_fingerprint
+
 
 class BacktestConfig:
     """백테스트 설정"""
@@ -26,71 +33,15 @@ class BacktestConfig:
     TRADING_FEE_PERCENT = 0.3  # 진입/청산 각 0.15%, 총 0.3%
     
     # 데이터 설정
-    TIMEFRAME = '5m'
+    BASE_TIMEFRAME = '5m'  # 캐시에 저장하는 최소 단위 ('1m'로 받아두면 1분 체크도 시뮬레이션 가능)
+    CHECK_INTERVAL = '5m'  # 청산 체크 주기. BASE_TIMEFRAME의 배수면 재다운로드 없이 리샘플링
+    INTRABAR_MODE = 'ohlc'  # 애매한 봉 판정: ohlc(기존) / direction / drilldown(1분봉 캐시) / sampled
+    MIN_DATA_COVERAGE = 95.0  # 구간 내 캔들 커버리지(%)가 이보다 낮으면 시뮬레이션 거부
     
     # 테스트할 주기들 (시간 단위)
     TEST_CYCLES = [48, 72, 96]
 
 
-class Position:
-    """포지션 상태"""
-    def __init__(self, symbol: str, entry_price: float, amount_usdt: float, entry_time: datetime):
-        self.symbol = symbol
-        self.entry_price = entry_price
-        self.amount_usdt = amount_usdt
-        self.entry_time = entry_time
-        
-        # 트레일링 스탑 상태
-        self.is_ts_active = False
-        self.peak_price = None
-        
-    def activate_trailing_stop(self, peak_price: float):
-        """트레일링 스탑 활성화"""
-        self.is_ts_active = True
-        self.peak_price = peak_price
-        
-    def update_peak_price(self, new_peak: float):
-        """최고가 갱신"""
-        if self.is_ts_active and new_peak > self.peak_price:
-            self.peak_price = new_peak
-            
-    def get_pnl_percent(self, current_price: float) -> float:
-        """현재 수익률 계산"""
-        return ((current_price - self.entry_price) / self.entry_price) * 100
-
-
-class Trade:
-    """거래 기록"""
-    def __init__(self, symbol: str, entry_price: float, exit_price: float,
-                 entry_time: datetime, exit_time: datetime, 
-                 amount_usdt: float, pnl_percent: float, exit_reason: str):
-        self.symbol = symbol
-        self.entry_price = entry_price
-        self.exit_price = exit_price
-        self.entry_time = entry_time
-        self.exit_time = exit_time
-        self.amount_usdt = amount_usdt
-        self.pnl_percent = pnl_percent
-        self.exit_reason = exit_reason
-        
-        # 거래 비용 적용한 실제 손익
-        self.net_pnl_usdt = amount_usdt * (pnl_percent / 100) * (1 - BacktestConfig.TRADING_FEE_PERCENT / 100)
-        
-    def to_dict(self) -> dict:
-        return {
-            'symbol': self.symbol,
-            'entry_price': self.entry_price,
-            'exit_price': self.exit_price,
-            'entry_time': self.entry_time.strftime('%Y-%m-%d %H:%M:%S'),
-            'exit_time': self.exit_time.strftime('%Y-%m-%d %H:%M:%S'),
-            'duration_hours': (self.exit_time - self.entry_time).total_seconds() / 3600,
-            'amount_usdt': self.amount_usdt,
-            'pnl_percent': round(self.pnl_percent, 2),
-            'net_pnl_usdt': round(self.net_pnl_usdt, 2),
-            'exit_reason': self.exit_reason
-        }
-
-
 class BacktestEngine:
     """백테스트 엔진"""
     
@@ -98,15 +49,27 @@ class BacktestEngine:
         self.cycle_hours = cycle_hours
         self.use_scanner = use_scanner  # 스캐너 사용 여부
         self.balance = BacktestConfig.INITIAL_BALANCE
-        self.peak_balance = BacktestConfig.INITIAL_BALANCE
         self.position: Position = None
-        self.trades: List[Trade] = []
-        self.bankruptcy_point = None
+        self.trades = TradeStore(BacktestConfig.TRADING_FEE_PERCENT)  # 거래 기록 (구조화 배열)
+        self.data_coverage = {}  # 심볼별 캔들 커버리지(%)
+        self.intrabar = make_resolver(
+            BacktestConfig.INTRABAR_MODE,
+            BacktestConfig.STOP_LOSS_THRESHOLD,
+            BacktestConfig.TS_ACTIVATION_REWARD,
+            BacktestConfig.TS_CALLBACK_RATE,
+            timeframe_ms(BacktestConfig.CHECK_INTERVAL),
+        )
+        self.strategy = TrailingStopStrategy(
+            BacktestConfig.STOP_LOSS_THRESHOLD,
+            BacktestConfig.TS_ACTIVATION_REWARD,
+            BacktestConfig.TS_CALLBACK_RATE,
+            timedelta(hours=cycle_hours),
+        )
+        self.exit_price = None  # 청산 판정이 난 봉의 체결가
         
         # 스캐너 사용 시 MEXC 커넥터 초기화
         if use_scanner:
-            import ccxt
-            self.exchange = ccxt.mexc({'enableRateLimit': True})
+            self.exchange = get_exchange('mexc')
         else:
             self.exchange = None
         
@@ -114,7 +77,7 @@ class BacktestEngine:
         """스캐너로 랜덤 코인 선정 (실전과 동일)"""
         try:
             # 1. 전체 티커 조회
-            tickers = self.exchange.fetch_tickers()
+            tickers = request_scheduler.call(self.exchange, "backtest", "fetch_tickers")
             
             # 2. 필터링 (scanner.py와 동일한 로직)
             candidates = []
@@ -170,113 +133,103 @@ class BacktestEngine:
             return None
     
     def fetch_historical_data(self, symbol: str, start_date: str, end_date: str) -> pd.DataFrame:
-        """MEXC에서 과거 5분봉 데이터 조회"""
-        exchange = ccxt.mexc({'enableRateLimit': True})
+        """MEXC 과거 캔들 조회 (로컬 캔들 캐시 + 샤드 동시 다운로드, CHECK_INTERVAL로 리샘플링)"""
+        exchange = get_exchange('mexc')
         
         since = exchange.parse8601(f"{start_date}T00:00:00Z")
         end = exchange.parse8601(f"{end_date}T23:59:59Z")
         
-        all_candles = []
-        current = since
-        
         print(f"📊 [{symbol}] 데이터 다운로드 중... ({start_date} ~ {end_date})")
         print(f"  - Since timestamp: {since}")
         print(f"  - End timestamp: {end}")
         
-        error_count = 0
-        max_errors = 3
+        downloader = OhlcvDownloader('mexc', BacktestConfig.BASE_TIMEFRAME)
+        result = downloader.run([symbol], since, end)[symbol]
+        if result.get('failed_shards'):
+            print(f"⚠️ 실패한 샤드 {result['failed_shards']}개. 수집된 데이터로 진행...")
         
-        while current < end:
-            try:
-                candles = exchange.fetch_ohlcv(symbol, BacktestConfig.TIMEFRAME, since=current, limit=1000)
-                
-                if not candles:
-                    print(f"  - 더 이상 데이터 없음 (current: {current})")
-                    break
-                
-                all_candles.extend(candles)
-                current = candles[-1][0] + 1
-                
-                if len(all_candles) % 5000 == 0:
-                    print(f"  - {len(all_candles)} candles...")
-                
-                # 에러 카운트 리셋
-                error_count = 0
-                    
-            except Exception as e:
-                error_count += 1
-                print(f"❌ 데이터 조회 실패 ({error_count}/{max_errors}): {e}")
-                
-                if error_count >= max_errors:
-                    print(f"⚠️ 최대 에러 횟수 도달. 수집된 데이터로 진행...")
-                    break
-                
-                # 재시도 전 대기
-                import time
-                time.sleep(2)
+        self._check_data_coverage(downloader.cache, 'mexc', symbol, since, end)
         
-        if not all_candles:
+        df = downloader.cache.load_frame('mexc', symbol, BacktestConfig.BASE_TIMEFRAME, since, end,
+                                            interval=BacktestConfig.CHECK_INTERVAL)
+        if df.empty:
             raise ValueError(f"데이터 조회 실패: {symbol}. 수집된 캔들 없음.")
         
-        print(f"  - 총 수집: {len(all_candles)} candles")
-        
-        df = pd.DataFrame(all_candles, columns=['timestamp', 'open', 'high', 'low', 'close', 'volume'])
-        df['datetime'] = pd.to_datetime(df['timestamp'], unit='ms')
+        print(f"  - 총 수집: {len(df)} candles (신규 {result['candles']})")
         
         # 날짜 필터링
         df = df[(df['datetime'] >= start_date) & (df['datetime'] <= end_date)]
         
-        print(f"✅ [{symbol}] {len(df)} candles 로드 완료 (날짜 필터링 후)")
+        print(f"✅ [{symbol}] {len(df)} candles ({BacktestConfig.CHECK_INTERVAL}) 로드 완료 (날짜 필터링 후)")
         
         if len(df) == 0:
             raise ValueError(f"날짜 범위 내 데이터 없음: {start_date} ~ {end_date}")
         
+        self.intrabar.prepare('mexc', symbol, df)
         return df
     
-    def check_exit_conditions(self, candle: pd.Series) -> Tuple[bool, str]:
-        """청산 조건 체크 (High/Low 기준)"""
+    def _check_data_coverage(self, cache, exchange_id: str, symbol: str, since: int, end: int):
+        """캔들 커버리지 확인: 기준 미달이면 시뮬레이션 전에 거부, 누락 구간은 경고"""
+        end = min(end + 1, int(datetime.now().timestamp() * 1000))
+        report = cache.coverage_report(exchange_id, symbol, BacktestConfig.BASE_TIMEFRAME, since, end)
+        self.data_coverage[symbol] = report['coverage_percent']
+        
+        if report['coverage_percent'] < BacktestConfig.MIN_DATA_COVERAGE:
+            raise ValueError(
+                f"데이터 불완전: {symbol} 커버리지 {report['coverage_percent']}% "
+                f"< {BacktestConfig.MIN_DATA_COVERAGE}% (누락 {report['missing_candles']} candles)"
+            )
+        if report['gaps']:
+            print(f"  ⚠️ 누락 구간 {len(report['gaps'])}개 ({report['missing_candles']} candles, "
+                  f"커버리지 {report['coverage_percent']}%)")
+    
+    def check_exit_conditions(self, candle) -> Tuple[bool, str]:
+        """청산 조건 체크 (전략 상태 머신, 애매한 봉은 INTRABAR_MODE 경로로 판정)"""
         if not self.position:
             return False, None
         
-        high = candle['high']
-        low = candle['low']
-        close = candle['close']
+        self.exit_price = None
         current_time = candle['datetime']
         
-        # 1. 손절 체크 (Low 기준)
-        pnl_at_low = self.position.get_pnl_percent(low)
-        if pnl_at_low <= BacktestConfig.STOP_LOSS_THRESHOLD:
-            return True, 'stop_loss'
-        
-        # 2. 트레일링 활성화 체크 (High 기준)
-        pnl_at_high = self.position.get_pnl_percent(high)
-        if not self.position.is_ts_active and pnl_at_high >= BacktestConfig.TS_ACTIVATION_REWARD:
-            self.position.activate_trailing_stop(high)
-        
-        # 3. 트레일링 스탑 로직
-        if self.position.is_ts_active:
-            # 최고가 갱신
-            self.position.update_peak_price(high)
-            
-            # 익절 조건: Low가 peak 대비 10% 하락
-            callback_threshold = self.position.peak_price * (1 - BacktestConfig.TS_CALLBACK_RATE / 100)
-            if low <= callback_threshold:
-                return True, 'trailing_stop'
-        
-        # 4. 타임아웃 체크
-        elapsed = current_time - self.position.entry_time
-        if elapsed >= timedelta(hours=self.cycle_hours):
+        resolved = self.intrabar.resolve(self.position.symbol, candle, self.position)
+        if resolved is None:
+            action = self.strategy.on_price(self.position, candle['high'], candle['low'], candle['close'],
+                                            current_time)
+            if action is None or action.exit_reason is None:
+                return False, None
+            self.exit_price = action.exit_price
+            return True, action.exit_reason
+        
+        exit_reason = self._apply_intrabar_result(resolved)
+        if exit_reason:
+            return True, exit_reason
+        if self.strategy.is_expired(self.position, current_time):
+            self.exit_price = candle['close']
             return True, 'timeout'
-        
         return False, None
     
+    def _apply_intrabar_result(self, resolved) -> str:
+        """경로 판정 결과를 포지션 상태에 반영"""
+        exit_reason, exit_price, is_ts_active, peak_price = resolved
+        if is_ts_active and not self.position.is_ts_active:
+            self.position.activate_trailing_stop(peak_price)
+        elif is_ts_active:
+            self.position.update_peak_price(peak_price)
+        if exit_reason:
+            self.exit_price = exit_price
+        return exit_reason
+    
+    def get_exit_price(self, candle, exit_reason: str) -> float:
+        """청산 가격 결정 (check_exit_conditions가 정한 체결가)"""
+        return self.exit_price
+    
     def execute_entry(self, symbol: str, entry_price: float, entry_time: datetime) -> bool:
         """진입 실행"""
         if self.balance < BacktestConfig.BET_AMOUNT:
             # 잔고 부족해도 계속 진행 (마이너스 잔고 허용)
             pass
         
-        self.position = Position(symbol, entry_price, BacktestConfig.BET_AMOUNT, entry_time)
+        self.position = self.strategy.open(symbol, entry_price, BacktestConfig.BET_AMOUNT, entry_time)
         return True
     
     def execute_exit(self, exit_price: float, exit_time: datetime, exit_reason: str):
@@ -284,35 +237,12 @@ class BacktestEngine:
         if not self.position:
             return
         
-        pnl_percent = self.position.get_pnl_percent(exit_price)
-        
-        trade = Trade(
-            symbol=self.position.symbol,
-            entry_price=self.position.entry_price,
-            exit_price=exit_price,
-            entry_time=self.position.entry_time,
-            exit_time=exit_time,
-            amount_usdt=self.position.amount_usdt,
-            pnl_percent=pnl_percent,
-            exit_reason=exit_reason
+        # 거래 기록 + 잔고 업데이트 (최고 잔고/파산 지점은 리포트에서 배열로 계산)
+        self.balance += self.trades.append(
+            self.position.symbol, self.position.entry_price, exit_price,
+            self.position.entry_time, exit_time, self.position.amount_usdt,
+            self.position.get_pnl_percent(exit_price), exit_reason,
         )
-        
-        # 잔고 업데이트
-        self.balance += trade.net_pnl_usdt
-        
-        # 최고 잔고 갱신
-        if self.balance > self.peak_balance:
-            self.peak_balance = self.balance
-        
-        # 파산 지점 기록 (최초 1회만)
-        if self.balance < BacktestConfig.BET_AMOUNT and self.bankruptcy_point is None:
-            self.bankruptcy_point = {
-                'time': exit_time,
-                'balance': self.balance,
-                'trade_count': len(self.trades) + 1
-            }
-        
-        self.trades.append(trade)
         self.position = None
     
     def run_simulation(self, symbol: str, start_date: str, end_date: str):
@@ -334,37 +264,31 @@ class BacktestEngine:
             self._run_simulation_with_scanner(start_date, end_date)
     
     def _run_simulation_with_data(self, symbol: str, df: pd.DataFrame):
-        """단일 심볼로 시뮬레이션 (기존 방식)"""
-        for idx, candle in df.iterrows():
-            current_time = candle['datetime']
+        """단일 심볼로 시뮬레이션 (봉 배열을 순회하며 전략 상태 머신 구동)"""
+        timestamps = df['timestamp'].tolist()
+        opens, highs, lows, closes = (df[col].tolist() for col in ('open', 'high', 'low', 'close'))
+        times = pd.DatetimeIndex(df['datetime']).to_pydatetime()
+        last_entry_time = times[-1] - timedelta(hours=self.cycle_hours)  # 마지막 주기 시간 확보
+        
+        for i in range(len(times)):
+            current_time = times[i]
             
             # 포지션 있으면 청산 조건 체크
             if self.position:
+                candle = {'timestamp': timestamps[i], 'open': opens[i], 'high': highs[i],
+                          'low': lows[i], 'close': closes[i], 'datetime': current_time}
                 should_exit, exit_reason = self.check_exit_conditions(candle)
                 
                 if should_exit:
-                    # 청산 가격 결정
-                    if exit_reason == 'stop_loss':
-                        exit_price = candle['low']  # Low에서 손절
-                    elif exit_reason == 'trailing_stop':
-                        exit_price = self.position.peak_price * (1 - BacktestConfig.TS_CALLBACK_RATE / 100)
-                    else:  # timeout
-                        exit_price = candle['close']
-                    
-                    self.execute_exit(exit_price, current_time, exit_reason)
+                    self.execute_exit(self.exit_price, current_time, exit_reason)
             
-            # 포지션 없고 충분한 시간 남았으면 진입
-            else:
-                # 마지막 주기 시간 확보
-                remaining_time = df['datetime'].iloc[-1] - current_time
-                if remaining_time >= timedelta(hours=self.cycle_hours):
-                    # 종가에 진입
-                    self.execute_entry(symbol, candle['close'], current_time)
+            # 포지션 없고 충분한 시간 남았으면 종가에 진입
+            elif current_time <= last_entry_time:
+                self.execute_entry(symbol, closes[i], current_time)
         
         # 시뮬레이션 종료 시 포지션 남아있으면 강제 청산
         if self.position:
-            last_candle = df.iloc[-1]
-            self.execute_exit(last_candle['close'], last_candle['datetime'], 'simulation_end')
+            self.execute_exit(closes[-1], times[-1], 'simulation_end')
         
         print(f"\n✅ 시뮬레이션 완료")
         print(f"  - 총 거래 횟수: {len(self.trades)}")
@@ -379,6 +303,8 @@ class BacktestEngine:
         print(f"  - 기간: {start_date} ~ {end_date}")
         
         cycle_count = 0
+        # 주기 구간은 BASE_TIMEFRAME 캐시로 받아 CHECK_INTERVAL로 리샘플링 (체크 봉마다 조회하지 않음)
+        downloader = OhlcvDownloader('mexc', BacktestConfig.BASE_TIMEFRAME)
         
         while current_time < end_time:
             cycle_count += 1
@@ -398,77 +324,48 @@ class BacktestEngine:
             
             print(f"  Cycle {cycle_count}: {symbol} 선정")
             
-            # 2. 해당 코인의 주기 데이터 조회
+            # 2. 해당 코인의 주기 데이터 조회 (진입 봉 ~ 주기 종료 봉)
             cycle_end = current_time + timedelta(hours=self.cycle_hours)
+            start_ms = int(current_time.replace(tzinfo=timezone.utc).timestamp() * 1000)
+            end_ms = int(cycle_end.replace(tzinfo=timezone.utc).timestamp() * 1000)
             
             try:
-                # 진입 시점의 현재가로 진입
-                entry_candles = self.exchange.fetch_ohlcv(
-                    symbol, '5m', 
-                    since=int(current_time.timestamp() * 1000),
-                    limit=1
-                )
+                downloader.run([symbol], start_ms, end_ms + timeframe_ms(BacktestConfig.BASE_TIMEFRAME))
+                df = downloader.cache.load_frame('mexc', symbol, BacktestConfig.BASE_TIMEFRAME, start_ms, end_ms,
+                                                 interval=BacktestConfig.CHECK_INTERVAL)
                 
-                if not entry_candles:
+                if df.empty:
                     print(f"    - 진입 데이터 없음, 스킵")
                     current_time += timedelta(hours=self.cycle_hours)
                     continue
                 
-                entry_price = entry_candles[0][4]  # close
-                
-                # 진입
+                # 진입 시점 봉 종가로 진입
+                entry_price = df['close'].iloc[0]
                 self.execute_entry(symbol, entry_price, current_time)
+                self.intrabar.prepare('mexc', symbol, df)
                 
-                # 3. 주기 동안 5분마다 체크
-                check_time = current_time
-                
-                while check_time < cycle_end:
-                    check_time += timedelta(minutes=5)
-                    
-                    # 현재 캔들 조회
-                    candles = self.exchange.fetch_ohlcv(
-                        symbol, '5m',
-                        since=int(check_time.timestamp() * 1000),
-                        limit=1
-                    )
-                    
-                    if not candles:
-                        continue
-                    
-                    # 캔들을 Series로 변환
-                    candle = pd.Series({
-                        'timestamp': candles[0][0],
-                        'open': candles[0][1],
-                        'high': candles[0][2],
-                        'low': candles[0][3],
-                        'close': candles[0][4],
-                        'volume': candles[0][5],
-                        'datetime': check_time
-                    })
+                # 3. 주기 동안 CHECK_INTERVAL 봉마다 체크 (진입 봉 다음 봉부터 주기 종료 봉까지)
+                checks = df.iloc[1:]
+                times = pd.DatetimeIndex(checks['datetime']).to_pydatetime()
+                for row, check_time in zip(checks.itertuples(index=False), times):
+                    candle = {'timestamp': row.timestamp, 'open': row.open, 'high': row.high,
+                              'low': row.low, 'close': row.close, 'volume': row.volume,
+                              'datetime': check_time}
                     
                     # 청산 조건 체크
                     should_exit, exit_reason = self.check_exit_conditions(candle)
                     
                     if should_exit:
-                        if exit_reason == 'stop_loss':
-                            exit_price = candle['low']
-                        elif exit_reason == 'trailing_stop':
-                            exit_price = self.position.peak_price * (1 - BacktestConfig.TS_CALLBACK_RATE / 100)
-                        else:
-                            exit_price = candle['close']
+                        exit_price = self.get_exit_price(candle, exit_reason)
                         
                         self.execute_exit(exit_price, check_time, exit_reason)
                         print(f"    - 청산: {exit_reason} @ ${exit_price:.2f}")
                         break
                 
-                # 타임아웃이면 강제 청산
+                # 타임아웃이면 강제 청산 (주기 종료 봉 종가, 없으면 진입가)
                 if self.position:
-                    exit_candles = self.exchange.fetch_ohlcv(
-                        symbol, '5m',
-                        since=int(cycle_end.timestamp() * 1000),
-                        limit=1
-                    )
-                    exit_price = exit_candles[0][4] if exit_candles else entry_price
+                    last = df[df['timestamp'] == end_ms]
+                    exit_price = last['close'].iloc[0] if len(last) else entry_price
                     self.execute_exit(exit_price, cycle_end, 'timeout')
                     print(f"    - 청산: timeout @ ${exit_price:.2f}")
                 
@@ -484,72 +381,65 @@ class BacktestEngine:
         print(f"  - 최종 잔고: {self.balance:.2f} USDT")
         
     def generate_report(self) -> dict:
-        """백테스트 리포트 생성"""
+        """백테스트 리포트 생성 (거래 저장소 배열에서 지표를 한 번에 계산)"""
         if not self.trades:
             return {'error': '거래 내역 없음'}
         
-        # 거래 통계
-        winning_trades = [t for t in self.trades if t.pnl_percent > 0]
-        losing_trades = [t for t in self.trades if t.pnl_percent <= 0]
-        
-        # 청산 사유별 통계
-        exit_reasons = {}
-        for trade in self.trades:
-            reason = trade.exit_reason
-            exit_reasons[reason] = exit_reasons.get(reason, 0) + 1
-        
-        # 최대 잭팟 찾기
-        max_jackpot = max(self.trades, key=lambda t: t.pnl_percent)
-        
-        # 생존 분석
-        survival_days = None
-        if self.trades:
-            first_trade = self.trades[0]
-            last_trade = self.trades[-1]
-            survival_days = (last_trade.exit_time - first_trade.entry_time).days
+        metrics = self.trades.metrics(BacktestConfig.INITIAL_BALANCE, BacktestConfig.BET_AMOUNT)
         
         report = {
             'cycle_hours': self.cycle_hours,
             'initial_balance': BacktestConfig.INITIAL_BALANCE,
             'final_balance': round(self.balance, 2),
-            'peak_balance': round(self.peak_balance, 2),
+            'peak_balance': round(metrics['peak_balance'], 2),
             'total_pnl': round(self.balance - BacktestConfig.INITIAL_BALANCE, 2),
             'total_pnl_percent': round((self.balance - BacktestConfig.INITIAL_BALANCE) / BacktestConfig.INITIAL_BALANCE * 100, 2),
             
             # 거래 통계
-            'total_trades': len(self.trades),
-            'winning_trades': len(winning_trades),
-            'losing_trades': len(losing_trades),
-            'win_rate': round(len(winning_trades) / len(self.trades) * 100, 2) if self.trades else 0,
+            'total_trades': metrics['total_trades'],
+            'winning_trades': metrics['winning_trades'],
+            'losing_trades': metrics['losing_trades'],
+            'win_rate': metrics['win_rate'],
             
             # 청산 사유
-            'exit_reasons': exit_reasons,
+            'exit_reasons': metrics['exit_reasons'],
             
             # 수익 통계
-            'avg_pnl_percent': round(sum(t.pnl_percent for t in self.trades) / len(self.trades), 2),
-            'avg_win_percent': round(sum(t.pnl_percent for t in winning_trades) / len(winning_trades), 2) if winning_trades else 0,
-            'avg_loss_percent': round(sum(t.pnl_percent for t in losing_trades) / len(losing_trades), 2) if losing_trades else 0,
+            'avg_pnl_percent': metrics['avg_pnl_percent'],
+            'avg_win_percent': metrics['avg_win_percent'],
+            'avg_loss_percent': metrics['avg_loss_percent'],
             
             # 최대 잭팟
-            'max_jackpot': {
-                'symbol': max_jackpot.symbol,
-                'pnl_percent': round(max_jackpot.pnl_percent, 2),
-                'exit_reason': max_jackpot.exit_reason,
-                'entry_time': max_jackpot.entry_time.strftime('%Y-%m-%d %H:%M')
-            },
+            'max_jackpot': metrics['max_jackpot'],
             
             # 생존 분석
-            'survival_days': survival_days,
-            'bankruptcy_point': self.bankruptcy_point,
+            'survival_days': metrics['survival_days'],
+            'bankruptcy_point': metrics['bankruptcy_point'],
+            'data_coverage': self.data_coverage,
+            'intrabar': self.intrabar.stats,
             
-            # 상세 거래 내역
-            'trades': [t.to_dict() for t in self.trades]
+            # 상세 거래 내역 (컬럼 배열, 저장 시 .trades.npz로 분리)
+            'trades': self.trades.columns(self.cycle_hours)
         }
         
         return report
 
 
-def run_multi_cycle_backtest(symbol: str, start_date: str, end_date: str, use_scanner: bool = False) -> dict:
+def _data_fingerprint(symbol: str, start_date: str, end_date: str) -> str:
+    """결과 캐시 키용 데이터 지문 (구간 캔들을 먼저 캐시에 받아둔 뒤 계산)"""
+    exchange = get_exchange('mexc')
+    since = exchange.parse8601(f"{start_date}T00:00:00Z")
+    end = exchange.parse8601(f"{end_date}T23:59:59Z")
+    downloader = OhlcvDownloader('mexc', BacktestConfig.BASE_TIMEFRAME)
+    downloader.run([symbol], since, end)
+    timeframes = [BacktestConfig.BASE_TIMEFRAME]
+    if BacktestConfig.INTRABAR_MODE == 'drilldown':
+        timeframes.append('1m')  # drilldown은 1분봉 캐시도 읽는다
+    return data_fingerprint(downloader.cache, 'mexc', symbol, timeframes, since, end)
+
+
+def run_multi_cycle_backtest(symbol: str, start_date: str, end_date: str, use_scanner: bool = False,
+                             use_cache: bool = True) -> dict:
     """여러 주기로 백테스트 실행
     
     Args:
@@ -557,6 +447,7 @@ def run_multi_cycle_backtest(symbol: str, start_date: str, end_date: str, use_sc
         start_date: 시작일
         end_date: 종료일
         use_scanner: True이면 매 사이클마다 스캐너로 코인 선정
+        use_cache: 단일 심볼 모드에서 (데이터 지문, 설정)이 같으면 저장된 리포트 재사용
     """
     print(f"\n🎰 다중 주기 백테스트 시작")
     if use_scanner:
@@ -568,10 +459,26 @@ def run_multi_cycle_backtest(symbol: str, start_date: str, end_date: str, use_sc
     
     results = {}
     
+    # 스캐너 모드는 랜덤 선택이라 캐시하지 않음
+    result_cache = ResultCache() if use_cache and not use_scanner else None
+    fingerprint = _data_fingerprint(symbol, start_date, end_date) if result_cache else None
+    
     for cycle_hours in BacktestConfig.TEST_CYCLES:
+        key = None
+        if result_cache:
+            key = result_cache.key(fingerprint, BacktestConfig, symbol=symbol, cycle_hours=cycle_hours,
+                                   period=f"{start_date} ~ {end_date}")
+            cached = result_cache.load(key)
+            if cached is not None:
+                print(f"\n♻️ [{cycle_hours}h] 캐시된 결과 사용 ({key[:12]})")
+                results[f"{cycle_hours}h"] = cached
+                continue
+        
         engine = BacktestEngine(cycle_hours, use_scanner=use_scanner)
         engine.run_simulation(symbol, start_date, end_date)
         results[f"{cycle_hours}h"] = engine.generate_report()
+        if key:
+            result_cache.store(key, results[f"{cycle_hours}h"])
     
     # 최적 주기 분석
     best_cycle = max(results.items(), key=lambda x: x[1]['final_balance'])
@@ -637,7 +544,6 @@ if __name__ == '__main__':
     
     # JSON 저장
     output_file = f"backtest_result_{symbol.replace('/', '_')}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
-    with open(output_file, 'w') as f:
-        json.dump(summary, f, indent=2, ensure_ascii=False)
+    save_result(output_file, summary)
     
     print(f"💾 결과 저장: {output_file}")
@@ -4,13 +4,24 @@
 Binance API를 사용하여 장기 백테스트 수행.
 """
 
-import ccxt
+import os
+import sys
+
 import pandas as pd
 from datetime import datetime, timedelta
-from typing import List, Dict, Tuple
+from typing import Tuple
 import json
 import random
 
+# 단독 실행(python tests/binance_backtest.py) 시에도 루트 패키지 import
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from core.strategy import Position, TrailingStopStrategy
+from exchange.rate_limiter import request_scheduler
+from exchange.factory import get_exchange, load_markets_cached
+from tests.candle_store import OhlcvDownloader, timeframe_ms
+from tests.intrabar import make_resolver
+from tests.trade_log import TradeStore, save_result
+
 
 class BacktestConfig:
     """백테스트 설정"""
@@ -27,67 +38,15 @@ class BacktestConfig:
     TRADING_FEE_PERCENT = 0.3
     
     # 데이터 설정
-    TIMEFRAME = '5m'
+    BASE_TIMEFRAME = '5m'  # 캐시에 저장하는 최소 단위 ('1m'로 받아두면 1분 체크도 시뮬레이션 가능)
+    CHECK_INTERVAL = '5m'  # 청산 체크 주기. BASE_TIMEFRAME의 배수면 재다운로드 없이 리샘플링
+    INTRABAR_MODE = 'ohlc'  # 애매한 봉 판정: ohlc(기존) / direction / drilldown(1분봉 캐시) / sampled
+    MIN_DATA_COVERAGE = 95.0  # 구간 내 캔들 커버리지(%)가 이보다 낮으면 시뮬레이션 거부
     
     # 테스트할 주기들 (시간 단위)
     TEST_CYCLES = [48, 72, 96]
 
 
-class Position:
-    """포지션 상태"""
-    def __init__(self, symbol: str, entry_price: float, amount_usdt: float, entry_time: datetime):
-        self.symbol = symbol
-        self.entry_price = entry_price
-        self.amount_usdt = amount_usdt
-        self.entry_time = entry_time
-        
-        # 트레일링 스탑 상태
-        self.is_ts_active = False
-        self.peak_price = None
-        
-    def activate_trailing_stop(self, peak_price: float):
-        self.is_ts_active = True
-        self.peak_price = peak_price
-        
-    def update_peak_price(self, new_peak: float):
-        if self.is_ts_active and new_peak > self.peak_price:
-            self.peak_price = new_peak
-            
-    def get_pnl_percent(self, current_price: float) -> float:
-        return ((current_price - self.entry_price) / self.entry_price) * 100
-
-
-class Trade:
-    """거래 기록"""
-    def __init__(self, symbol: str, entry_price: float, exit_price: float,
-                 entry_time: datetime, exit_time: datetime, 
-                 amount_usdt: float, pnl_percent: float, exit_reason: str):
-        self.symbol = symbol
-        self.entry_price = entry_price
-        self.exit_price = exit_price
-        self.entry_time = entry_time
-        self.exit_time = exit_time
-        self.amount_usdt = amount_usdt
-        self.pnl_percent = pnl_percent
-        self.exit_reason = exit_reason
-        
-        self.net_pnl_usdt = amount_usdt * (pnl_percent / 100) * (1 - BacktestConfig.TRADING_FEE_PERCENT / 100)
-        
-    def to_dict(self) -> dict:
-        return {
-            'symbol': self.symbol,
-            'entry_price': self.entry_price,
-            'exit_price': self.exit_price,
-            'entry_time': self.entry_time.strftime('%Y-%m-%d %H:%M:%S'),
-            'exit_time': self.exit_time.strftime('%Y-%m-%d %H:%M:%S'),
-            'duration_hours': (self.exit_time - self.entry_time).total_seconds() / 3600,
-            'amount_usdt': self.amount_usdt,
-            'pnl_percent': round(self.pnl_percent, 2),
-            'net_pnl_usdt': round(self.net_pnl_usdt, 2),
-            'exit_reason': self.exit_reason
-        }
-
-
 class BinanceBacktestEngine:
     """Binance 백테스트 엔진"""
     
@@ -95,13 +54,26 @@ class BinanceBacktestEngine:
         self.cycle_hours = cycle_hours
         self.use_scanner = use_scanner
         self.balance = BacktestConfig.INITIAL_BALANCE
-        self.peak_balance = BacktestConfig.INITIAL_BALANCE
         self.position: Position = None
-        self.trades: List[Trade] = []
-        self.bankruptcy_point = None
+        self.trades = TradeStore(BacktestConfig.TRADING_FEE_PERCENT)  # 거래 기록 (구조화 배열)
+        self.data_coverage = {}  # 심볼별 캔들 커버리지(%)
+        self.intrabar = make_resolver(
+            BacktestConfig.INTRABAR_MODE,
+            BacktestConfig.STOP_LOSS_THRESHOLD,
+            BacktestConfig.TS_ACTIVATION_REWARD,
+            BacktestConfig.TS_CALLBACK_RATE,
+            timeframe_ms(BacktestConfig.CHECK_INTERVAL),
+        )
+        self.strategy = TrailingStopStrategy(
+            BacktestConfig.STOP_LOSS_THRESHOLD,
+            BacktestConfig.TS_ACTIVATION_REWARD,
+            BacktestConfig.TS_CALLBACK_RATE,
+            timedelta(hours=cycle_hours),
+        )
+        self.exit_price = None  # 청산 판정이 난 봉의 체결가
         
         # Binance 연결
-        self.exchange = ccxt.binance({'enableRateLimit': True})
+        self.exchange = get_exchange('binance')
         
         # 공통 코인 목록 (MEXC와 Binance 둘 다 있는 코인)
         self.common_coins = None
@@ -113,9 +85,8 @@ class BinanceBacktestEngine:
         
         print("📋 공통 코인 목록 로드 중...")
         try:
-            mexc = ccxt.mexc()
-            mexc_markets = mexc.load_markets()
-            binance_markets = self.exchange.load_markets()
+            mexc_markets = load_markets_cached(get_exchange('mexc'), lane="backtest")
+            binance_markets = load_markets_cached(self.exchange, lane="backtest")
             
             mexc_usdt = set([s for s in mexc_markets.keys() if s.endswith('/USDT') and mexc_markets[s]['active']])
             binance_usdt = set([s for s in binance_markets.keys() if s.endswith('/USDT') and binance_markets[s]['active']])
@@ -137,7 +108,7 @@ class BinanceBacktestEngine:
         
         try:
             # 전체 티커 조회
-            tickers = self.exchange.fetch_tickers()
+            tickers = request_scheduler.call(self.exchange, "backtest", "fetch_tickers")
             
             # 필터링 (공통 코인 중에서만)
             candidates = []
@@ -196,46 +167,24 @@ class BinanceBacktestEngine:
             return random.choice(self.common_coins) if self.common_coins else None
     
     def fetch_historical_data(self, symbol: str, start_date: str, end_date: str) -> pd.DataFrame:
-        """Binance에서 과거 5분봉 데이터 조회"""
+        """Binance에서 과거 캔들 조회 (로컬 캔들 캐시 + 샤드 동시 다운로드, CHECK_INTERVAL로 리샘플링)"""
         since = self.exchange.parse8601(f"{start_date}T00:00:00Z")
         end = self.exchange.parse8601(f"{end_date}T23:59:59Z")
         
-        all_candles = []
-        current = since
-        
         print(f"  📊 [{symbol}] 데이터 다운로드 중...")
         
-        error_count = 0
-        max_errors = 3
+        downloader = OhlcvDownloader('binance', BacktestConfig.BASE_TIMEFRAME)
+        result = downloader.run([symbol], since, end)[symbol]
+        if result.get('failed_shards'):
+            print(f"    ⚠️ 실패한 샤드 {result['failed_shards']}개. 수집된 데이터로 진행")
         
-        while current < end:
-            try:
-                candles = self.exchange.fetch_ohlcv(symbol, BacktestConfig.TIMEFRAME, since=current, limit=1000)
-                
-                if not candles:
-                    break
-                
-                all_candles.extend(candles)
-                current = candles[-1][0] + 1
-                
-                if len(all_candles) % 10000 == 0:
-                    print(f"    - {len(all_candles)} candles...")
-                
-                error_count = 0
-                    
-            except Exception as e:
-                error_count += 1
-                if error_count >= max_errors:
-                    print(f"    ⚠️ 최대 에러 도달. 수집된 데이터로 진행: {len(all_candles)} candles")
-                    break
-                import time
-                time.sleep(1)
+        self._check_data_coverage(downloader.cache, 'binance', symbol, since, end)
         
-        if not all_candles:
+        df = downloader.cache.load_frame('binance', symbol, BacktestConfig.BASE_TIMEFRAME, since, end,
+                                            interval=BacktestConfig.CHECK_INTERVAL)
+        if df.empty:
             raise ValueError(f"데이터 없음: {symbol}")
         
-        df = pd.DataFrame(all_candles, columns=['timestamp', 'open', 'high', 'low', 'close', 'volume'])
-        df['datetime'] = pd.to_datetime(df['timestamp'], unit='ms')
         df = df[(df['datetime'] >= start_date) & (df['datetime'] <= end_date)]
         
         print(f"  ✅ {len(df)} candles")
@@ -243,104 +192,100 @@ class BinanceBacktestEngine:
         if len(df) == 0:
             raise ValueError(f"날짜 범위 내 데이터 없음")
         
+        self.intrabar.prepare('binance', symbol, df)
         return df
     
-    def check_exit_conditions(self, candle: pd.Series) -> Tuple[bool, str]:
-        """청산 조건 체크"""
+    def _check_data_coverage(self, cache, exchange_id: str, symbol: str, since: int, end: int):
+        """캔들 커버리지 확인: 기준 미달이면 거부, 누락 구간은 경고"""
+        end = min(end + 1, int(datetime.now().timestamp() * 1000))
+        report = cache.coverage_report(exchange_id, symbol, BacktestConfig.BASE_TIMEFRAME, since, end)
+        self.data_coverage[symbol] = report['coverage_percent']
+        
+        if report['coverage_percent'] < BacktestConfig.MIN_DATA_COVERAGE:
+            raise ValueError(f"데이터 불완전: {symbol} 커버리지 {report['coverage_percent']}%")
+        if report['gaps']:
+            print(f"    ⚠️ 누락 구간 {len(report['gaps'])}개 ({report['missing_candles']} candles)")
+    
+    def check_exit_conditions(self, candle) -> Tuple[bool, str]:
+        """청산 조건 체크 (전략 상태 머신, 애매한 봉은 INTRABAR_MODE 경로로 판정)"""
         if not self.position:
             return False, None
         
-        high = candle['high']
-        low = candle['low']
+        self.exit_price = None
         current_time = candle['datetime']
         
-        # 1. 손절
-        pnl_at_low = self.position.get_pnl_percent(low)
-        if pnl_at_low <= BacktestConfig.STOP_LOSS_THRESHOLD:
-            return True, 'stop_loss'
-        
-        # 2. 트레일링 활성화
-        pnl_at_high = self.position.get_pnl_percent(high)
-        if not self.position.is_ts_active and pnl_at_high >= BacktestConfig.TS_ACTIVATION_REWARD:
-            self.position.activate_trailing_stop(high)
-        
-        # 3. 트레일링 익절
-        if self.position.is_ts_active:
-            self.position.update_peak_price(high)
-            callback_threshold = self.position.peak_price * (1 - BacktestConfig.TS_CALLBACK_RATE / 100)
-            if low <= callback_threshold:
-                return True, 'trailing_stop'
-        
-        # 4. 타임아웃
-        elapsed = current_time - self.position.entry_time
-        if elapsed >= timedelta(hours=self.cycle_hours):
+        resolved = self.intrabar.resolve(self.position.symbol, candle, self.position)
+        if resolved is None:
+            action = self.strategy.on_price(self.position, candle['high'], candle['low'], candle['close'],
+                                            current_time)
+            if action is None or action.exit_reason is None:
+                return False, None
+            self.exit_price = action.exit_price
+            return True, action.exit_reason
+        
+        exit_reason = self._apply_intrabar_result(resolved)
+        if exit_reason:
+            return True, exit_reason
+        if self.strategy.is_expired(self.position, current_time):
+            self.exit_price = candle['close']
             return True, 'timeout'
-        
         return False, None
     
+    def _apply_intrabar_result(self, resolved) -> str:
+        """경로 판정 결과를 포지션 상태에 반영"""
+        exit_reason, exit_price, is_ts_active, peak_price = resolved
+        if is_ts_active and not self.position.is_ts_active:
+            self.position.activate_trailing_stop(peak_price)
+        elif is_ts_active:
+            self.position.update_peak_price(peak_price)
+        if exit_reason:
+            self.exit_price = exit_price
+        return exit_reason
+    
+    def get_exit_price(self, candle, exit_reason: str) -> float:
+        """청산 가격 결정 (check_exit_conditions가 정한 체결가)"""
+        return self.exit_price
+    
     def execute_entry(self, symbol: str, entry_price: float, entry_time: datetime):
-        self.position = Position(symbol, entry_price, BacktestConfig.BET_AMOUNT, entry_time)
+        self.position = self.strategy.open(symbol, entry_price, BacktestConfig.BET_AMOUNT, entry_time)
     
     def execute_exit(self, exit_price: float, exit_time: datetime, exit_reason: str):
         if not self.position:
             return
         
-        pnl_percent = self.position.get_pnl_percent(exit_price)
-        
-        trade = Trade(
-            symbol=self.position.symbol,
-            entry_price=self.position.entry_price,
-            exit_price=exit_price,
-            entry_time=self.position.entry_time,
-            exit_time=exit_time,
-            amount_usdt=self.position.amount_usdt,
-            pnl_percent=pnl_percent,
-            exit_reason=exit_reason
+        # 거래 기록 + 잔고 업데이트 (최고 잔고/파산 지점은 리포트에서 배열로 계산)
+        self.balance += self.trades.append(
+            self.position.symbol, self.position.entry_price, exit_price,
+            self.position.entry_time, exit_time, self.position.amount_usdt,
+            self.position.get_pnl_percent(exit_price), exit_reason,
         )
-        
-        self.balance += trade.net_pnl_usdt
-        
-        if self.balance > self.peak_balance:
-            self.peak_balance = self.balance
-        
-        if self.balance < BacktestConfig.BET_AMOUNT and self.bankruptcy_point is None:
-            self.bankruptcy_point = {
-                'time': exit_time,
-                'balance': self.balance,
-                'trade_count': len(self.trades) + 1
-            }
-        
-        self.trades.append(trade)
         self.position = None
     
     def run_simulation_single_symbol(self, symbol: str, start_date: str, end_date: str):
         """단일 심볼 시뮬레이션"""
         df = self.fetch_historical_data(symbol, start_date, end_date)
         
-        for idx, candle in df.iterrows():
-            current_time = candle['datetime']
+        timestamps = df['timestamp'].tolist()
+        opens, highs, lows, closes = (df[col].tolist() for col in ('open', 'high', 'low', 'close'))
+        times = pd.DatetimeIndex(df['datetime']).to_pydatetime()
+        last_entry_time = times[-1] - timedelta(hours=self.cycle_hours)
+        
+        for i in range(len(times)):
+            current_time = times[i]
             
             if self.position:
+                candle = {'timestamp': timestamps[i], 'open': opens[i], 'high': highs[i],
+                          'low': lows[i], 'close': closes[i], 'datetime': current_time}
                 should_exit, exit_reason = self.check_exit_conditions(candle)
                 
                 if should_exit:
-                    if exit_reason == 'stop_loss':
-                        exit_price = candle['low']
-                    elif exit_reason == 'trailing_stop':
-                        exit_price = self.position.peak_price * (1 - BacktestConfig.TS_CALLBACK_RATE / 100)
-                    else:
-                        exit_price = candle['close']
-                    
-                    self.execute_exit(exit_price, current_time, exit_reason)
+                    self.execute_exit(self.exit_price, current_time, exit_reason)
             
-            else:
-                remaining_time = df['datetime'].iloc[-1] - current_time
-                if remaining_time >= timedelta(hours=self.cycle_hours):
-                    self.execute_entry(symbol, candle['close'], current_time)
+            elif current_time <= last_entry_time:
+                self.execute_entry(symbol, closes[i], current_time)
         
         if self.position:
-            last_candle = df.iloc[-1]
-            self.execute_exit(last_candle['close'], last_candle['datetime'], 'simulation_end')
+            self.execute_exit(closes[-1], times[-1], 'simulation_end')
     
     def run_simulation_scanner(self, start_date: str, end_date: str):
         """스캐너 모드 시뮬레이션"""
@@ -389,13 +334,7 @@ class BinanceBacktestEngine:
                     should_exit, exit_reason = self.check_exit_conditions(candle)
                     
                     if should_exit:
-                        if exit_reason == 'stop_loss':
-                            exit_price = candle['low']
-                        elif exit_reason == 'trailing_stop':
-                            exit_price = self.position.peak_price * (1 - BacktestConfig.TS_CALLBACK_RATE / 100)
-                        else:
-                            exit_price = candle['close']
-                        
+                        exit_price = self.get_exit_price(candle, exit_reason)
                         self.execute_exit(exit_price, candle['datetime'], exit_reason)
                         print(f"    → {exit_reason} @ ${exit_price:.2f}, PNL: {self.trades[-1].pnl_percent:+.2f}%")
                         break
@@ -434,46 +373,29 @@ class BinanceBacktestEngine:
         if not self.trades:
             return {'error': '거래 없음'}
         
-        winning_trades = [t for t in self.trades if t.pnl_percent > 0]
-        losing_trades = [t for t in self.trades if t.pnl_percent <= 0]
-        
-        exit_reasons = {}
-        for trade in self.trades:
-            reason = trade.exit_reason
-            exit_reasons[reason] = exit_reasons.get(reason, 0) + 1
-        
-        max_jackpot = max(self.trades, key=lambda t: t.pnl_percent)
-        
-        survival_days = None
-        if self.trades:
-            first_trade = self.trades[0]
-            last_trade = self.trades[-1]
-            survival_days = (last_trade.exit_time - first_trade.entry_time).days
+        metrics = self.trades.metrics(BacktestConfig.INITIAL_BALANCE, BacktestConfig.BET_AMOUNT)
         
         return {
             'cycle_hours': self.cycle_hours,
             'initial_balance': BacktestConfig.INITIAL_BALANCE,
             'final_balance': round(self.balance, 2),
-            'peak_balance': round(self.peak_balance, 2),
+            'peak_balance': round(metrics['peak_balance'], 2),
             'total_pnl': round(self.balance - BacktestConfig.INITIAL_BALANCE, 2),
             'total_pnl_percent': round((self.balance - BacktestConfig.INITIAL_BALANCE) / BacktestConfig.INITIAL_BALANCE * 100, 2),
-            'total_trades': len(self.trades),
-            'winning_trades': len(winning_trades),
-            'losing_trades': len(losing_trades),
-            'win_rate': round(len(winning_trades) / len(self.trades) * 100, 2) if self.trades else 0,
-            'exit_reasons': exit_reasons,
-            'avg_pnl_percent': round(sum(t.pnl_percent for t in self.trades) / len(self.trades), 2),
-            'avg_win_percent': round(sum(t.pnl_percent for t in winning_trades) / len(winning_trades), 2) if winning_trades else 0,
-            'avg_loss_percent': round(sum(t.pnl_percent for t in losing_trades) / len(losing_trades), 2) if losing_trades else 0,
-            'max_jackpot': {
-                'symbol': max_jackpot.symbol,
-                'pnl_percent': round(max_jackpot.pnl_percent, 2),
-                'exit_reason': max_jackpot.exit_reason,
-                'entry_time': max_jackpot.entry_time.strftime('%Y-%m-%d %H:%M')
-            },
-            'survival_days': survival_days,
-            'bankruptcy_point': self.bankruptcy_point,
-            'trades': [t.to_dict() for t in self.trades]
+            'total_trades': metrics['total_trades'],
+            'winning_trades': metrics['winning_trades'],
+            'losing_trades': metrics['losing_trades'],
+            'win_rate': metrics['win_rate'],
+            'exit_reasons': metrics['exit_reasons'],
+            'avg_pnl_percent': metrics['avg_pnl_percent'],
+            'avg_win_percent': metrics['avg_win_percent'],
+            'avg_loss_percent': metrics['avg_loss_percent'],
+            'max_jackpot': metrics['max_jackpot'],
+            'survival_days': metrics['survival_days'],
+            'bankruptcy_point': metrics['bankruptcy_point'],
+            'data_coverage': self.data_coverage,
+            'intrabar': self.intrabar.stats,
+            'trades': self.trades.columns(self.cycle_hours)
         }
 
 
@@ -503,14 +425,13 @@ if __name__ == '__main__':
     
     # 결과 저장
     output_file = f"binance_backtest_{symbol.replace('/', '_')}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
-    with open(output_file, 'w') as f:
-        json.dump({
-            'exchange': 'Binance',
-            'mode': 'scanner' if use_scanner else 'single_symbol',
-            'symbol': symbol,
-            'period': f"{start_date} ~ {end_date}",
-            'results': results
-        }, f, indent=2)
+    save_result(output_file, {
+        'exchange': 'Binance',
+        'mode': 'scanner' if use_scanner else 'single_symbol',
+        'symbol': symbol,
+        'period': f"{start_date} ~ {end_date}",
+        'results': results
+    })
     
     print(f"\n💾 결과 저장: {output_file}")
     
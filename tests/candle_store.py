@@ -0,0 +1,433 @@
+"""
+🕯️ 로컬 캔들 캐시 + 비동기 OHLCV 벌크 다운로더
+
+[start, end] 구간을 페이지 단위 샤드로 나눠 동시에 받고, 완료된 샤드는
+바로 캐시에 병합(타임스탬프 중복 제거)한다. 전체 속도는 RTT가 아니라
+공유 요청 스케줄러의 backtest 레인 예산에 의해 결정된다.
+
+다운로드 후에는 타임스탬프 diff로 누락 구간을 찾아 그 구간만 재요청하고,
+심볼별 커버리지 맵(검증 완료 구간 / 거래소에도 없는 구간)을 캐시 옆에 저장한다.
+
+캐시는 가장 작은 기준 타임프레임(1m/5m)만 받아 두고, 상위 타임프레임(15m, 1h, 1d 등)은
+처음 요청될 때 기준 캔들을 집계해 만든 뒤 파생 캐시로 저장한다.
+"""
+
+import asyncio
+import json
+import os
+import time
+
+import ccxt
+import numpy as np
+import pandas as pd
+
+from core.indicators import FeatureStore
+from exchange.factory import create_async_exchange
+from exchange.rate_limiter import request_scheduler
+
+CANDLE_CACHE_DIR = os.getenv("CANDLE_CACHE_DIR", "data/candles")
+
+
+def timeframe_ms(timeframe: str) -> int:
+    return ccxt.Exchange.parse_timeframe(timeframe) * 1000
+
+
+def merge_ranges(ranges):
+    """[start, end) 구간 목록 병합"""
+    merged = []
+    for s, e in sorted(ranges):
+        if merged and s <= merged[-1][1]:
+            merged[-1][1] = max(merged[-1][1], e)
+        else:
+            merged.append([s, e])
+    return merged
+
+
+def subtract_ranges(start: int, end: int, covered):
+    """[start, end)에서 covered 구간을 뺀 나머지"""
+    rest, cur = [], start
+    for s, e in merge_ranges(covered):
+        if e <= cur or s >= end:
+            continue
+        if s > cur:
+            rest.append([cur, s])
+        cur = max(cur, e)
+    if cur < end:
+        rest.append([cur, end])
+    return rest
+
+
+def find_gaps(timestamps: np.ndarray, tf_ms: int, start_ms: int, end_ms: int):
+    """[start, end) 격자 대비 누락 구간 목록 (벡터화 diff)"""
+    first = -(-start_ms // tf_ms) * tf_ms
+    last = (end_ms - 1) // tf_ms * tf_ms
+    if last < first:
+        return []
+    ts = timestamps[(timestamps >= first) & (timestamps <= last)].astype(np.int64)
+    edges = np.concatenate(([first - tf_ms], ts, [last + tf_ms]))
+    idx = np.nonzero(np.diff(edges) > tf_ms)[0]
+    return [[int(edges[i] + tf_ms), int(edges[i + 1])] for i in idx]
+
+
+class CandleArrays:
+    """심볼 하나의 메모리 맵 캔들 배열 (타임스탬프 int64 + OHLCV float32 컬럼)
+
+    파일을 읽기 전용 memmap으로 열기 때문에 여러 워커 프로세스가 같은 페이지
+    캐시를 복사 없이 공유하고, 시뮬레이션은 실제로 접근한 구간만 읽는다.
+    """
+
+    def __init__(self, ts: np.ndarray, ohlcv: np.ndarray):
+        self.ts = ts
+        self.ohlcv = ohlcv  # shape (5, N): open, high, low, close, volume (컬럼별 연속 배치)
+
+    def __len__(self):
+        return len(self.ts)
+
+    @property
+    def open(self):
+        return self.ohlcv[0]
+
+    @property
+    def high(self):
+        return self.ohlcv[1]
+
+    @property
+    def low(self):
+        return self.ohlcv[2]
+
+    @property
+    def close(self):
+        return self.ohlcv[3]
+
+    @property
+    def volume(self):
+        return self.ohlcv[4]
+
+    def window(self, start_ms: int, end_ms: int) -> 'CandleArrays':
+        """[start_ms, end_ms] 구간 뷰 (정렬된 ts에 이진 탐색, 복사 없음)"""
+        lo = np.searchsorted(self.ts, start_ms, side='left')
+        hi = np.searchsorted(self.ts, end_ms, side='right')
+        return CandleArrays(self.ts[lo:hi], self.ohlcv[:, lo:hi])
+
+
+def resample(arrays: CandleArrays, target_ms: int) -> CandleArrays:
+    """상위 타임프레임으로 OHLCV 집계 (UTC 기준 버킷 경계에서 reduceat)"""
+    if len(arrays) == 0:
+        return CandleArrays(np.empty(0, dtype=np.int64), np.empty((5, 0), dtype=np.float32))
+    ts = np.asarray(arrays.ts)
+    src = np.asarray(arrays.ohlcv)
+    buckets = ts - ts % target_ms
+    starts = np.flatnonzero(np.concatenate(([True], buckets[1:] != buckets[:-1])))
+    ends = np.concatenate((starts[1:], [len(ts)])) - 1
+
+    ohlcv = np.empty((5, len(starts)), dtype=np.float32)
+    ohlcv[0] = src[0, starts]
+    ohlcv[1] = np.maximum.reduceat(src[1], starts)
+    ohlcv[2] = np.minimum.reduceat(src[2], starts)
+    ohlcv[3] = src[3, ends]
+    ohlcv[4] = np.add.reduceat(src[4], starts)
+    return CandleArrays(buckets[starts], ohlcv)
+
+
+class CandleCache:
+    """(거래소, 심볼, 타임프레임)별 고정폭 바이너리 캔들 캐시
+
+    <symbol>.ts    : int64 타임스탬프 N개
+    <symbol>.ohlcv : float32 (5, N) 컬럼 배치
+
+    파생 타임프레임은 <exchange>/<timeframe>@<base>/ 아래에 같은 형식으로 저장하고,
+    기준 캐시가 더 최신이면 다시 집계한다.
+    """
+
+    def __init__(self, root: str = CANDLE_CACHE_DIR):
+        self.root = root
+
+    def _path(self, exchange_id: str, symbol: str, timeframe: str) -> str:
+        """확장자 없는 기준 경로"""
+        return os.path.join(self.root, exchange_id, timeframe, symbol.replace('/', '_'))
+
+    def open(self, exchange_id: str, symbol: str, timeframe: str) -> CandleArrays:
+        """읽기 전용 memmap으로 열기. 없으면 빈 배열"""
+        base = self._path(exchange_id, symbol, timeframe)
+        if not os.path.exists(f"{base}.ts") and os.path.exists(f"{base}.npy"):
+            self._migrate_npy(exchange_id, symbol, timeframe)
+        return self._open_path(base)
+
+    @staticmethod
+    def _open_path(base: str) -> CandleArrays:
+        if not os.path.exists(f"{base}.ts") or os.path.getsize(f"{base}.ts") == 0:
+            return CandleArrays(np.empty(0, dtype=np.int64), np.empty((5, 0), dtype=np.float32))
+        ts = np.memmap(f"{base}.ts", dtype=np.int64, mode='r')
+        if os.path.getsize(f"{base}.ohlcv") != 5 * len(ts) * 4:
+            raise ValueError(f"캔들 캐시 크기 불일치 (쓰기 중이거나 손상): {base}")
+        ohlcv = np.memmap(f"{base}.ohlcv", dtype=np.float32, mode='r', shape=(5, len(ts)))
+        return CandleArrays(ts, ohlcv)
+
+    def open_timeframe(self, exchange_id: str, symbol: str, base_timeframe: str,
+                       timeframe: str) -> CandleArrays:
+        """기준 타임프레임 캐시에서 상위 타임프레임 캔들을 반환 (파생 캐시 재사용)"""
+        if timeframe == base_timeframe:
+            return self.open(exchange_id, symbol, base_timeframe)
+
+        base_ms, target_ms = timeframe_ms(base_timeframe), timeframe_ms(timeframe)
+        if target_ms < base_ms or target_ms % base_ms:
+            raise ValueError(f"{timeframe}은(는) 기준 타임프레임 {base_timeframe}의 배수가 아님")
+
+        source = self.open(exchange_id, symbol, base_timeframe)
+        source_path = f"{self._path(exchange_id, symbol, base_timeframe)}.ts"
+        derived = self._path(exchange_id, symbol, f"{timeframe}@{base_timeframe}")
+        if (os.path.exists(f"{derived}.ts") and os.path.exists(source_path)
+                and os.path.getmtime(f"{derived}.ts") >= os.path.getmtime(source_path)):
+            return self._open_path(derived)
+
+        arrays = resample(source, target_ms)
+        self._store(derived, arrays.ts, arrays.ohlcv)
+        return self._open_path(derived)
+
+    def _migrate_npy(self, exchange_id: str, symbol: str, timeframe: str):
+        """이전 (N, 6) float64 .npy 캐시를 고정폭 바이너리로 변환"""
+        base = self._path(exchange_id, symbol, timeframe)
+        legacy = np.load(f"{base}.npy")
+        ts, first_idx = np.unique(legacy[:, 0].astype(np.int64), return_index=True)
+        self._store(base, ts, np.ascontiguousarray(legacy[first_idx, 1:].T.astype(np.float32)))
+        os.remove(f"{base}.npy")
+
+    def write(self, exchange_id: str, symbol: str, timeframe: str, candles) -> int:
+        """기존 캐시와 병합 (타임스탬프 기준 중복 제거 + 정렬). 제거된 중복 수 반환"""
+        new = np.asarray(candles, dtype=np.float64).reshape(-1, 6)
+        arrays = self.open(exchange_id, symbol, timeframe)
+        ts = np.concatenate([arrays.ts, new[:, 0].astype(np.int64)])
+        ohlcv = np.concatenate([arrays.ohlcv, new[:, 1:].T.astype(np.float32)], axis=1)
+        ts, first_idx = np.unique(ts, return_index=True)
+        duplicates = len(ohlcv[0]) - len(first_idx)
+        ohlcv = np.ascontiguousarray(ohlcv[:, first_idx])
+        del arrays  # 교체 전에 기존 memmap 해제
+
+        self._store(self._path(exchange_id, symbol, timeframe), ts, ohlcv)
+        return duplicates
+
+    @staticmethod
+    def _store(base: str, ts: np.ndarray, ohlcv: np.ndarray):
+        os.makedirs(os.path.dirname(base), exist_ok=True)
+        # 단일 작성자(다운로더) 전제. 두 파일 교체 사이에 열면 open()이 크기 불일치로 거부
+        for suffix, arr in (('ohlcv', ohlcv), ('ts', ts)):
+            tmp_path = f"{base}.{suffix}.tmp"
+            arr.tofile(tmp_path)
+            os.replace(tmp_path, f"{base}.{suffix}")
+
+    def read_coverage(self, exchange_id: str, symbol: str, timeframe: str) -> dict:
+        """커버리지 맵: covered = 검증 완료 구간, missing = 재요청해도 없는 구간"""
+        path = f"{self._path(exchange_id, symbol, timeframe)}.coverage.json"
+        if not os.path.exists(path):
+            return {'covered': [], 'missing': [], 'duplicates_removed': 0}
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def write_coverage(self, exchange_id: str, symbol: str, timeframe: str, coverage: dict):
+        path = f"{self._path(exchange_id, symbol, timeframe)}.coverage.json"
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        coverage['covered'] = merge_ranges(coverage['covered'])
+        coverage['missing'] = merge_ranges(coverage['missing'])
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(coverage, f)
+
+    def coverage_report(self, exchange_id: str, symbol: str, timeframe: str,
+                        start_ms: int, end_ms: int) -> dict:
+        """[start, end) 데이터 완전성 요약 (시뮬레이션 전 빠른 확인용)"""
+        tf_ms = timeframe_ms(timeframe)
+        ts = self.open(exchange_id, symbol, timeframe).ts
+        gaps = find_gaps(ts, tf_ms, start_ms, end_ms)
+        expected = max(0, ((end_ms - 1) // tf_ms) - (-(-start_ms // tf_ms)) + 1)
+        missing = sum((e - s) // tf_ms for s, e in gaps)
+        coverage = self.read_coverage(exchange_id, symbol, timeframe)
+        return {
+            'expected_candles': int(expected),
+            'missing_candles': int(missing),
+            'coverage_percent': round((expected - missing) / expected * 100, 2) if expected else 0.0,
+            'gaps': gaps,
+            'unverified': subtract_ranges(start_ms, end_ms, coverage['covered']),
+        }
+
+    def load_features(self, exchange_id: str, symbols, timeframe: str) -> dict:
+        """심볼들의 지표(core.indicators)를 캐시 옆 .features.npz에서 읽고 새 봉만 갱신"""
+        candles = {}
+        for symbol in symbols:
+            arrays = self.open(exchange_id, symbol, timeframe)
+            candles[self._path(exchange_id, symbol, timeframe)] = {
+                'ts': np.asarray(arrays.ts), 'high': arrays.high, 'low': arrays.low, 'close': arrays.close,
+            }
+        features = FeatureStore().update(candles)
+        return {symbol: features[self._path(exchange_id, symbol, timeframe)] for symbol in symbols}
+
+    def load_frame(self, exchange_id: str, symbol: str, timeframe: str,
+                   start_ms: int, end_ms: int, interval: str = None) -> pd.DataFrame:
+        """[start_ms, end_ms] 구간을 백테스트 엔진용 DataFrame으로 반환
+
+        interval을 주면 timeframe(기준) 캐시를 interval 봉으로 리샘플링해서 반환한다.
+        """
+        arrays = self.open_timeframe(exchange_id, symbol, timeframe, interval or timeframe)
+        arrays = arrays.window(start_ms, end_ms)
+        df = pd.DataFrame({
+            'timestamp': np.asarray(arrays.ts),
+            'open': arrays.open.astype(np.float64),
+            'high': arrays.high.astype(np.float64),
+            'low': arrays.low.astype(np.float64),
+            'close': arrays.close.astype(np.float64),
+            'volume': arrays.volume.astype(np.float64),
+        })
+        df['datetime'] = pd.to_datetime(df['timestamp'], unit='ms')
+        return df
+
+
+class OhlcvDownloader:
+    """시간 샤드 단위 동시 OHLCV 다운로더"""
+
+    FLUSH_CANDLES = 50_000  # 이 개수가 쌓이면 캐시에 병합 기록
+
+    def __init__(self, exchange_id: str, timeframe: str = '5m', cache: CandleCache = None,
+                 page_limit: int = 1000, concurrency: int = 8, max_retries: int = 5):
+        self.exchange_id = exchange_id
+        self.timeframe = timeframe
+        self.cache = cache or CandleCache()
+        self.page_limit = page_limit
+        self.concurrency = concurrency
+        self.max_retries = max_retries
+        self.tf_ms = timeframe_ms(timeframe)
+
+    def shards(self, start_ms: int, end_ms: int):
+        """[start, end) 구간을 한 페이지(page_limit 캔들) 크기의 샤드로 분할"""
+        span = self.page_limit * self.tf_ms
+        start_ms -= start_ms % self.tf_ms
+        return [(s, min(s + span, end_ms)) for s in range(start_ms, end_ms, span)]
+
+    async def _fetch_page(self, exchange, symbol: str, since: int, sem: asyncio.Semaphore):
+        """단일 페이지 조회 (샤드별 지수 백오프 재시도)"""
+        for attempt in range(1, self.max_retries + 1):
+            try:
+                async with sem:
+                    await request_scheduler.acquire_async(self.exchange_id, "fetch_ohlcv", "backtest")
+                    return await exchange.fetch_ohlcv(symbol, self.timeframe, since=since, limit=self.page_limit)
+            except ccxt.BadSymbol:
+                raise
+            except Exception:
+                if attempt == self.max_retries:
+                    raise
+                await asyncio.sleep(min(0.5 * 2 ** attempt, 10))
+
+    async def _fetch_shard(self, exchange, symbol: str, start: int, end: int, sem: asyncio.Semaphore):
+        rows = []
+        current = start
+        while current < end:
+            page = await self._fetch_page(exchange, symbol, current, sem)
+            page = [c for c in page or [] if c[0] < end]
+            if not page:
+                break
+            rows.extend(page)
+            current = page[-1][0] + self.tf_ms
+        return rows
+
+    def _shards_for(self, ranges):
+        return [shard for s, e in ranges for shard in self.shards(s, e)]
+
+    async def _fetch_shards(self, exchange, symbol: str, shards, sem: asyncio.Semaphore):
+        """샤드 동시 조회 → 완료 순으로 캐시 병합. (실패 샤드 목록, 수집 수, 중복 수) 반환"""
+        tasks = {
+            asyncio.create_task(self._fetch_shard(exchange, symbol, s, e, sem)): (s, e)
+            for s, e in shards
+        }
+        buffer, fetched, duplicates = [], 0, 0
+        try:
+            for task in asyncio.as_completed(tasks):
+                try:
+                    rows = await task
+                except ccxt.BadSymbol:
+                    raise
+                except Exception as e:
+                    print(f"    ⚠️ [{symbol}] 샤드 실패: {e}")
+                    continue
+                buffer.extend(rows)
+                fetched += len(rows)
+                if len(buffer) >= self.FLUSH_CANDLES:
+                    duplicates += self.cache.write(self.exchange_id, symbol, self.timeframe, buffer)
+                    buffer = []
+        finally:
+            for task in tasks:
+                task.cancel()
+        if buffer:
+            duplicates += self.cache.write(self.exchange_id, symbol, self.timeframe, buffer)
+        failed = [list(tasks[t]) for t in tasks if t.cancelled() or t.exception() is not None]
+        return failed, fetched, duplicates
+
+    async def _download_symbol(self, exchange, symbol: str, start_ms: int, end_ms: int,
+                               sem: asyncio.Semaphore) -> dict:
+        coverage = self.cache.read_coverage(self.exchange_id, symbol, self.timeframe)
+        # 아직 확정되지 않은 최근 캔들은 검증 대상에서 제외
+        settled_end = min(end_ms, int(time.time() * 1000) // self.tf_ms * self.tf_ms)
+        pending = subtract_ranges(start_ms, end_ms, coverage['covered'])
+        shards = self._shards_for(pending)
+
+        try:
+            failed, fetched, duplicates = await self._fetch_shards(exchange, symbol, shards, sem)
+
+            # 무결성 검사: 새로 받은 구간에서 누락된 캔들 구간만 재요청
+            ts = self.cache.open(self.exchange_id, symbol, self.timeframe).ts
+            gaps = [g for s, e in subtract_ranges(start_ms, settled_end, coverage['covered'] + failed)
+                    for g in find_gaps(ts, self.tf_ms, s, e)]
+            repaired = 0
+            if gaps:
+                before = len(ts)
+                failed_repair, _, dup = await self._fetch_shards(exchange, symbol, self._shards_for(gaps), sem)
+                failed += failed_repair
+                duplicates += dup
+                ts = self.cache.open(self.exchange_id, symbol, self.timeframe).ts
+                repaired = len(ts) - before
+                # 재요청이 실패한 구간은 결측으로 확정하지 않는다 (다음 실행에서 다시 받음)
+                gaps = [g for s, e in gaps for rs, re_ in subtract_ranges(s, e, failed_repair)
+                        for g in find_gaps(ts, self.tf_ms, rs, re_)]
+        except ccxt.BadSymbol:
+            return {'symbol': symbol, 'candles': 0, 'shards': len(shards), 'failed_shards': len(shards),
+                    'error': 'bad_symbol'}
+
+        # 커버리지 맵 갱신: 실패 샤드를 뺀 구간은 검증 완료, 재요청 후에도 빈 구간은 거래소 결측
+        verified = [r for s, e in pending for r in subtract_ranges(s, min(e, settled_end), failed)]
+        coverage['covered'] += verified
+        coverage['missing'] += gaps
+        coverage['duplicates_removed'] = coverage.get('duplicates_removed', 0) + duplicates
+        self.cache.write_coverage(self.exchange_id, symbol, self.timeframe, coverage)
+
+        return {
+            'symbol': symbol,
+            'candles': fetched,
+            'shards': len(shards),
+            'failed_shards': len(failed),
+            'repaired_candles': repaired,
+            'missing_ranges': len(gaps),
+            'duplicates_removed': duplicates,
+        }
+
+    async def download(self, symbols, start_ms: int, end_ms: int) -> dict:
+        """여러 심볼을 동시에 다운로드. 심볼별 요약 반환"""
+        exchange = create_async_exchange(self.exchange_id)
+        sem = asyncio.Semaphore(self.concurrency)
+        try:
+            results = await asyncio.gather(
+                *(self._download_symbol(exchange, s, start_ms, end_ms, sem) for s in symbols)
+            )
+        finally:
+            await exchange.close()
+        return {r['symbol']: r for r in results}
+
+    def run(self, symbols, start_ms: int, end_ms: int) -> dict:
+        return asyncio.run(self.download(symbols, start_ms, end_ms))
+
+    async def download_ranges(self, symbol: str, ranges) -> list:
+        """한 심볼의 흩어진 [start, end) 구간들 다운로드 (커버리지 맵 갱신이 겹치지 않도록 순차)"""
+        exchange = create_async_exchange(self.exchange_id)
+        sem = asyncio.Semaphore(self.concurrency)
+        try:
+            return [await self._download_symbol(exchange, symbol, s, e, sem) for s, e in merge_ranges(ranges)]
+        finally:
+            await exchange.close()
+
+    def run_ranges(self, symbol: str, ranges) -> list:
+        return asyncio.run(self.download_ranges(symbol, ranges))
@@ -0,0 +1,84 @@
+"""
+⚡ 고속 백테스트 커널 (단일 심볼, 배열 기반)
+
+BacktestEngine._run_simulation_with_data(INTRABAR_MODE='ohlc')와 같은 규칙을
+봉 단위 루프 대신 거래 단위로 계산한다. 진입 후 주기 구간 배열에서
+손절/트레일링/타임아웃의 첫 발생 위치를 numpy로 한 번에 찾으므로
+파라미터 탐색(WFA, 최적화)에서 시행 1회가 수 ms 안에 끝난다.
+
+규칙 (엔진과 동일)
+- 포지션이 없으면 종가 진입 (남은 데이터가 주기보다 짧으면 더 이상 진입 안 함)
+- 다음 봉부터 매 봉: 손절(Low) → 트레일링 활성화(High) → 피크 갱신 → 콜백(Low) → 타임아웃(종가)
+- 청산한 봉에서는 재진입하지 않고 다음 봉 종가에 진입
+- 진입 시 주기만큼 데이터가 남아 있으므로 모든 거래는 늦어도 타임아웃 봉에서 닫힌다
+"""
+
+import numpy as np
+
+EXIT_STOP_LOSS = 0
+EXIT_TRAILING_STOP = 1
+EXIT_TIMEOUT = 2
+EXIT_REASONS = ('stop_loss', 'trailing_stop', 'timeout')
+
+
+def _first(mask: np.ndarray, default: int) -> int:
+    hits = np.flatnonzero(mask)
+    return int(hits[0]) if len(hits) else default
+
+
+def simulate_trades(ts: np.ndarray, high: np.ndarray, low: np.ndarray, close: np.ndarray,
+                    stop_loss: float, activation: float, callback: float,
+                    cycle_hours: float) -> dict:
+    """거래 목록을 배열로 반환 (entry_idx, exit_idx, entry_price, exit_price, pnl_percent, reason)"""
+    ts = np.asarray(ts, dtype=np.int64)
+    high = np.asarray(high, dtype=np.float64)
+    low = np.asarray(low, dtype=np.float64)
+    close = np.asarray(close, dtype=np.float64)
+    n = len(ts)
+    cycle_ms = int(cycle_hours * 3600 * 1000)
+    keep = 1 - callback / 100
+
+    entries, exits, entry_prices, exit_prices, reasons = [], [], [], [], []
+    i = 0
+    while n and i < n and ts[-1] - ts[i] >= cycle_ms:
+        entry_price = close[i]
+
+        # 타임아웃 봉: 진입 후 cycle 이상 경과한 첫 봉 (남은 데이터 조건으로 항상 존재)
+        t_idx = int(np.searchsorted(ts, ts[i] + cycle_ms, side='left'))
+        lo, hi = i + 1, t_idx + 1
+        w_high, w_low = high[lo:hi], low[lo:hi]
+        span = hi - lo
+
+        # 각 조건이 처음 성립하는 봉 (같은 봉이면 손절 우선, 활성화는 손절 전까지만)
+        s = _first((w_low - entry_price) / entry_price * 100 <= stop_loss, span)
+        a = _first((w_high[:s] - entry_price) / entry_price * 100 >= activation, span)
+        b = span
+        if a < span:
+            peaks = np.maximum.accumulate(w_high[a:])
+            b = a + _first(w_low[a:] <= peaks * keep, span)
+
+        if s < span and s <= b:
+            j, reason, price = s, EXIT_STOP_LOSS, w_low[s]
+        elif b < span:
+            j, reason, price = b, EXIT_TRAILING_STOP, peaks[b - a] * keep
+        else:
+            j, reason, price = span - 1, EXIT_TIMEOUT, close[t_idx]
+        exit_idx = lo + j
+
+        entries.append(i)
+        exits.append(exit_idx)
+        entry_prices.append(entry_price)
+        exit_prices.append(price)
+        reasons.append(reason)
+        i = exit_idx + 1
+
+    entry_prices = np.asarray(entry_prices, dtype=np.float64)
+    exit_prices = np.asarray(exit_prices, dtype=np.float64)
+    return {
+        'entry_idx': np.asarray(entries, dtype=np.int64),
+        'exit_idx': np.asarray(exits, dtype=np.int64),
+        'entry_price': entry_prices,
+        'exit_price': exit_prices,
+        'pnl_percent': (exit_prices - entry_prices) / entry_prices * 100 if len(entries) else entry_prices,
+        'reason': np.asarray(reasons, dtype=np.int8),
+    }
@@ -0,0 +1,201 @@
+"""
+🔍 봉 내부(intrabar) 가격 경로 판정
+
+한 봉 안에서 손절/트레일링 활성화/콜백 중 두 개 이상이 걸릴 수 있으면 High와 Low 중
+무엇이 먼저였는지에 따라 결과가 달라진다. 이런 "애매한 봉"만 골라 가격 경로를 만들고
+walk_path로 순서대로 판정한다. 나머지 봉은 기존 OHLC 규칙을 그대로 쓴다.
+
+모드 (BacktestConfig.INTRABAR_MODE)
+- ohlc      : 기존 규칙 (손절 Low → 활성화 High → 콜백 Low). 경로를 만들지 않음
+- direction : 양봉은 O→L→H→C, 음봉은 O→H→L→C
+- drilldown : 1분봉을 direction 규칙으로 이어 붙인 경로. prepare에서 넓은 봉 구간의 1분봉을
+              OhlcvDownloader로 받아 두고, 그래도 없는 봉은 경고 후 direction으로 대체
+- sampled   : 시가에 가까운 극값을 먼저 방문할 확률로 H/L 순서를 샘플링 (시드 고정)
+"""
+
+import numpy as np
+
+from tests.candle_store import CandleCache, OhlcvDownloader, subtract_ranges
+
+
+def direction_path(o, h, l, c) -> np.ndarray:
+    """봉(들)을 방향 규칙으로 이어 붙인 가격 경로 (배열 입력이면 봉 순서대로 연결)"""
+    o, h, l, c = (np.atleast_1d(np.asarray(x, dtype=np.float64)) for x in (o, h, l, c))
+    up = c >= o
+    return np.stack([o, np.where(up, l, h), np.where(up, h, l), c]).ravel(order='F')
+
+
+def walk_path(path: np.ndarray, entry_price: float, is_ts_active: bool, peak_price,
+              stop_loss: float, activation: float, callback: float):
+    """경로를 따라가며 청산 판정 → (exit_reason, exit_price, is_ts_active, peak_price)
+
+    손절은 도달한 꼭짓점 가격, 트레일링은 콜백 기준가에 체결된 것으로 본다.
+    """
+    sl_price = entry_price * (1 + stop_loss / 100)
+    keep = 1 - callback / 100
+
+    if not is_ts_active:
+        hits = np.flatnonzero(path >= entry_price * (1 + activation / 100))
+        a = hits[0] if len(hits) else len(path)
+        sl_hits = np.flatnonzero(path[:a] <= sl_price)
+        if len(sl_hits):
+            return 'stop_loss', float(path[sl_hits[0]]), False, peak_price
+        if a == len(path):
+            return None, None, False, peak_price
+        path = path[a:]
+        peak_price = path[0]
+
+    peaks = np.maximum.accumulate(np.maximum(path, peak_price))
+    sl_hits = np.flatnonzero(path <= sl_price)
+    cb_hits = np.flatnonzero(path <= peaks * keep)
+    s = sl_hits[0] if len(sl_hits) else len(path)
+    j = cb_hits[0] if len(cb_hits) else len(path)
+    # 같은 꼭짓점에서 둘 다 걸리면 내려오는 길에 더 높은 기준가를 먼저 지난다
+    # (경로 시작점부터 이미 둘 다 아래인 갭은 손절)
+    if s == j and s < len(path) and s > 0 and peaks[s] * keep >= sl_price:
+        s = len(path)
+    if s < len(path) and s <= j:
+        return 'stop_loss', float(path[s]), True, float(peaks[s])
+    if j < len(path):
+        return 'trailing_stop', float(peaks[j] * keep), True, float(peaks[j])
+    return None, None, True, float(peaks[-1])
+
+
+class IntrabarResolver:
+    """기본(ohlc) 모드: 애매한 봉 판정만 제공하고 경로는 만들지 않는다"""
+
+    mode = 'ohlc'
+
+    def __init__(self, stop_loss: float, activation: float, callback: float):
+        self.stop_loss = stop_loss
+        self.activation = activation
+        self.callback = callback
+        self.keep = 1 - callback / 100
+        self.stats = {'mode': self.mode, 'ambiguous_bars': 0, 'fallback_bars': 0}
+
+    def prepare(self, exchange_id: str, symbol: str, df):
+        """시뮬레이션 전 한 번 호출 (심볼 데이터 로드 직후)"""
+
+    def is_ambiguous(self, position, high: float, low: float) -> bool:
+        """이 봉 안에서 임계값 두 개 이상이 걸려 순서에 따라 결과가 달라지는지"""
+        if (not position.is_ts_active and position.get_pnl_percent(high) >= self.activation
+                and position.get_pnl_percent(low) <= self.stop_loss):
+            # 손절과 활성화를 같이 건드리는 봉: (1+SL)/(1+ACT) > keep이면 콜백폭보다 좁아도 생긴다
+            return True
+        if low > high * self.keep:
+            return False  # 그 밖에 콜백폭보다 좁은 봉은 어떤 순서든 결과 동일
+        if position.is_ts_active:
+            # 피크 갱신, 또는 Low가 콜백 기준가와 손절가를 같이 뚫는 봉
+            # (내려오는 길엔 콜백이 먼저인데 ohlc 규칙은 손절로 판정)
+            return high > position.peak_price or position.get_pnl_percent(low) <= self.stop_loss
+        if position.get_pnl_percent(high) < self.activation:
+            return False
+        return True
+
+    def path(self, symbol: str, candle):
+        return None
+
+    def resolve(self, symbol: str, candle, position):
+        """애매한 봉이면 경로 판정 결과, 아니면 None (기존 규칙 사용)"""
+        if not self.is_ambiguous(position, candle['high'], candle['low']):
+            return None
+        self.stats['ambiguous_bars'] += 1
+        path = self.path(symbol, candle)
+        if path is None:
+            return None
+        return walk_path(path, position.entry_price, position.is_ts_active, position.peak_price,
+                         self.stop_loss, self.activation, self.callback)
+
+
+class DirectionResolver(IntrabarResolver):
+    mode = 'direction'
+
+    def path(self, symbol: str, candle):
+        return direction_path(candle['open'], candle['high'], candle['low'], candle['close'])
+
+
+class SampledResolver(IntrabarResolver):
+    mode = 'sampled'
+
+    def __init__(self, *args, seed: int = 42):
+        super().__init__(*args)
+        self.rng = np.random.default_rng(seed)
+
+    def path(self, symbol: str, candle):
+        o, h, l, c = candle['open'], candle['high'], candle['low'], candle['close']
+        p_high_first = (o - l) / (h - l) if h > l else 0.5
+        if self.rng.random() < p_high_first:
+            return np.array([o, h, l, c], dtype=np.float64)
+        return np.array([o, l, h, c], dtype=np.float64)
+
+
+class DrilldownResolver(DirectionResolver):
+    """애매할 수 있는 봉(콜백폭보다 넓은 봉)에 대해서만 1분봉 구간 인덱스를 미리 계산"""
+
+    mode = 'drilldown'
+
+    def __init__(self, *args, interval_ms: int, cache: CandleCache = None, timeframe: str = '1m',
+                 download: bool = True):
+        super().__init__(*args)
+        self.interval_ms = interval_ms
+        self.cache = cache or CandleCache()
+        self.timeframe = timeframe
+        self.download = download
+        self.sub_bars = {}  # symbol -> (CandleArrays, {bar ts: (lo, hi)})
+        self.stats.update(wide_bars=0, uncovered_bars=0)
+
+    def _fetch_windows(self, exchange_id: str, symbol: str, wide_ts: np.ndarray):
+        """아직 검증되지 않은 넓은 봉 구간의 1분봉만 다운로드"""
+        coverage = self.cache.read_coverage(exchange_id, symbol, self.timeframe)
+        known = coverage['covered'] + coverage['missing']
+        pending = [r for t in wide_ts.tolist() for r in subtract_ranges(t, t + self.interval_ms, known)]
+        if not pending:
+            return
+        print(f"  📥 [{symbol}] drilldown 1분봉 다운로드: 넓은 봉 {len(pending)}구간")
+        try:
+            OhlcvDownloader(exchange_id, self.timeframe, cache=self.cache).run_ranges(symbol, pending)
+        except Exception as e:
+            print(f"  ⚠️ [{symbol}] drilldown 1분봉 다운로드 실패: {e}")
+
+    def prepare(self, exchange_id: str, symbol: str, df):
+        high = df['high'].to_numpy()
+        low = df['low'].to_numpy()
+        wide_ts = df['timestamp'].to_numpy()[low <= high * self.keep].astype(np.int64)
+        if self.download and len(wide_ts):
+            self._fetch_windows(exchange_id, symbol, wide_ts)
+        sub = self.cache.open(exchange_id, symbol, self.timeframe)
+        lo = np.searchsorted(sub.ts, wide_ts, side='left')
+        hi = np.searchsorted(sub.ts, wide_ts + self.interval_ms, side='left')
+        self.sub_bars[symbol] = (sub, dict(zip(wide_ts.tolist(), zip(lo.tolist(), hi.tolist()))))
+
+        uncovered = int(np.count_nonzero(hi <= lo))
+        self.stats['wide_bars'] += len(wide_ts)
+        self.stats['uncovered_bars'] += uncovered
+        if uncovered:
+            print(f"  ⚠️ [{symbol}] drilldown: 넓은 봉 {len(wide_ts)}개 중 {uncovered}개는 1분봉 없음 "
+                  f"→ direction 규칙으로 대체 (stats['fallback_bars'] 확인)")
+
+    def path(self, symbol: str, candle):
+        sub, index = self.sub_bars.get(symbol, (None, {}))
+        lo, hi = index.get(int(candle['timestamp']), (0, 0))
+        if hi <= lo:
+            self.stats['fallback_bars'] += 1
+            return super().path(symbol, candle)
+        return direction_path(sub.open[lo:hi], sub.high[lo:hi], sub.low[lo:hi], sub.close[lo:hi])
+
+
+INTRABAR_RESOLVERS = {
+    'ohlc': IntrabarResolver,
+    'direction': DirectionResolver,
+    'drilldown': DrilldownResolver,
+    'sampled': SampledResolver,
+}
+
+
+def make_resolver(mode: str, stop_loss: float, activation: float, callback: float,
+                  interval_ms: int) -> IntrabarResolver:
+    if mode not in INTRABAR_RESOLVERS:
+        raise ValueError(f"알 수 없는 INTRABAR_MODE: {mode} (가능: {', '.join(INTRABAR_RESOLVERS)})")
+    if mode == 'drilldown':
+        return DrilldownResolver(stop_loss, activation, callback, interval_ms=interval_ms)
+    return INTRABAR_RESOLVERS[mode](stop_loss, activation, callback)
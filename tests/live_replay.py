@@ -0,0 +1,356 @@
+"""
+⏩ 실전 스케줄러 가속 리플레이
+
+실제 CasinoScheduler(job_daily_bet_callback / selection_timeout_callback /
+check_48h_exit_callback)를 녹화 캔들 위에서 가상 시계로 돌린다.
+
+- 시계: core.clock에 VirtualClock을 설치해 datetime.now()/time.time()/재시도 sleep을 대체
+- JobQueue: ReplayJobQueue가 run_repeating/run_once/get_jobs_by_name을 흉내 내고,
+  다음 잡 시각으로 가상 시계를 점프시키며 순서대로 실행 (72시간 주기도 대기 없음)
+- 거래소: exchange.simulator.SimulatedExchange (같은 가상 시계로 캔들 재생)
+- 텔레그램: ReplayBot이 메시지를 기록만 하고, 후보 선택은 실전처럼 타임아웃 자동 선택
+- 상태 파일 / 레이트 리밋 상태는 임시 디렉터리에 쓰고, 끝나면 설정을 원래대로 돌린다
+
+--symbol로 매 사이클 같은 종목을 고르게 하면(스캐너 우회) 각 실전 거래를 같은 진입가/
+시각에서 백테스터(BacktestEngine.check_exit_conditions)로 다시 청산해 비교한다.
+실전은 감시 시점의 현재가(봉 종가)만 보고 백테스터는 봉 High/Low를 보므로,
+사유/시각이 다른 거래는 그 차이에서 나온다.
+
+사용법:
+    python tests/live_replay.py BTC/USDT,ETH/USDT,SOL/USDT 2024-01-01 2024-06-30 --exchange mexc
+    python tests/live_replay.py PEPE/USDT 2024-01-01 2024-12-31 --symbol PEPE/USDT --compare
+    python tests/live_replay.py PEPE/USDT 2024-01-01 2024-03-31 --symbol PEPE/USDT --latency 30,120 --partial-fill 0.8
+"""
+
+import os
+import sys
+import argparse
+import asyncio
+import heapq
+import itertools
+import json
+import random
+import shutil
+import tempfile
+import time
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+import pandas as pd
+
+# 단독 실행(python tests/live_replay.py) 시에도 루트 패키지 import
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from core import clock, config, state_manager
+from core.scheduler_engine import CasinoScheduler
+from core.strategy import Position
+from exchange.mexc import MexcConnector
+from exchange.rate_limiter import request_scheduler
+from exchange.simulator import SimulatedExchange
+from tests.backtester import BacktestEngine
+from tests.candle_store import CandleCache, OhlcvDownloader
+from utils.logger import logger
+
+TIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+WARMUP = timedelta(hours=24)  # 24시간 변화율/거래대금 계산용 선행 구간
+REPLAY_CHAT_ID = "replay"
+
+
+class ReplayJob:
+    """telegram.ext.Job 중 스케줄러가 쓰는 속성만 (callback, data, chat_id, name, schedule_removal)"""
+
+    def __init__(self, callback, interval, data, chat_id, name):
+        self.callback = callback
+        self.interval = interval
+        self.data = data
+        self.chat_id = chat_id
+        self.name = name
+        self.removed = False
+
+    def schedule_removal(self):
+        self.removed = True
+
+
+class ReplayJobQueue:
+    """가상 시계 기반 JobQueue (실행 예정 시각 힙)"""
+
+    def __init__(self, virtual_clock, bot=None):
+        self.clock = virtual_clock
+        self.bot = bot
+        self._heap = []
+        self._seq = itertools.count()
+        self.executed = 0
+
+    def _push(self, due: datetime, job: ReplayJob):
+        heapq.heappush(self._heap, (due, next(self._seq), job))
+
+    def run_repeating(self, callback, interval, first=0, data=None, chat_id=None, name=None):
+        job = ReplayJob(callback, interval, data, chat_id, name)
+        self._push(self.clock.now() + timedelta(seconds=first), job)
+        return job
+
+    def run_once(self, callback, when, data=None, chat_id=None, name=None):
+        job = ReplayJob(callback, None, data, chat_id, name)
+        self._push(self.clock.now() + timedelta(seconds=when), job)
+        return job
+
+    def get_jobs_by_name(self, name):
+        return [job for _, _, job in self._heap if job.name == name and not job.removed]
+
+    async def run_until(self, end: datetime):
+        """end 이전 예정 잡을 시각 순서대로 실행"""
+        while self._heap and self._heap[0][0] <= end:
+            due, _, job = heapq.heappop(self._heap)
+            if job.removed:
+                continue
+            self.clock.set(due)
+            context = SimpleNamespace(job=job, job_queue=self, bot=self.bot)
+            await job.callback(context)
+            self.executed += 1
+            if job.interval and not job.removed:
+                self._push(due + timedelta(seconds=job.interval), job)
+
+
+class ReplayBot:
+    """CasinoBot 대역: 전송 메시지를 (가상 시각, 종류, 내용)으로 기록"""
+
+    def __init__(self, virtual_clock):
+        self.clock = virtual_clock
+        self.messages = []
+
+    async def send_message(self, text):
+        self.messages.append((self.clock.now().strftime(TIME_FORMAT), "message", text))
+
+    async def send_candidate_selection(self, candidates, chat_id=None):
+        symbols = ", ".join(c['symbol'] for c in candidates)
+        self.messages.append((self.clock.now().strftime(TIME_FORMAT), "selection", symbols))
+        return len(self.messages)
+
+
+class LiveReplay:
+    """녹화 캔들 + 가상 시계로 CasinoScheduler 구동"""
+
+    def __init__(self, frames: dict, symbol: str = None, cycle_hours: int = None, seed: int = 0,
+                 quiet: bool = True, **simulator_options):
+        """
+        frames: {symbol: CandleCache.load_frame 형식 DataFrame}
+        symbol: 지정하면 스캐너 대신 매 사이클 이 종목을 후보로 제시
+        cycle_hours: 지정하면 config 주기(CYCLE_*)를 리플레이 동안 덮어씀
+        simulator_options: SimulatedExchange 옵션 (latency_ms, error_rate, partial_fill_ratio ...)
+        """
+        self.frames = frames
+        self.symbol = symbol
+        self.cycle_hours = cycle_hours
+        self.seed = seed
+        self.quiet = quiet
+        self.simulator_options = simulator_options
+
+    def _fixed_candidates(self, count=3):
+        ticker = self.exchange.fetch_ticker(self.symbol)
+        return [{
+            'symbol': self.symbol,
+            'change': ticker['percentage'] or 0.0,
+            'volume': ticker['quoteVolume'],
+            'score': 0.0,
+            'last_price': ticker['last'],
+        }]
+
+    def _override_config(self, start: datetime) -> dict:
+        names = ('FIRST_TRADE_START_AT', 'CYCLE_HOURS', 'CYCLE_MINUTES', 'CYCLE_DELTA',
+                 'CYCLE_SECONDS', 'CYCLE_STRING')
+        saved = {name: getattr(config, name) for name in names}
+        config.FIRST_TRADE_START_AT = start.strftime(TIME_FORMAT)
+        if self.cycle_hours:
+            config.CYCLE_HOURS, config.CYCLE_MINUTES = self.cycle_hours, 0
+            config.CYCLE_DELTA = timedelta(hours=self.cycle_hours)
+            config.CYCLE_SECONDS = int(config.CYCLE_DELTA.total_seconds())
+            config.CYCLE_STRING = f"{self.cycle_hours}시간"
+        return saved
+
+    def run(self, start: datetime = None, end: datetime = None) -> dict:
+        """[start, end] 리플레이. 기본 구간은 (첫 캔들 + 24시간) ~ 마지막 캔들"""
+        first = min(df['datetime'].iloc[0] for df in self.frames.values()).to_pydatetime()
+        last = max(df['datetime'].iloc[-1] for df in self.frames.values()).to_pydatetime()
+        start = start or first + WARMUP
+        end = end or last
+
+        virtual_clock = clock.VirtualClock(start)
+        workdir = tempfile.mkdtemp(prefix="boracay_replay_")
+        saved_config = self._override_config(start)
+        saved_paths = (state_manager.STATE_FILE, request_scheduler.state_path, request_scheduler.lock_path)
+        previous_clock = clock.install(virtual_clock)
+        logger_disabled = logger.disabled
+        try:
+            state_manager.STATE_FILE = os.path.join(workdir, "casino_state.json")
+            request_scheduler.state_path = os.path.join(workdir, "rate_limit_state.json")
+            request_scheduler.lock_path = f"{request_scheduler.state_path}.lock"
+            logger.disabled = self.quiet or logger_disabled
+            random.seed(self.seed)
+
+            options = dict(self.simulator_options)
+            options.setdefault('seed', self.seed)
+            self.exchange = SimulatedExchange(
+                self.frames, clock=virtual_clock.time_ms,
+                sleep=virtual_clock.advance, **options,
+            )
+            bot = ReplayBot(virtual_clock)
+            mexc = MexcConnector(exchange=self.exchange, markets=self.exchange.metadata_cache())
+            casino = CasinoScheduler(mexc, bot)
+            if self.symbol:
+                casino.scanner.find_candidates = self._fixed_candidates
+
+            # main.on_startup과 같은 잡 구성
+            job_queue = ReplayJobQueue(virtual_clock, bot)
+            job_queue.run_repeating(casino.job_daily_bet_callback, interval=config.CYCLE_SECONDS, first=0,
+                                    data=REPLAY_CHAT_ID, chat_id=REPLAY_CHAT_ID, name="daily_bet")
+            job_queue.run_repeating(casino.check_48h_exit_callback, interval=config.CHECK_INTERVAL, first=5,
+                                    data=REPLAY_CHAT_ID, chat_id=REPLAY_CHAT_ID, name="check_exit")
+
+            started = time.perf_counter()
+            asyncio.run(job_queue.run_until(end))
+            elapsed = time.perf_counter() - started
+
+            return {
+                'start': start.strftime(TIME_FORMAT),
+                'end': end.strftime(TIME_FORMAT),
+                'cycle_hours': config.CYCLE_SECONDS / 3600,
+                'wall_seconds': round(elapsed, 3),
+                'jobs_executed': job_queue.executed,
+                'history': casino.state.state['history'],
+                'active_bet': casino.state.get_active_bet(),
+                'messages': bot.messages,
+                'exchange_calls': self.exchange.call_stats(),
+                'balances': dict(self.exchange.balances),
+            }
+        finally:
+            clock.install(previous_clock)
+            logger.disabled = logger_disabled
+            state_manager.STATE_FILE, request_scheduler.state_path, request_scheduler.lock_path = saved_paths
+            for name, value in saved_config.items():
+                setattr(config, name, value)
+            shutil.rmtree(workdir, ignore_errors=True)
+
+
+def compare_with_backtest(history: list, frames: dict, cycle_hours: float) -> dict:
+    """실전 리플레이 거래를 같은 진입가/시각에서 백테스터 청산 규칙으로 다시 청산해 비교"""
+    rows = []
+    for bet in history:
+        if bet.get('exit_reason') not in ('stop_loss', 'trailing_stop', 'timeout'):
+            continue
+        df = frames[bet['symbol']]
+        entry_time = datetime.strptime(bet['entry_time'], TIME_FORMAT)
+        engine = BacktestEngine(cycle_hours)
+        engine.position = Position(bet['symbol'], bet['entry_price'], bet['amount_usdt'], entry_time)
+
+        backtest = {'reason': 'simulation_end', 'exit_time': None, 'pnl_percent': None}
+        for _, candle in df[df['datetime'] > entry_time].iterrows():
+            should_exit, reason = engine.check_exit_conditions(candle)
+            if should_exit:
+                exit_price = engine.get_exit_price(candle, reason)
+                backtest = {
+                    'reason': reason,
+                    'exit_time': candle['datetime'].strftime(TIME_FORMAT),
+                    'pnl_percent': round(engine.position.get_pnl_percent(exit_price), 2),
+                }
+                break
+
+        # 실전 감시 시각(잡 오프셋 포함)을 그 시점의 봉 시작 시각으로 맞춰 비교
+        exit_time = datetime.strptime(bet['exit_time'], TIME_FORMAT)
+        live_candle = df['datetime'][df['datetime'] <= exit_time].iloc[-1].strftime(TIME_FORMAT)
+        rows.append({
+            'symbol': bet['symbol'],
+            'entry_time': bet['entry_time'],
+            'live_reason': bet['exit_reason'],
+            'backtest_reason': backtest['reason'],
+            'live_exit_time': bet['exit_time'],
+            'backtest_exit_time': backtest['exit_time'],
+            'live_pnl_percent': bet['pnl_percent'],
+            'backtest_pnl_percent': backtest['pnl_percent'],
+            'match': bet['exit_reason'] == backtest['reason'] and live_candle == backtest['exit_time'],
+        })
+    matched = sum(r['match'] for r in rows)
+    return {'trades': len(rows), 'matched': matched, 'mismatches': [r for r in rows if not r['match']]}
+
+
+def load_frames(exchange_id: str, symbols, timeframe: str, start_ms: int, end_ms: int) -> dict:
+    """캔들 캐시를 채운 뒤(누락 구간만 다운로드) 심볼별 DataFrame 반환"""
+    downloader = OhlcvDownloader(exchange_id, timeframe)
+    downloader.run(symbols, start_ms, end_ms)
+    cache = downloader.cache or CandleCache()
+    frames = {}
+    for symbol in symbols:
+        df = cache.load_frame(exchange_id, symbol, timeframe, start_ms, end_ms)
+        if df.empty:
+            print(f"  ⚠️ 캔들 없음: {symbol} (제외)")
+            continue
+        frames[symbol] = df
+    return frames
+
+
+def main():
+    parser = argparse.ArgumentParser(description='실전 스케줄러 가속 리플레이 (가상 시계 + 오프라인 거래소)')
+    parser.add_argument('symbols', help='리플레이할 심볼 목록 (쉼표 구분)')
+    parser.add_argument('start_date', help='시작일 (YYYY-MM-DD, 첫 24시간은 선행 구간)')
+    parser.add_argument('end_date', help='종료일 (YYYY-MM-DD)')
+    parser.add_argument('--exchange', default='mexc', help='캔들 거래소 (기본: mexc)')
+    parser.add_argument('--timeframe', default='5m')
+    parser.add_argument('--symbol', default=None, help='스캐너 대신 매 사이클 고정으로 고를 종목')
+    parser.add_argument('--cycle-hours', type=int, default=None, help='주기 덮어쓰기 (기본: core/config.py)')
+    parser.add_argument('--latency', default='0', help='거래소 호출 지연 ms (예: 50 또는 30,120)')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='호출별 NetworkError 확률')
+    parser.add_argument('--partial-fill', type=float, default=1.0, help='시장가 체결 비율')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--compare', action='store_true', help='거래별로 백테스터 청산 결과와 비교')
+    parser.add_argument('--verbose', action='store_true', help='봇 로그 출력')
+    parser.add_argument('--output', '-o', default=None, help='결과 JSON 저장 경로')
+    args = parser.parse_args()
+
+    symbols = [s.strip() for s in args.symbols.split(',') if s.strip()]
+    if args.symbol and args.symbol not in symbols:
+        symbols.append(args.symbol)
+    start_ms = int(pd.Timestamp(args.start_date).value // 10**6)
+    end_ms = int(pd.Timestamp(args.end_date).value // 10**6) + 86_400_000 - 1
+
+    print(f"📦 캔들 준비: {args.exchange} {symbols} ({args.start_date} ~ {args.end_date})")
+    frames = load_frames(args.exchange, symbols, args.timeframe, start_ms, end_ms)
+    if not frames or (args.symbol and args.symbol not in frames):
+        print("❌ 리플레이할 캔들이 없음")
+        sys.exit(1)
+
+    latency = [float(v) for v in args.latency.split(',')]
+    replay = LiveReplay(
+        frames, symbol=args.symbol, cycle_hours=args.cycle_hours, seed=args.seed, quiet=not args.verbose,
+        latency_ms=tuple(latency) if len(latency) == 2 else latency[0],
+        error_rate=args.error_rate, partial_fill_ratio=args.partial_fill,
+    )
+    result = replay.run()
+
+    history = result['history']
+    span_days = (datetime.strptime(result['end'], TIME_FORMAT)
+                 - datetime.strptime(result['start'], TIME_FORMAT)).total_seconds() / 86400
+    print(f"\n{'='*60}")
+    print(f"⏩ 리플레이 완료: {result['start']} ~ {result['end']} ({span_days:.0f}일)")
+    print(f"{'='*60}")
+    print(f"  - 소요: {result['wall_seconds']:.2f}s (잡 {result['jobs_executed']:,}회)")
+    print(f"  - 거래: {len(history)}건, 누적 PNL {sum(b['pnl_percent'] for b in history):+.2f}%")
+    reasons = pd.Series([b['exit_reason'] for b in history]).value_counts().to_dict() if history else {}
+    print(f"  - 청산 사유: {reasons}")
+    for method, s in sorted(result['exchange_calls'].items()):
+        print(f"  - {method:<16} {s['count']:>7,}회  오류 {s['errors']}")
+
+    if args.compare:
+        comparison = compare_with_backtest(history, frames, result['cycle_hours'])
+        result['backtest_comparison'] = comparison
+        print(f"\n🔍 백테스터 비교: {comparison['matched']}/{comparison['trades']}건 일치 (사유 + 청산 봉)")
+        for r in comparison['mismatches'][:10]:
+            print(f"  - {r['entry_time']} {r['symbol']}: 실전 {r['live_reason']} {r['live_exit_time']} "
+                  f"({r['live_pnl_percent']:+.2f}%) / 백테스트 {r['backtest_reason']} {r['backtest_exit_time']} "
+                  f"({r['backtest_pnl_percent'] if r['backtest_pnl_percent'] is not None else 0:+.2f}%)")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(result, f, indent=2, ensure_ascii=False, default=str)
+        print(f"💾 결과 저장: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
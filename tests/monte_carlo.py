@@ -0,0 +1,287 @@
+"""
+🎲 Monte Carlo 자금 경로 시뮬레이터
+
+백테스트 한 번은 랜덤 선택 결과 중 하나의 경로일 뿐이라 파산 시점/최고 잔고가
+우연에 크게 좌우된다. 과거 거래 수익률 분포에서 경로를 대량으로 다시 뽑아
+파산 확률, 최대 낙폭 분위수, 최종 잔고 분포를 계산한다.
+
+- bootstrap : 백테스트 거래들의 pnl_percent를 복원 추출
+- picks     : 사이클별 후보 풀 수익률 행렬(cycles × pool, 빈 칸 NaN)에서
+              매 사이클 한 종목을 랜덤 선택 (스캐너 모드의 상위 20개 랜덤 선택 재현)
+              행렬은 --build-pool로 로컬 캔들 캐시에서 만든다 (build_pick_pool)
+
+경로는 (paths × trades) 배열로 청크 단위 일괄 계산한다. 베팅액이 고정이라
+잔고 경로는 거래별 손익의 누적합이고, 잔고가 BET_AMOUNT 아래로 내려가면
+그 시점에서 파산으로 보고 이후 잔고를 고정한다.
+
+사용법:
+    python tests/monte_carlo.py backtest_result.json --cycle 72h --paths 100000
+    python tests/monte_carlo.py backtest_result.trades.npz --paths 100000
+    python tests/monte_carlo.py --pool pool_pnl.npy --paths 100000
+    python tests/monte_carlo.py --build-pool BTC/USDT,ETH/USDT,... --start 2024-01-01 --end 2024-12-31 \
+        --exchange binance --pool pool_pnl.npy
+"""
+
+import os
+import sys
+import argparse
+import json
+import time
+from datetime import datetime
+
+import numpy as np
+
+# 단독 실행(python tests/monte_carlo.py) 시에도 루트 패키지 import
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from tests.backtester import BacktestConfig
+from tests.candle_store import CandleCache, OhlcvDownloader, timeframe_ms
+from tests.fast_kernel import simulate_trades
+from tests.trade_log import DAY_MS, load_trade_log, select_cycle, to_ms
+
+CHUNK_PATHS = 10_000  # 청크당 경로 수 (paths × trades float32 배열 메모리 제한)
+DRAWDOWN_QUANTILES = (50, 90, 95, 99)
+BALANCE_QUANTILES = (1, 5, 25, 50, 75, 95, 99)
+
+# 후보 풀 재현용 스캐너 조건 (core/scanner.py와 동일): (최소 변동률%, 최대 변동률%, 최소 거래대금)
+SCANNER_TIERS = ((15.0, 40.0, 1_000_000), (10.0, 40.0, 500_000))
+POOL_SIZE = 20
+
+
+def load_trade_returns(path: str, cycle: str = None) -> np.ndarray:
+    """백테스트 결과(JSON 인덱스/이전 JSON/.trades.npz)에서 거래별 pnl_percent 추출 (cycle 미지정 시 전 주기 합침)"""
+    log = load_trade_log(path)
+    if cycle:
+        log = select_cycle(log, cycle)
+    if not len(log['pnl_percent']):
+        raise ValueError(f"거래 내역 없음: {path}")
+    return log['pnl_percent'].astype(np.float64)
+
+
+def load_pick_pool(path: str) -> np.ndarray:
+    """사이클별 후보 풀 수익률 행렬 로드 (.npy 또는 JSON 2차원 리스트, 빈 칸은 NaN/null)"""
+    if path.endswith('.npy'):
+        pool = np.load(path)
+    else:
+        with open(path, 'r', encoding='utf-8') as f:
+            pool = np.array(json.load(f), dtype=np.float64)
+    if pool.ndim != 2 or not np.isfinite(pool).any(axis=1).all():
+        raise ValueError("풀 행렬은 (cycles × pool) 2차원이고 사이클마다 후보가 1개 이상 있어야 함")
+    return pool
+
+
+def build_pick_pool(exchange_id: str, symbols, timeframe: str, start_ms: int, end_ms: int,
+                    cycle_hours: float, stop_loss: float = BacktestConfig.STOP_LOSS_THRESHOLD,
+                    activation: float = BacktestConfig.TS_ACTIVATION_REWARD,
+                    callback: float = BacktestConfig.TS_CALLBACK_RATE,
+                    pool_size: int = POOL_SIZE, cache: CandleCache = None) -> np.ndarray:
+    """로컬 캔들 캐시로 사이클 시작마다 스캐너를 재현해 후보 풀 수익률 행렬 생성 → (cycles, pool_size)
+
+    사이클 시작 시각 t에 심볼별 24시간 변동률/거래대금을 t 이전에 닫힌 봉으로 계산하고,
+    스캐너와 같은 조건/스코어로 상위 pool_size개를 고른다. 후보마다 마지막 봉 종가에 진입해
+    fast_kernel 규칙(손절 → 트레일링 → 타임아웃)으로 청산한 수익률을 채운다.
+    후보가 없는 사이클은 행을 만들지 않는다 (실전도 그 사이클은 쉰다).
+    """
+    cache = cache or CandleCache()
+    tf_ms = timeframe_ms(timeframe)
+    cycle_ms = int(cycle_hours * 3600 * 1000)
+    data = {}
+    for symbol in symbols:
+        arrays = cache.open(exchange_id, symbol, timeframe)
+        if len(arrays):
+            data[symbol] = (np.asarray(arrays.ts), np.asarray(arrays.high, dtype=np.float64),
+                            np.asarray(arrays.low, dtype=np.float64), np.asarray(arrays.close, dtype=np.float64),
+                            np.asarray(arrays.volume, dtype=np.float64))
+
+    rows = []
+    for t in range(start_ms, end_ms - cycle_ms + 1, cycle_ms):
+        scored = []
+        for symbol, (ts, high, low, close, volume) in data.items():
+            i = int(np.searchsorted(ts, t - tf_ms, side='right')) - 1        # t 이전에 닫힌 마지막 봉
+            j = int(np.searchsorted(ts, t - tf_ms - DAY_MS, side='right')) - 1  # 24시간 전 봉
+            if j < 0 or i <= j or ts[i] < t - 2 * tf_ms:
+                continue
+            change = (close[i] / close[j] - 1) * 100
+            quote_volume = float(np.dot(close[j + 1:i + 1], volume[j + 1:i + 1]))
+            scored.append((symbol, i, change, quote_volume))
+
+        pool = []
+        for low_change, high_change, min_volume in SCANNER_TIERS:
+            pool = [(change * (1 + quote_volume / 1_000_000 * 0.1), symbol, i)
+                    for symbol, i, change, quote_volume in scored
+                    if low_change <= change <= high_change and quote_volume >= min_volume]
+            if pool:
+                break
+        pool.sort(reverse=True)
+
+        returns = []
+        for _, symbol, i in pool[:pool_size]:
+            ts, high, low, close, _ = data[symbol]
+            end = int(np.searchsorted(ts, ts[i] + cycle_ms, side='right'))
+            trades = simulate_trades(ts[i:end], high[i:end], low[i:end], close[i:end],
+                                     stop_loss, activation, callback, cycle_hours)
+            if len(trades['entry_idx']) and trades['entry_idx'][0] == 0:
+                returns.append(float(trades['pnl_percent'][0]))
+        if returns:
+            rows.append(returns + [np.nan] * (pool_size - len(returns)))
+    return np.array(rows, dtype=np.float64).reshape(-1, pool_size)
+
+
+def bootstrap_returns(returns: np.ndarray, n_paths: int, n_trades: int, rng) -> np.ndarray:
+    """거래 수익률 복원 추출 → (n_paths, n_trades)"""
+    return returns[rng.integers(0, len(returns), size=(n_paths, n_trades))]
+
+
+def pick_returns(pool: np.ndarray, n_paths: int, rng) -> np.ndarray:
+    """사이클마다 유효 후보 중 하나를 균등 선택 → (n_paths, cycles)"""
+    valid = np.isfinite(pool)
+    counts = valid.sum(axis=1)
+    # 유효 후보를 앞으로 모은 행렬에서 [0, count) 범위 인덱스를 뽑는다
+    order = np.argsort(~valid, axis=1, kind='stable')
+    packed = np.take_along_axis(pool, order, axis=1)
+    ranks = (rng.random((n_paths, len(pool))) * counts).astype(np.int64)
+    return packed[np.arange(len(pool)), ranks]
+
+
+def simulate_paths(pnl_percent: np.ndarray, initial_balance: float, bet_amount: float,
+                   fee_percent: float) -> dict:
+    """(paths × trades) 수익률 → 경로별 최종 잔고/최대 낙폭/파산 여부"""
+    pnl = bet_amount * (pnl_percent.astype(np.float32) / 100) * (1 - fee_percent / 100)
+    balances = initial_balance + np.cumsum(pnl, axis=1, dtype=np.float32)
+
+    below = balances < bet_amount
+    ruined = below.any(axis=1)
+    ruin_at = np.where(ruined, below.argmax(axis=1), balances.shape[1])
+    # 파산 이후 잔고는 파산 시점 값으로 고정
+    after = np.arange(balances.shape[1]) > ruin_at[:, None]
+    ruin_balance = balances[np.arange(len(balances)), np.minimum(ruin_at, balances.shape[1] - 1)]
+    balances = np.where(after, ruin_balance[:, None], balances)
+
+    peaks = np.maximum.accumulate(np.maximum(balances, initial_balance), axis=1)
+    max_drawdown = ((peaks - balances) / peaks).max(axis=1) * 100
+    return {
+        'final_balance': balances[:, -1],
+        'peak_balance': peaks[:, -1],
+        'max_drawdown': max_drawdown,
+        'ruined': ruined,
+        'ruin_at': ruin_at,
+    }
+
+
+def run_monte_carlo(n_paths: int, returns: np.ndarray = None, pool: np.ndarray = None,
+                    n_trades: int = None, initial_balance: float = BacktestConfig.INITIAL_BALANCE,
+                    bet_amount: float = BacktestConfig.BET_AMOUNT,
+                    fee_percent: float = BacktestConfig.TRADING_FEE_PERCENT, seed: int = 42) -> dict:
+    """Monte Carlo 실행 후 분포 요약 반환 (returns=bootstrap, pool=picks 모드)"""
+    if (returns is None) == (pool is None):
+        raise ValueError("returns(bootstrap) 또는 pool(picks) 중 하나만 지정")
+    rng = np.random.default_rng(seed)
+    if pool is not None:
+        n_trades = len(pool)
+    else:
+        n_trades = n_trades or len(returns)
+
+    chunks = []
+    for start in range(0, n_paths, CHUNK_PATHS):
+        size = min(CHUNK_PATHS, n_paths - start)
+        if pool is not None:
+            sample = pick_returns(pool, size, rng)
+        else:
+            sample = bootstrap_returns(returns, size, n_trades, rng)
+        chunks.append(simulate_paths(sample, initial_balance, bet_amount, fee_percent))
+    paths = {k: np.concatenate([c[k] for c in chunks]) for k in chunks[0]}
+
+    ruined = paths['ruined']
+    return {
+        'mode': 'picks' if pool is not None else 'bootstrap',
+        'paths': n_paths,
+        'trades_per_path': n_trades,
+        'initial_balance': initial_balance,
+        'bet_amount': bet_amount,
+        'ruin_probability': round(float(ruined.mean()) * 100, 2),
+        'median_trades_to_ruin': int(np.median(paths['ruin_at'][ruined]) + 1) if ruined.any() else None,
+        'max_drawdown_percent': {
+            f"p{q}": round(float(v), 2)
+            for q, v in zip(DRAWDOWN_QUANTILES, np.percentile(paths['max_drawdown'], DRAWDOWN_QUANTILES))
+        },
+        'final_balance': {
+            'mean': round(float(paths['final_balance'].mean()), 2),
+            **{
+                f"p{q}": round(float(v), 2)
+                for q, v in zip(BALANCE_QUANTILES, np.percentile(paths['final_balance'], BALANCE_QUANTILES))
+            },
+        },
+        'profit_probability': round(float((paths['final_balance'] > initial_balance).mean()) * 100, 2),
+    }
+
+
+def print_monte_carlo_report(report: dict):
+    """Monte Carlo 리포트 출력"""
+    print(f"\n{'='*80}")
+    print(f"🎲 Monte Carlo 리포트 ({report['mode']}, {report['paths']:,} paths × {report['trades_per_path']} trades)")
+    print(f"{'='*80}")
+    print(f"  초기 자산: {report['initial_balance']} USDT, 베팅액: {report['bet_amount']} USDT")
+    print(f"  파산 확률: {report['ruin_probability']}%", end='')
+    if report['median_trades_to_ruin']:
+        print(f" (파산 경로 중앙값 {report['median_trades_to_ruin']}번째 거래)")
+    else:
+        print()
+    print(f"  수익 확률: {report['profit_probability']}%")
+    print(f"  최대 낙폭: {report['max_drawdown_percent']}")
+    print(f"  최종 잔고: {report['final_balance']}")
+    print(f"{'='*80}\n")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Boracay Casino Monte Carlo 자금 경로 시뮬레이션')
+    parser.add_argument('result', nargs='?', help='백테스트 결과 JSON (bootstrap 모드)')
+    parser.add_argument('--cycle', help='사용할 주기 (예: 72h, 기본: 전 주기 합침)', default=None)
+    parser.add_argument('--pool', help='사이클별 후보 풀 수익률 행렬 .npy/.json (picks 모드)', default=None)
+    parser.add_argument('--build-pool', help='후보 유니버스 심볼(쉼표 구분)로 --pool 행렬을 만든 뒤 picks 실행',
+                        default=None)
+    parser.add_argument('--start', help='--build-pool 시작일 (YYYY-MM-DD)', default=None)
+    parser.add_argument('--end', help='--build-pool 종료일 (YYYY-MM-DD)', default=None)
+    parser.add_argument('--exchange', help='--build-pool 캔들 거래소', default='mexc')
+    parser.add_argument('--timeframe', help='--build-pool 캔들 타임프레임', default=BacktestConfig.BASE_TIMEFRAME)
+    parser.add_argument('--cycle-hours', type=float, default=72, help='--build-pool 주기 (시간)')
+    parser.add_argument('--paths', type=int, default=100_000, help='경로 수')
+    parser.add_argument('--trades', type=int, default=None, help='경로당 거래 수 (bootstrap, 기본: 원본 거래 수)')
+    parser.add_argument('--balance', type=float, default=BacktestConfig.INITIAL_BALANCE, help='초기 자산')
+    parser.add_argument('--bet', type=float, default=BacktestConfig.BET_AMOUNT, help='베팅액')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', '-o', help='결과 JSON 저장 경로', default=None)
+    args = parser.parse_args()
+
+    if bool(args.result) == bool(args.pool):
+        parser.error("백테스트 결과 JSON 또는 --pool 중 하나를 지정")
+
+    if args.build_pool:
+        if not (args.start and args.end and args.pool.endswith('.npy')):
+            parser.error("--build-pool에는 --start, --end, --pool(.npy 저장 경로)이 필요")
+        symbols = [s.strip() for s in args.build_pool.split(',') if s.strip()]
+        start_ms = to_ms(datetime.strptime(args.start, "%Y-%m-%d"))
+        end_ms = to_ms(datetime.strptime(args.end, "%Y-%m-%d")) + DAY_MS
+        # 첫 사이클의 24시간 변동률 계산분까지 캐시에 확보
+        OhlcvDownloader(args.exchange, args.timeframe).run(symbols, start_ms - DAY_MS, end_ms)
+        pool = build_pick_pool(args.exchange, symbols, args.timeframe, start_ms, end_ms, args.cycle_hours)
+        if not len(pool):
+            raise ValueError("조건에 맞는 후보가 있는 사이클이 없음 (심볼 유니버스/기간 확인)")
+        np.save(args.pool, pool)
+        print(f"💾 후보 풀 행렬 저장: {args.pool} ({pool.shape[0]} cycles × {pool.shape[1]})")
+
+    returns = load_trade_returns(args.result, args.cycle) if args.result else None
+    pool = load_pick_pool(args.pool) if args.pool else None
+
+    started = time.time()
+    report = run_monte_carlo(args.paths, returns=returns, pool=pool, n_trades=args.trades,
+                             initial_balance=args.balance, bet_amount=args.bet, seed=args.seed)
+    report['elapsed_seconds'] = round(time.time() - started, 2)
+    print_monte_carlo_report(report)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+        print(f"💾 결과 저장: {args.output}")
+
+
+if __name__ == '__main__':
+    main()
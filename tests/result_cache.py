@@ -0,0 +1,92 @@
+"""
+♻️ 백테스트 결과 캐시 (데이터 지문 + 설정 해시 키)
+
+같은 캔들과 같은 BacktestConfig로 다시 돌리면 시뮬레이션 없이 저장된 리포트를
+돌려준다. 키는 다음을 합친 해시다.
+- 데이터 지문: 시뮬레이션 구간 캔들(ts + ohlcv 바이트) 해시. 구간 안의 캔들이
+  추가/보충되면 지문이 바뀌어 자동 무효화되고, 구간 밖으로 늘어난 데이터는 영향 없음
+- 설정: CONFIG_FIELDS 값, 주기, 심볼, 기간
+- 엔진 소스: ENGINE_SOURCES 파일 내용 (시뮬레이션 로직이 바뀌면 무효화)
+
+리포트는 <RESULT_CACHE_DIR>/<key>.json + <key>.trades.npz (trade_log 형식)로 저장한다.
+랜덤 선택이 들어가는 스캐너 모드는 캐시하지 않는다.
+"""
+
+import hashlib
+import json
+import os
+
+import numpy as np
+
+from tests.trade_log import load_trade_log, save_result, trade_log_path
+
+RESULT_CACHE_DIR = os.getenv("RESULT_CACHE_DIR", "data/backtest_cache")
+
+CONFIG_FIELDS = (
+    'INITIAL_BALANCE', 'BET_AMOUNT',
+    'STOP_LOSS_THRESHOLD', 'TS_ACTIVATION_REWARD', 'TS_CALLBACK_RATE',
+    'TRADING_FEE_PERCENT',
+    'BASE_TIMEFRAME', 'CHECK_INTERVAL', 'INTRABAR_MODE', 'MIN_DATA_COVERAGE',
+)
+
+_TESTS_DIR = os.path.dirname(os.path.abspath(__file__))
+ENGINE_SOURCES = tuple(
+    os.path.join(_TESTS_DIR, name)
+    for name in ('backtester.py', 'intrabar.py', 'candle_store.py', 'trade_log.py')
+) + (os.path.join(os.path.dirname(_TESTS_DIR), 'core', 'strategy.py'),)
+
+
+def data_fingerprint(cache, exchange_id: str, symbol: str, timeframes, start_ms: int, end_ms: int) -> str:
+    """[start_ms, end_ms] 구간 캔들 해시 (타임프레임별 캐시를 순서대로 합침)"""
+    h = hashlib.sha1()
+    for timeframe in timeframes:
+        arrays = cache.open(exchange_id, symbol, timeframe).window(start_ms, end_ms)
+        h.update(f"{exchange_id}|{symbol}|{timeframe}|{len(arrays)}".encode())
+        h.update(np.ascontiguousarray(arrays.ts).tobytes())
+        h.update(np.ascontiguousarray(arrays.ohlcv).tobytes())
+    return h.hexdigest()
+
+
+def _source_hash() -> str:
+    h = hashlib.sha1()
+    for path in ENGINE_SOURCES:
+        with open(path, 'rb') as f:
+            h.update(f.read())
+    return h.hexdigest()
+
+
+class ResultCache:
+    """키 → 리포트 dict (trades는 trade_log 컬럼 배열)"""
+
+    def __init__(self, root: str = RESULT_CACHE_DIR):
+        self.root = root
+        self._sources = None
+
+    def key(self, fingerprint: str, config, **extra) -> str:
+        if self._sources is None:
+            self._sources = _source_hash()
+        payload = {
+            'data': fingerprint,
+            'engine': self._sources,
+            'config': {name: getattr(config, name) for name in CONFIG_FIELDS},
+            **extra,
+        }
+        return hashlib.sha1(json.dumps(payload, sort_keys=True).encode()).hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.root, f"{key}.json")
+
+    def load(self, key: str):
+        """저장된 리포트 (없으면 None)"""
+        path = self._path(key)
+        if not os.path.exists(path) or not os.path.exists(trade_log_path(path)):
+            return None
+        with open(path, 'r', encoding='utf-8') as f:
+            report = json.load(f)['results']['report']
+        if isinstance(report.get('trades'), dict):
+            report['trades'] = load_trade_log(trade_log_path(path))
+        return report
+
+    def store(self, key: str, report: dict):
+        os.makedirs(self.root, exist_ok=True)
+        save_result(self._path(key), {'results': {'report': report}})
@@ -0,0 +1,170 @@
+"""
+🔄 core.recovery.reconcile 표 테스트 (주문 의도 × 보유 잔고 × 체결 내역)
+
+exchange.simulator로 실제 주문을 넣어 잔고/체결을 만든 뒤, 상태 파일을 다시 읽은
+StateManager(= 재시작)로 reconcile을 돌려 결과 상태와 알림 메시지를 비교한다.
+
+실행: python -m pytest -q tests/test_recovery.py
+"""
+
+import asyncio
+import os
+import tempfile
+from datetime import datetime
+
+# 공유 레이트 리밋 상태 파일을 건드리지 않도록 거래소 모듈 import 전에 임시 경로 지정
+os.environ.setdefault("RATE_LIMIT_STATE_PATH", os.path.join(tempfile.mkdtemp(), "rate_limit_state.json"))
+
+import pandas as pd  # noqa: E402
+import pytest  # noqa: E402
+
+import core.config as config  # noqa: E402
+import core.state_manager as state_manager  # noqa: E402
+from core import clock  # noqa: E402
+from core.recovery import reconcile  # noqa: E402
+from core.state_manager import StateManager  # noqa: E402
+from exchange.mexc import MexcConnector  # noqa: E402
+from exchange.simulator import SimulatedExchange  # noqa: E402
+
+SYMBOL = "C/USDT"
+START = datetime(2024, 1, 1)
+BAR_MS = 5 * 60 * 1000
+
+
+def _candles():
+    start_ms = int((START - datetime(1970, 1, 1)).total_seconds() * 1000) - 50 * BAR_MS
+    ts = [start_ms + i * BAR_MS for i in range(200)]
+    return pd.DataFrame({"timestamp": ts, "open": 100.0, "high": 101.0, "low": 99.0,
+                         "close": 100.0, "volume": 1e6})
+
+
+CASES = [
+    # (이름, 활성 베팅, 의도, 의도 이후 체결, 덮어쓸 C 잔고, 실패시킬 조회,
+    #  → 복구 후 활성 베팅, 마지막 청산 사유, 의도 남음, 메시지에 포함될 문구)
+    ("매수 체결 + 코인 보유 → 베팅 재구성", False, "buy", "buy", None, (),
+     True, None, False, "매수 체결 복구"),
+    ("매수 미체결 + 코인 없음 → 의도 제거", False, "buy", None, None, (),
+     False, None, False, None),
+    ("매수 체결 + 코인 이미 없음 → 의도 제거", False, "buy", "buy", 0.0, (),
+     False, None, False, None),
+    ("매수 체결 + 체결 조회 실패 → 현재가로 재구성", False, "buy", "buy", None, ("fetch_my_trades",),
+     True, None, False, "체결 확인 불가"),
+    ("잔고/체결 조회 모두 실패 → 의도 유지", False, "buy", "buy", None, ("fetch_balance", "fetch_my_trades"),
+     False, None, True, None),
+    ("매도 체결 → 체결가로 청산 기록", True, "sell", "sell", None, (),
+     False, "recovery_fill", False, "매도 체결 복구"),
+    ("매도 미체결 + 코인 보유 → 의도만 제거", True, "sell", None, None, (),
+     True, None, False, None),
+    ("매도 체결 + 체결 조회 실패 → 잔고 없음으로 정리", True, "sell", "sell", None, ("fetch_my_trades",),
+     False, "recovery_missing", False, "포지션 없음"),
+    ("이미 반영된 의도 → 의도만 제거", True, "buy", None, None, (),
+     True, None, False, None),
+    ("의도 없음 + 코인 보유 → 변화 없음", True, None, None, None, (),
+     True, None, False, None),
+    ("의도 없음 + 코인 없음 → 외부 청산", True, None, None, 0.0, (),
+     False, "recovery_missing", False, "포지션 없음"),
+    ("소액 잔고(0.0001)도 보유로 인정", True, None, None, 0.0001, (),
+     True, None, False, None),
+    ("정밀도 미만 잔량은 보유 아님", True, None, None, 0.00004, (),
+     False, "recovery_missing", False, "포지션 없음"),
+]
+
+
+@pytest.fixture
+def env(tmp_path, monkeypatch):
+    """가상 시계 + 시뮬레이터 거래소 + 임시 상태 파일 (실주문 모드)"""
+    monkeypatch.setattr(state_manager, "STATE_FILE", str(tmp_path / "casino_state.json"))
+    monkeypatch.setattr(config, "ENABLE_REAL_ORDERS", True)
+    virtual_clock = clock.VirtualClock(START)
+    previous = clock.install(virtual_clock)
+    sim = SimulatedExchange({SYMBOL: _candles()}, clock=virtual_clock.time_ms, depth_usdt=1e6)
+    mexc = MexcConnector(exchange=sim, markets=sim.metadata_cache())
+    yield virtual_clock, sim, mexc
+    clock.install(previous)
+
+
+def _place(mexc, side):
+    return mexc.create_market_buy(SYMBOL, 10) if side == "buy" else mexc.create_market_sell(SYMBOL)
+
+
+@pytest.mark.parametrize(
+    "active, intent, fill, balance, failures, want_active, want_reason, want_intent, want_msg",
+    [c[1:] for c in CASES], ids=[c[0] for c in CASES],
+)
+def test_reconcile(env, active, intent, fill, balance, failures,
+                   want_active, want_reason, want_intent, want_msg):
+    virtual_clock, sim, mexc = env
+    state = StateManager()
+    if active:
+        order = _place(mexc, "buy")
+        state.set_active_bet(SYMBOL, order["average"], 10)
+    virtual_clock.advance(600)
+
+    if intent:
+        state.set_order_intent(intent, SYMBOL, 10)
+    if fill:
+        _place(mexc, fill)
+    if balance is not None:
+        sim.balances["C"] = balance
+    for method in failures:
+        sim.fail_next(method)
+
+    restarted = StateManager()
+    msgs = asyncio.run(reconcile(mexc, restarted))
+
+    assert (restarted.get_active_bet() is not None) == want_active
+    if want_active:
+        assert restarted.get_active_bet()["symbol"] == SYMBOL
+    history = restarted.state["history"]
+    assert (history[-1]["exit_reason"] if history else None) == want_reason
+    assert (restarted.get_order_intent() is not None) == want_intent
+    if want_msg:
+        assert any(want_msg in m for m in msgs)
+    else:
+        assert msgs == []
+
+
+def test_rebuilt_bet_uses_fill_price_and_time(env):
+    """재구성한 베팅은 체결 평균가와 첫 체결 시각을 쓴다"""
+    virtual_clock, sim, mexc = env
+    state = StateManager()
+    state.set_order_intent("buy", SYMBOL, 10)
+    virtual_clock.advance(30)
+    order = _place(mexc, "buy")
+
+    restarted = StateManager()
+    asyncio.run(reconcile(mexc, restarted))
+
+    bet = restarted.get_active_bet()
+    assert bet["entry_price"] == pytest.approx(order["average"])
+    assert bet["entry_time"] == virtual_clock.now().strftime("%Y-%m-%d %H:%M:%S")
+
+
+def test_unknown_holdings_are_reported(env):
+    _, sim, mexc = env
+    sim.balances["X"] = 5.0
+    msgs = asyncio.run(reconcile(mexc, StateManager()))
+    assert msgs == ["⚠️ 상태에 없는 보유 코인: X/USDT"]
+
+
+def test_paper_mode_is_skipped(env, monkeypatch):
+    _, sim, mexc = env
+    monkeypatch.setattr(config, "ENABLE_REAL_ORDERS", False)
+    state = StateManager()
+    state.set_active_bet(SYMBOL, 100.0, 10)
+    assert asyncio.run(reconcile(mexc, state)) == []
+    assert sim.calls == []
+    assert state.get_active_bet() is not None
+
+
+def test_failed_buy_clears_intent(env):
+    """매수 재시도가 모두 실패하면 의도를 지워 다음 진입이 새 since_ms로 시작한다"""
+    from core.scheduler_engine import CasinoScheduler
+
+    _, sim, mexc = env
+    sim.fail_next("create_order", times=config.ORDER_MAX_RETRIES)
+    casino = CasinoScheduler(mexc)
+    asyncio.run(casino._execute_entry({"symbol": SYMBOL, "change": 1.0}, None, auto=True))
+
+    assert casino.state.get_active_bet() is None
+    assert StateManager().get_order_intent() is None
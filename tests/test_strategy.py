@@ -0,0 +1,91 @@
+"""
+🧭 TrailingStopStrategy.on_price 판정 순서 고정 (손절 → 활성화 → 피크 → 콜백 → 타임아웃)
+
+손으로 만든 캔들 (high, low, close, 진입 후 경과 시간)을 차례로 넣고 캔들마다 나온
+Action을 (exit_reason, exit_price, activated, peak_updated)로 비교한다. 변화가 없는
+캔들은 None. 청산이 나오면 그 뒤 캔들은 넣지 않는다.
+
+실행: python -m pytest -q tests/test_strategy.py
+"""
+
+from datetime import datetime, timedelta
+
+import pytest
+
+from core.strategy import TrailingStopStrategy, STOP_LOSS, TRAILING_STOP, TIMEOUT
+
+# 진입가 100 기준: 손절 80 이하, 활성화 120 이상, 콜백 = 피크 × 0.9, 48시간 타임아웃
+STRATEGY = dict(stop_loss=-20, activation=20, callback=10, cycle=timedelta(hours=48))
+ENTRY_PRICE = 100.0
+ENTRY_TIME = datetime(2024, 1, 1)
+H = timedelta(hours=1)
+
+CASES = [
+    # (이름, 시작 트레일링 상태 (활성, 피크), [(high, low, close, 경과)], 캔들별 기대값)
+    ("손절이 같은 봉의 활성화보다 먼저", None,
+     [(130, 79, 100, H)],
+     [(STOP_LOSS, 79, False, False)]),
+    ("활성화만 (피크 = High, 갱신 아님)", None,
+     [(121, 110, 115, H)],
+     [(None, None, True, False)]),
+    ("활성화 직후 같은 봉에서 콜백", None,
+     [(125, 112, 115, H)],
+     [(TRAILING_STOP, 112.5, True, False)]),
+    ("활성화 → 피크 갱신 → 콜백", None,
+     [(121, 110, 115, H), (130, 120, 125, 2 * H), (128, 116, 117, 3 * H)],
+     [(None, None, True, False), (None, None, False, True), (TRAILING_STOP, 117, False, False)]),
+    ("피크 갱신과 콜백이 같은 봉", None,
+     [(121, 110, 115, H), (140, 125, 130, 2 * H)],
+     [(None, None, True, False), (TRAILING_STOP, 126, False, True)]),
+    ("만료 전은 변화 없음, 만료 시 종가 청산", None,
+     [(105, 95, 101, 47 * H), (105, 95, 101, 48 * H)],
+     [None, (TIMEOUT, 101, False, False)]),
+    ("만료 봉에서도 손절이 먼저", None,
+     [(100, 80, 90, 48 * H)],
+     [(STOP_LOSS, 80, False, False)]),
+    ("만료 봉에서도 콜백이 먼저", (True, 150),
+     [(140, 130, 138, 48 * H)],
+     [(TRAILING_STOP, 135, False, False)]),
+    ("만료 봉의 활성화는 기록 후 타임아웃", None,
+     [(121, 119, 120, 48 * H)],
+     [(TIMEOUT, 120, True, False)]),
+    ("저장된 트레일링 상태에서 이어서 시작", (True, 150),
+     [(149, 136, 140, H), (140, 134, 136, 2 * H)],
+     [None, (TRAILING_STOP, 135, False, False)]),
+]
+
+
+def _summary(action):
+    if action is None:
+        return None
+    return action.exit_reason, action.exit_price, action.activated, action.peak_updated
+
+
+@pytest.mark.parametrize("resume, candles, expected", [c[1:] for c in CASES], ids=[c[0] for c in CASES])
+def test_on_price_order(resume, candles, expected):
+    strategy = TrailingStopStrategy(**STRATEGY)
+    is_ts_active, peak_price = resume or (False, None)
+    position = strategy.open("X/USDT", ENTRY_PRICE, 10, ENTRY_TIME, is_ts_active, peak_price)
+
+    got = [_summary(strategy.on_price(position, high, low, close, ENTRY_TIME + elapsed))
+           for high, low, close, elapsed in candles]
+
+    assert len(got) == len(expected)
+    for actual, want in zip(got, expected):
+        if want is None:
+            assert actual is None
+            continue
+        reason, price, activated, peak_updated = want
+        assert actual[0] == reason
+        assert actual[1] == (None if price is None else pytest.approx(price))
+        assert actual[2:] == (activated, peak_updated)
+
+
+def test_peak_follows_high_after_activation():
+    """활성화 후 피크는 High만 따라가고 내려가지 않는다"""
+    strategy = TrailingStopStrategy(**STRATEGY)
+    position = strategy.open("X/USDT", ENTRY_PRICE, 10, ENTRY_TIME)
+    for high, low in ((121, 115), (126, 120), (124, 119), (131, 125)):
+        strategy.on_price(position, high, low, low, ENTRY_TIME + H)
+    assert position.is_ts_active
+    assert position.peak_price == 131
@@ -0,0 +1,330 @@
+"""
+🗃️ 컬럼형 거래 로그 (.npz)
+
+백테스트 리포트의 거래 내역을 Trade.to_dict() 목록 대신 타입이 있는 컬럼 배열로
+들고 다닌다. 저장 시 결과 JSON에는 요약과 거래 수/파일명만 남기고(얇은 인덱스)
+거래는 옆의 <name>.trades.npz 한 파일에 모든 주기를 이어서 기록한다.
+
+컬럼
+- cycle_hours int32, symbol int32(symbols 인덱스), reason int8(reasons 인덱스)
+- entry_ts / exit_ts int64 (ms, UTC)
+- entry_price / exit_price / amount_usdt / pnl_percent / net_pnl_usdt float64
+
+엔진은 시뮬레이션 중 거래를 TradeStore(미리 할당한 구조화 배열, 시각은 int64 ms)에
+쌓고, 리포트 지표(승률/평균 손익/청산 사유/최고 잔고/파산 지점)는 배열 한 번씩
+훑어 계산한다. 거래마다 파이썬 객체를 들고 있지 않으므로 스윕/Monte Carlo처럼
+거래가 수백만 건이어도 메모리와 GC 부담이 작다.
+
+사용법:
+    log = load_trade_log('backtest_scanner_20260214.json')   # 또는 .trades.npz
+    df = trade_frame(log)                                      # 분석용 DataFrame
+"""
+
+import json
+import os
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+from tests.fast_kernel import EXIT_REASONS
+
+PRICE_COLUMNS = ('entry_price', 'exit_price', 'amount_usdt', 'pnl_percent', 'net_pnl_usdt')
+COLUMNS = ('cycle_hours', 'symbol', 'entry_ts', 'exit_ts') + PRICE_COLUMNS + ('reason',)
+
+
+EPOCH = datetime(1970, 1, 1)
+MS = timedelta(milliseconds=1)
+DAY_MS = 86_400_000
+
+TRADE_DTYPE = np.dtype([
+    ('symbol', np.int32), ('reason', np.int8), ('entry_ts', np.int64), ('exit_ts', np.int64),
+    *((name, np.float64) for name in PRICE_COLUMNS),
+])
+
+
+def to_ms(moment) -> int:
+    """naive(UTC) datetime / pd.Timestamp → epoch ms"""
+    return (moment - EPOCH) // MS
+
+
+def from_ms(ms) -> datetime:
+    return EPOCH + timedelta(milliseconds=int(ms))
+
+
+class Trade:
+    """거래 기록 (fee_percent: 진입+청산 합산 수수료율)"""
+    __slots__ = ('symbol', 'entry_price', 'exit_price', 'entry_time', 'exit_time',
+                 'amount_usdt', 'pnl_percent', 'exit_reason', 'net_pnl_usdt')
+
+    def __init__(self, symbol: str, entry_price: float, exit_price: float,
+                 entry_time: datetime, exit_time: datetime,
+                 amount_usdt: float, pnl_percent: float, exit_reason: str, fee_percent: float):
+        self.symbol = symbol
+        self.entry_price = entry_price
+        self.exit_price = exit_price
+        self.entry_time = entry_time
+        self.exit_time = exit_time
+        self.amount_usdt = amount_usdt
+        self.pnl_percent = pnl_percent
+        self.exit_reason = exit_reason
+
+        # 거래 비용 적용한 실제 손익
+        self.net_pnl_usdt = amount_usdt * (pnl_percent / 100) * (1 - fee_percent / 100)
+
+    def to_dict(self) -> dict:
+        return {
+            'symbol': self.symbol,
+            'entry_price': self.entry_price,
+            'exit_price': self.exit_price,
+            'entry_time': self.entry_time.strftime('%Y-%m-%d %H:%M:%S'),
+            'exit_time': self.exit_time.strftime('%Y-%m-%d %H:%M:%S'),
+            'duration_hours': (self.exit_time - self.entry_time).total_seconds() / 3600,
+            'amount_usdt': self.amount_usdt,
+            'pnl_percent': round(self.pnl_percent, 2),
+            'net_pnl_usdt': round(self.net_pnl_usdt, 2),
+            'exit_reason': self.exit_reason
+        }
+
+
+def _to_ms(times) -> np.ndarray:
+    if not len(times):
+        return np.empty(0, dtype=np.int64)
+    return pd.DatetimeIndex(pd.to_datetime(list(times))).as_unit('ms').asi8.astype(np.int64)
+
+
+def _encode(values, table: list) -> np.ndarray:
+    """문자열 → table 인덱스 (없는 값은 table 뒤에 추가)"""
+    index = {v: i for i, v in enumerate(table)}
+    codes = []
+    for v in values:
+        if v not in index:
+            index[v] = len(table)
+            table.append(v)
+        codes.append(index[v])
+    return np.asarray(codes, dtype=np.int64)
+
+
+class TradeStore:
+    """거래 저장소: 미리 할당한 구조화 배열 (용량이 차면 두 배로 늘림)
+
+    len()/인덱싱/순회는 기존 Trade 목록처럼 쓸 수 있다 (인덱싱 시 Trade로 복원).
+    """
+
+    def __init__(self, fee_percent: float, capacity: int = 1024):
+        self.fee_percent = fee_percent
+        self._rows = np.empty(capacity, dtype=TRADE_DTYPE)
+        self._size = 0
+        self.symbols, self.reasons = [], list(EXIT_REASONS)
+        self._symbol_codes = {}
+        self._reason_codes = {r: i for i, r in enumerate(self.reasons)}
+
+    def _code(self, value: str, table: list, codes: dict) -> int:
+        code = codes.get(value)
+        if code is None:
+            code = codes[value] = len(table)
+            table.append(value)
+        return code
+
+    def append(self, symbol: str, entry_price: float, exit_price: float, entry_time, exit_time,
+               amount_usdt: float, pnl_percent: float, exit_reason: str) -> float:
+        """거래 한 건 기록 → 수수료 반영 손익(USDT)"""
+        if self._size == len(self._rows):
+            grown = np.empty(max(2 * len(self._rows), 1), dtype=TRADE_DTYPE)
+            grown[:self._size] = self._rows
+            self._rows = grown
+        net_pnl_usdt = amount_usdt * (pnl_percent / 100) * (1 - self.fee_percent / 100)
+        self._rows[self._size] = (
+            self._code(symbol, self.symbols, self._symbol_codes),
+            self._code(exit_reason, self.reasons, self._reason_codes),
+            to_ms(entry_time), to_ms(exit_time),
+            entry_price, exit_price, amount_usdt, pnl_percent, net_pnl_usdt,
+        )
+        self._size += 1
+        return net_pnl_usdt
+
+    @property
+    def rows(self) -> np.ndarray:
+        return self._rows[:self._size]
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __getitem__(self, i: int) -> Trade:
+        row = self.rows[i]
+        return Trade(self.symbols[row['symbol']], float(row['entry_price']), float(row['exit_price']),
+                     from_ms(row['entry_ts']), from_ms(row['exit_ts']), float(row['amount_usdt']),
+                     float(row['pnl_percent']), self.reasons[row['reason']], self.fee_percent)
+
+    def __iter__(self):
+        return (self[i] for i in range(self._size))
+
+    def columns(self, cycle_hours: int) -> dict:
+        """컬럼 배열 dict (symbols/reasons 조회표 포함)"""
+        rows = self.rows
+        columns = {
+            'cycle_hours': np.full(len(rows), cycle_hours, dtype=np.int32),
+            'symbol': rows['symbol'].copy(),
+            'entry_ts': rows['entry_ts'].copy(),
+            'exit_ts': rows['exit_ts'].copy(),
+            'reason': rows['reason'].copy(),
+        }
+        for name in PRICE_COLUMNS:
+            columns[name] = rows[name].copy()
+        columns['symbols'] = np.array(self.symbols, dtype=str)
+        columns['reasons'] = np.array(self.reasons, dtype=str)
+        return columns
+
+    def metrics(self, initial_balance: float, bet_amount: float) -> dict:
+        """리포트 지표 (배열 연산으로 한 번에 계산, 거래가 1건 이상일 때)"""
+        rows = self.rows
+        pnl = rows['pnl_percent']
+        wins = pnl > 0
+        n_wins = int(np.count_nonzero(wins))
+        n_losses = len(rows) - n_wins
+
+        # 잔고 경로: 초기 자산부터 거래 순서대로 누적 (엔진의 balance += net과 같은 순서)
+        balances = np.cumsum(np.r_[initial_balance, rows['net_pnl_usdt']])[1:]
+        broke = np.flatnonzero(balances < bet_amount)
+        bankruptcy_point = None
+        if len(broke):
+            k = int(broke[0])
+            bankruptcy_point = {
+                'time': from_ms(rows['exit_ts'][k]).strftime('%Y-%m-%d %H:%M:%S'),
+                'balance': float(balances[k]),
+                'trade_count': k + 1,
+            }
+
+        # 청산 사유: 처음 나온 순서대로
+        reason_codes, first_seen, counts = np.unique(rows['reason'], return_index=True, return_counts=True)
+        order = np.argsort(first_seen)
+        exit_reasons = {self.reasons[reason_codes[i]]: int(counts[i]) for i in order}
+
+        best = rows[int(np.argmax(pnl))]
+        return {
+            'peak_balance': max(initial_balance, float(balances.max())),
+            'total_trades': len(rows),
+            'winning_trades': n_wins,
+            'losing_trades': n_losses,
+            'win_rate': round(n_wins / len(rows) * 100, 2),
+            'exit_reasons': exit_reasons,
+            'avg_pnl_percent': round(float(pnl.mean()), 2),
+            'avg_win_percent': round(float(pnl[wins].mean()), 2) if n_wins else 0,
+            'avg_loss_percent': round(float(pnl[~wins].mean()), 2) if n_losses else 0,
+            'max_jackpot': {
+                'symbol': self.symbols[best['symbol']],
+                'pnl_percent': round(float(best['pnl_percent']), 2),
+                'exit_reason': self.reasons[best['reason']],
+                'entry_time': from_ms(best['entry_ts']).strftime('%Y-%m-%d %H:%M'),
+            },
+            'survival_days': int((rows['exit_ts'][-1] - rows['entry_ts'][0]) // DAY_MS),
+            'bankruptcy_point': bankruptcy_point,
+        }
+
+
+def concat_trade_columns(parts) -> dict:
+    """여러 컬럼 dict를 하나로 (symbols/reasons 조회표를 합쳐 코드 재매핑)"""
+    symbols, reasons = [], list(EXIT_REASONS)
+    merged = {name: [] for name in COLUMNS}
+    for part in parts:
+        symbol_map = _encode(part['symbols'].tolist(), symbols)
+        reason_map = _encode(part['reasons'].tolist(), reasons)
+        for name in COLUMNS:
+            merged[name].append(part[name])
+        merged['symbol'][-1] = symbol_map[part['symbol']] if len(part['symbol']) else part['symbol']
+        merged['reason'][-1] = reason_map[part['reason']] if len(part['reason']) else part['reason']
+
+    dtypes = {'cycle_hours': np.int32, 'symbol': np.int32, 'entry_ts': np.int64, 'exit_ts': np.int64,
+              'reason': np.int8, **{name: np.float64 for name in PRICE_COLUMNS}}
+    columns = {
+        name: np.concatenate(merged[name]).astype(dtypes[name]) if merged[name] else np.empty(0, dtype=dtypes[name])
+        for name in COLUMNS
+    }
+    columns['symbols'] = np.array(symbols, dtype=str)
+    columns['reasons'] = np.array(reasons, dtype=str)
+    return columns
+
+
+def trade_log_path(json_path: str) -> str:
+    root, _ = os.path.splitext(json_path)
+    return f"{root}.trades.npz"
+
+
+def save_result(path: str, summary: dict):
+    """요약 JSON(얇은 인덱스) + 거래 로그 .npz 저장
+
+    summary['results'][cycle]['trades']의 컬럼 배열은 .npz로 옮기고 JSON에는
+    {'count', 'file'}만 남긴다. summary 자체는 수정하지 않는다.
+    """
+    npz_path = trade_log_path(path)
+    index = dict(summary)
+    results, parts = {}, []
+    for cycle, result in summary.get('results', {}).items():
+        result = dict(result)
+        trades = result.get('trades')
+        if isinstance(trades, dict):
+            parts.append(trades)
+            result['trades'] = {'count': len(trades['pnl_percent']), 'file': os.path.basename(npz_path)}
+        results[cycle] = result
+    index['results'] = results
+    index['trade_log'] = os.path.basename(npz_path)
+
+    with open(npz_path, 'wb') as f:
+        np.savez(f, **concat_trade_columns(parts))
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(index, f, indent=2, ensure_ascii=False)
+
+
+def _legacy_columns(data: dict) -> dict:
+    """거래 dict 목록이 들어 있던 이전 결과 JSON → 컬럼 배열"""
+    parts = []
+    for result in data.get('results', {'all': data}).values():
+        trades = result.get('trades') or []
+        if not isinstance(trades, list):
+            continue
+        symbols, reasons = [], list(EXIT_REASONS)
+        part = {
+            'cycle_hours': np.full(len(trades), result.get('cycle_hours', 0), dtype=np.int32),
+            'symbol': _encode([t.get('symbol', '') for t in trades], symbols),
+            'entry_ts': _to_ms([t['entry_time'] for t in trades]),
+            'exit_ts': _to_ms([t['exit_time'] for t in trades]),
+            'reason': _encode([t['exit_reason'] for t in trades], reasons),
+        }
+        for name in PRICE_COLUMNS:
+            part[name] = np.asarray([t.get(name, np.nan) for t in trades], dtype=np.float64)
+        part['symbols'] = np.array(symbols, dtype=str)
+        part['reasons'] = np.array(reasons, dtype=str)
+        parts.append(part)
+    return concat_trade_columns(parts)
+
+
+def load_trade_log(path: str) -> dict:
+    """결과 JSON(인덱스 또는 이전 형식) / .trades.npz → 컬럼 배열 dict"""
+    if path.endswith('.npz'):
+        with np.load(path) as data:
+            return {name: data[name] for name in data.files}
+    with open(path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    if 'trade_log' in data:
+        return load_trade_log(os.path.join(os.path.dirname(path), data['trade_log']))
+    return _legacy_columns(data)
+
+
+def select_cycle(log: dict, cycle: str) -> dict:
+    """'72h' 같은 주기 하나의 거래만 남긴 로그"""
+    hours = int(str(cycle).rstrip('h'))
+    mask = log['cycle_hours'] == hours
+    if not mask.any():
+        available = ', '.join(f"{h}h" for h in np.unique(log['cycle_hours']))
+        raise ValueError(f"결과에 주기 {cycle} 없음 (가능: {available})")
+    return {name: log[name][mask] if name in COLUMNS else log[name] for name in log}
+
+
+def trade_frame(log: dict) -> pd.DataFrame:
+    """분석용 DataFrame (symbol/reason은 category, 시각은 datetime)"""
+    df = pd.DataFrame({name: log[name] for name in COLUMNS})
+    df['symbol'] = pd.Categorical.from_codes(df['symbol'], categories=log['symbols'].tolist())
+    df['reason'] = pd.Categorical.from_codes(df['reason'], categories=log['reasons'].tolist())
+    df['entry_time'] = pd.to_datetime(df.pop('entry_ts'), unit='ms')
+    df['exit_time'] = pd.to_datetime(df.pop('exit_ts'), unit='ms')
+    return df
@@ -0,0 +1,280 @@
+"""
+🚶 실전 트레일링 스탑 전략 Walk-Forward 검증
+
+core/config.py의 STOP_LOSS_THRESHOLD / TS_ACTIVATION_REWARD / TS_CALLBACK_RATE / 주기를
+학습 구간에서 그리드 탐색으로 고르고, 바로 다음 검증 구간(OOS)에서 채점한다.
+윈도우 생성/최적화/WFA 흐름은 Labs WFA 테스터(make_wfa_windows, optimize_params,
+walk_forward)와 같고, 시뮬레이션은 tests/fast_kernel.py 커널을 쓴다.
+
+- 캔들은 로컬 캔들 캐시(memmap)에서 읽으므로 윈도우별 워커 프로세스가 복사 없이 공유
+- 심볼들은 각자 독립적으로 시뮬레이션하고 거래 손익을 청산 시각 순으로 합산
+- 베팅액이 고정이라 윈도우별 OOS 손익을 순서대로 이어 붙이면 전체 OOS 자산 곡선이 된다
+
+사용법:
+    python tests/wfa_trailing.py BTC/USDT,ETH/USDT 2023-01-01 2024-12-31 --exchange binance
+    python tests/wfa_trailing.py SOL/USDT 2024-01-01 2024-12-31 --train-days 90 --test-days 30 --workers 4
+"""
+
+import os
+import sys
+import argparse
+import itertools
+import json
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+# 단독 실행(python tests/wfa_trailing.py) 시에도 루트 패키지 import
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from core import config
+from tests.backtester import BacktestConfig
+from tests.candle_store import CandleCache, OhlcvDownloader
+from tests.fast_kernel import simulate_trades, EXIT_REASONS
+
+PARAM_GRID = {
+    "STOP_LOSS_THRESHOLD": [-15.0, -20.0, -25.0, -30.0],
+    "TS_ACTIVATION_REWARD": [15.0, 20.0, 25.0, 35.0],
+    "TS_CALLBACK_RATE": [5.0, 10.0, 15.0],
+    "CYCLE_HOURS": [48, 72, 96],
+}
+
+LIVE_PARAMS = {
+    "STOP_LOSS_THRESHOLD": config.STOP_LOSS_THRESHOLD,
+    "TS_ACTIVATION_REWARD": config.TS_ACTIVATION_REWARD,
+    "TS_CALLBACK_RATE": config.TS_CALLBACK_RATE,
+    "CYCLE_HOURS": config.LIVE_CYCLE_HOURS,
+}
+
+
+def generate_param_space():
+    keys = list(PARAM_GRID)
+    return [dict(zip(keys, values)) for values in itertools.product(*PARAM_GRID.values())]
+
+
+def date_to_ms(date: str, end_of_day: bool = False) -> int:
+    ms = int(pd.Timestamp(date).value // 10**6)
+    return ms + 86_400_000 - 1 if end_of_day else ms
+
+
+def load_series(cache: CandleCache, exchange_id: str, symbols, base_timeframe: str, interval: str) -> dict:
+    """심볼별 memmap 캔들 (전체 구간, 윈도우는 CandleArrays.window로 자름)"""
+    return {s: cache.open_timeframe(exchange_id, s, base_timeframe, interval) for s in symbols}
+
+
+def evaluate(series: dict, params: dict, start_ms: int, end_ms: int) -> dict:
+    """구간 [start, end]에서 파라미터 채점 → 청산 시각 순 거래 손익 + 지표"""
+    exit_ts, pnl_usdt, reasons = [], [], []
+    for arrays in series.values():
+        w = arrays.window(start_ms, end_ms)
+        trades = simulate_trades(
+            w.ts, w.high, w.low, w.close,
+            params["STOP_LOSS_THRESHOLD"], params["TS_ACTIVATION_REWARD"],
+            params["TS_CALLBACK_RATE"], params["CYCLE_HOURS"],
+        )
+        exit_ts.append(np.asarray(w.ts)[trades['exit_idx']])
+        pnl_usdt.append(BacktestConfig.BET_AMOUNT * trades['pnl_percent'] / 100
+                        * (1 - BacktestConfig.TRADING_FEE_PERCENT / 100))
+        reasons.append(trades['reason'])
+
+    exit_ts = np.concatenate(exit_ts) if exit_ts else np.empty(0, dtype=np.int64)
+    order = np.argsort(exit_ts, kind='stable')
+    exit_ts = exit_ts[order]
+    pnl_usdt = np.concatenate(pnl_usdt)[order] if pnl_usdt else np.empty(0)
+    reasons = np.concatenate(reasons)[order] if reasons else np.empty(0, dtype=np.int8)
+
+    equity = BacktestConfig.INITIAL_BALANCE + np.cumsum(pnl_usdt)
+    peaks = np.maximum.accumulate(np.maximum(equity, BacktestConfig.INITIAL_BALANCE)) if len(equity) else equity
+    total_pnl_percent = float(pnl_usdt.sum() / BacktestConfig.INITIAL_BALANCE * 100)
+    mdd = float(((equity - peaks) / peaks).min() * 100) if len(equity) else 0.0
+    return {
+        'exit_ts': exit_ts,
+        'pnl_usdt': pnl_usdt,
+        'reason': reasons,
+        'trades': len(pnl_usdt),
+        'total_pnl_percent': total_pnl_percent,
+        'mdd_percent': mdd,
+        'score': total_pnl_percent + mdd,  # Labs WFA와 같은 수익 + 낙폭(음수) 점수
+    }
+
+
+def optimize_params(series: dict, train_start: str, train_end: str):
+    best_score = -1e9
+    best_S = None
+    start_ms, end_ms = date_to_ms(train_start), date_to_ms(train_end, end_of_day=True)
+    for S_try in generate_param_space():
+        result = evaluate(series, S_try, start_ms, end_ms)
+        if result['trades'] == 0:
+            continue
+        if result['score'] > best_score:
+            best_score = result['score']
+            best_S = S_try
+    return best_S, best_score
+
+
+def make_wfa_windows(start_date: str, end_date: str, train_days=120, test_days=45):
+    windows = []
+    start = pd.Timestamp(start_date)
+    end = pd.Timestamp(end_date)
+    cur_train_start = start
+
+    while True:
+        train_end = cur_train_start + pd.Timedelta(days=train_days - 1)
+        test_start = train_end + pd.Timedelta(days=1)
+        test_end = test_start + pd.Timedelta(days=test_days - 1)
+
+        if test_end > end:
+            break
+
+        windows.append((
+            cur_train_start.strftime("%Y-%m-%d"),
+            train_end.strftime("%Y-%m-%d"),
+            test_start.strftime("%Y-%m-%d"),
+            test_end.strftime("%Y-%m-%d"),
+        ))
+
+        cur_train_start += pd.Timedelta(days=test_days)
+
+    return windows
+
+
+def run_window(task) -> dict:
+    """워커 프로세스: 학습 구간 최적화 → 검증 구간 OOS 채점 (+ 현재 라이브 설정 비교)"""
+    cache_root, exchange_id, symbols, base_timeframe, interval, window = task
+    ts, te, vs, ve = window
+    series = load_series(CandleCache(cache_root), exchange_id, symbols, base_timeframe, interval)
+
+    best_S, train_score = optimize_params(series, ts, te)
+    test_start, test_end = date_to_ms(vs), date_to_ms(ve, end_of_day=True)
+    oos = evaluate(series, best_S, test_start, test_end) if best_S else None
+    live = evaluate(series, LIVE_PARAMS, test_start, test_end)
+    return {
+        'window': window,
+        'best_params': best_S,
+        'train_score': round(train_score, 2) if best_S else None,
+        'oos': oos,
+        'live': live,
+    }
+
+
+def walk_forward(exchange_id: str, symbols, windows, base_timeframe: str, interval: str,
+                 workers: int = None, cache: CandleCache = None) -> dict:
+    """윈도우 병렬 실행 후 OOS 손익을 윈도우 순서대로 이어 붙인 자산 곡선 반환"""
+    cache = cache or CandleCache()
+    tasks = [(cache.root, exchange_id, list(symbols), base_timeframe, interval, w) for w in windows]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        results = list(pool.map(run_window, tasks))
+
+    def curve(key):
+        parts = [r[key] for r in results if r[key] is not None]
+        if not parts:
+            return pd.Series(dtype=float)
+        exit_ts = np.concatenate([p['exit_ts'] for p in parts])
+        pnl = np.concatenate([p['pnl_usdt'] for p in parts])
+        return pd.Series(
+            BacktestConfig.INITIAL_BALANCE + np.cumsum(pnl),
+            index=pd.to_datetime(exit_ts, unit='ms'),
+        )
+
+    return {'windows': results, 'oos_equity': curve('oos'), 'live_equity': curve('live')}
+
+
+def summarize_curve(equity: pd.Series) -> dict:
+    if equity.empty:
+        return {'trades': 0, 'final_balance': BacktestConfig.INITIAL_BALANCE, 'total_pnl_percent': 0.0, 'mdd_percent': 0.0}
+    peaks = np.maximum(equity.cummax(), BacktestConfig.INITIAL_BALANCE)
+    return {
+        'trades': len(equity),
+        'final_balance': round(float(equity.iloc[-1]), 2),
+        'total_pnl_percent': round(float((equity.iloc[-1] - BacktestConfig.INITIAL_BALANCE) / BacktestConfig.INITIAL_BALANCE * 100), 2),
+        'mdd_percent': round(float(((equity - peaks) / peaks).min() * 100), 2),
+    }
+
+
+def report(result: dict):
+    print(f"\n{'='*80}")
+    print(f"📊 Walk-Forward 리포트 (실전 트레일링 스탑)")
+    print(f"{'='*80}")
+    for r in result['windows']:
+        ts, te, vs, ve = r['window']
+        oos = r['oos']
+        oos_str = f"OOS {oos['total_pnl_percent']:+.2f}% ({oos['trades']}건)" if oos else "OOS 거래 없음"
+        print(f"  [TRN] {ts}~{te} [TST] {vs}~{ve}  params:{r['best_params']}  "
+              f"train:{r['train_score']}  {oos_str}  live {r['live']['total_pnl_percent']:+.2f}%")
+
+    oos = summarize_curve(result['oos_equity'])
+    live = summarize_curve(result['live_equity'])
+    print(f"\n{'─'*80}")
+    print(f"  WFA OOS : 최종 {oos['final_balance']} USDT ({oos['total_pnl_percent']:+.2f}%), MDD {oos['mdd_percent']}%, {oos['trades']}건")
+    print(f"  라이브 설정 {LIVE_PARAMS}")
+    print(f"          : 최종 {live['final_balance']} USDT ({live['total_pnl_percent']:+.2f}%), MDD {live['mdd_percent']}%, {live['trades']}건")
+    print(f"{'='*80}\n")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='실전 트레일링 스탑 파라미터 Walk-Forward 검증')
+    parser.add_argument('symbols', help='심볼 목록 (쉼표 구분, 예: BTC/USDT,ETH/USDT)')
+    parser.add_argument('start_date', help='시작일 (YYYY-MM-DD)')
+    parser.add_argument('end_date', help='종료일 (YYYY-MM-DD)')
+    parser.add_argument('--exchange', default='binance', help='캔들 거래소 (기본: binance)')
+    parser.add_argument('--base-timeframe', default=BacktestConfig.BASE_TIMEFRAME)
+    parser.add_argument('--interval', default=BacktestConfig.CHECK_INTERVAL)
+    parser.add_argument('--train-days', type=int, default=120)
+    parser.add_argument('--test-days', type=int, default=45)
+    parser.add_argument('--workers', type=int, default=None, help='윈도우 병렬 프로세스 수 (기본: CPU 수)')
+    parser.add_argument('--output', '-o', default=None, help='결과 파일 접두사 (.json + _oos_equity.csv)')
+    args = parser.parse_args()
+
+    symbols = [s.strip() for s in args.symbols.split(',') if s.strip()]
+    windows = make_wfa_windows(args.start_date, args.end_date, args.train_days, args.test_days)
+    if not windows:
+        print("❌ 기간이 학습+검증 윈도우 하나보다 짧음")
+        sys.exit(1)
+
+    print(f"📦 캔들 준비: {args.exchange} {symbols} ({args.start_date} ~ {args.end_date})")
+    downloader = OhlcvDownloader(args.exchange, args.base_timeframe)
+    downloader.run(symbols, date_to_ms(args.start_date), date_to_ms(args.end_date, end_of_day=True))
+
+    print(f"🚀 WFA 시작: 윈도우 {len(windows)}개 × 파라미터 {len(generate_param_space())}개")
+    started = time.time()
+    result = walk_forward(args.exchange, symbols, windows, args.base_timeframe, args.interval,
+                          workers=args.workers, cache=downloader.cache)
+    print(f"  - 소요: {time.time() - started:.1f}s")
+    report(result)
+
+    prefix = args.output or f"wfa_trailing_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+    result['oos_equity'].rename('balance').to_csv(f"{prefix}_oos_equity.csv", index_label='exit_time')
+    summary = {
+        'exchange': args.exchange,
+        'symbols': symbols,
+        'period': f"{args.start_date} ~ {args.end_date}",
+        'interval': args.interval,
+        'param_grid': PARAM_GRID,
+        'live_params': LIVE_PARAMS,
+        'windows': [
+            {
+                'train': f"{r['window'][0]} ~ {r['window'][1]}",
+                'test': f"{r['window'][2]} ~ {r['window'][3]}",
+                'best_params': r['best_params'],
+                'train_score': r['train_score'],
+                'oos_pnl_percent': round(r['oos']['total_pnl_percent'], 2) if r['oos'] else None,
+                'oos_trades': r['oos']['trades'] if r['oos'] else 0,
+                'oos_exit_reasons': {
+                    name: int((r['oos']['reason'] == code).sum()) for code, name in enumerate(EXIT_REASONS)
+                } if r['oos'] else {},
+                'live_pnl_percent': round(r['live']['total_pnl_percent'], 2),
+            }
+            for r in result['windows']
+        ],
+        'oos': summarize_curve(result['oos_equity']),
+        'live': summarize_curve(result['live_equity']),
+    }
+    with open(f"{prefix}.json", 'w', encoding='utf-8') as f:
+        json.dump(summary, f, indent=2, ensure_ascii=False)
+    print(f"💾 결과 저장: {prefix}.json, {prefix}_oos_equity.csv")
+
+
+if __name__ == '__main__':
+    main()
@@ -1,13 +1,13 @@
 import os
 import asyncio
-from datetime import datetime, timedelta
+from datetime import datetime
 from telegram import Update, ReplyKeyboardMarkup, InlineKeyboardMarkup, InlineKeyboardButton
 from telegram.ext import Application, CommandHandler, ContextTypes, MessageHandler, filters, CallbackQueryHandler
-from dotenv import load_dotenv
 from utils.logger import logger
 import core.config as config
+from core.strategy import TrailingStopStrategy
 
-load_dotenv()
+config.load_env()
 
 class CasinoBot:
     def __init__(self, post_init=None):
@@ -38,6 +38,7 @@ class CasinoBot:
         self.app.add_handler(CommandHandler("start", self.start))
         self.app.add_handler(CommandHandler("status", self.status))
         self.app.add_handler(CommandHandler("help", self.help))
+        self.app.add_handler(CommandHandler("latency", self.latency))
         # 콜백 쿼리 핸들러 (버튼 클릭)
         self.app.add_handler(CallbackQueryHandler(self.handle_callback))
         # 텍스트 메시지 핸들러
@@ -48,7 +49,7 @@ class CasinoBot:
         """자동 청산 예정 시간 문자열 계산"""
         try:
             entry_dt = datetime.strptime(entry_time, "%Y-%m-%d %H:%M:%S")
-            exit_dt = entry_dt + config.CYCLE_DELTA - timedelta(seconds=config.EARLY_EXIT_SECONDS)
+            exit_dt = TrailingStopStrategy.from_config().expires_at(entry_dt)
             remaining = exit_dt - datetime.now()
             if remaining.total_seconds() > 0:
                 remaining_minutes = int(remaining.total_seconds() / 60)
@@ -165,6 +166,31 @@ class CasinoBot:
         else:
             await update.message.reply_text("❌ 시스템 오류: 스케줄러가 연결되지 않았습니다.", reply_markup=self.markup)
 
+    async def latency(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        """청산 사유별 감지→체결 지연/슬리피지 분포"""
+        if not hasattr(self, 'scheduler') or not self.scheduler:
+            await update.message.reply_text("⚠️ 시스템 연결 대기 중...")
+            return
+
+        stats = self.scheduler.state.get_exit_latency_stats()
+        if not stats:
+            await update.message.reply_text("⏱️ 기록된 청산 지연 데이터가 없습니다.")
+            return
+
+        lines = ["⏱️ **청산 지연/슬리피지**\n지연: p50 / p90 / max · 슬리피지/임계 초과: p50 / p10 / min (음수 = 불리)"]
+        for reason, s in stats.items():
+            lines.append(f"\n`{reason}` ({s['count']}건)")
+            fill = s.get("detect_to_fill_ms")
+            if fill:
+                lines.append(f"• 감지→체결: {fill['p50']} / {fill['p90']} / {fill['max']} ms")
+            slip = s.get("slippage_percent")
+            if slip:
+                lines.append(f"• 슬리피지: {slip['p50']:+.3f} / {slip['p10']:+.3f} / {slip['min']:+.3f}%")
+            over = s.get("overshoot_percent")
+            if over:
+                lines.append(f"• 임계 초과(폴링): {over['p50']:+.3f} / {over['p10']:+.3f} / {over['min']:+.3f}%")
+        await update.message.reply_text("\n".join(lines), parse_mode="Markdown")
+
     async def help(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         msg = (
             "🎰 **Boracay Casino 사용법**\n\n"